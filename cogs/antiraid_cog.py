@@ -9,19 +9,39 @@
 # Developer Of Version: Grok (xAI), CodeProjects, RedeGamer - Serviços Escaláveis para seu Game
 
 import nextcord
-from nextcord.ext import commands
+from nextcord.ext import commands, tasks
 from nextcord import Interaction, SlashOption, ui
 import json
 import logging
 from datetime import datetime, timedelta
 import asyncio
+import time
 from collections import defaultdict
 import pytz
+from utils.raid_mitigation import RaidMitigationEngine, CLEANUP_ACTIONS, parse_since
+from utils.scheduler import DeadlineScheduler
+from utils.audit_attribution import AuditLogAttributor, NEUTRALIZE_COOLDOWN_SECONDS
+from utils.antiraid_journal import EventJournal
+from utils.reputation import RaiderReputation
+from utils.alert_aggregator import AlertAggregator
 
 # Configuração de logging
 logger = logging.getLogger("DataBit.AntiRaidCog")
 logger.setLevel(logging.INFO)
 
+RAID_OFFENDER_WINDOW = 60  # Segundos para agrupar infratores de uma mesma raid
+RAID_OFFENDER_THRESHOLD = 5  # Infratores distintos na janela que disparam a limpeza automática
+JOURNAL_RETENTION_MONTHS = 6  # Partições mensais do diário mantidas em disco
+REPUTATION_TIMEOUT_THRESHOLD = 3  # Punições em outros servidores que levam a um timeout preventivo
+REPUTATION_SEEN_LIMIT = 100000  # Membros cuja primeira mensagem já foi verificada (memória limitada)
+REPUTATION_REPORT_WINDOW = 3600  # Segundos em que a mesma conta não é reportada de novo pelo mesmo servidor (um incidente)
+LOCKDOWN_RELEASE_RETRY_SECONDS = 60  # Espera inicial antes de tentar de novo um desbloqueio que falhou (dobra a cada falha)
+LOCKDOWN_RELEASE_RETRY_MAX = 1800  # Espera máxima entre tentativas de desbloqueio
+DANGEROUS_PERMISSIONS = (
+    "administrator", "manage_guild", "manage_channels", "manage_roles",
+    "ban_members", "kick_members", "manage_webhooks"
+)
+
 class AntiRaidCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -29,6 +49,18 @@ class AntiRaidCog(commands.Cog):
         self.br_tz = pytz.timezone("America/Sao_Paulo")
         self.activity_tracker = defaultdict(list)  # Rastreia ações por usuário
         self.lockdown_active = {}  # Estado de lockdown por servidor
+        self.raid_offenders = defaultdict(dict)  # {guild_id: {user_id: datetime da detecção}}
+        self.cleanup_running = set()  # Servidores com limpeza em andamento
+        self.mitigation = RaidMitigationEngine()
+        self.lockdown_scheduler = DeadlineScheduler(self.release_lockdown, name="antiraid-lockdown")
+        self.attributor = AuditLogAttributor()
+        self.neutralized = {}  # {(guild_id, user_id): instante (monotonic) da neutralização}, expira após o cooldown
+        self.journal = EventJournal()
+        self.alerts = AlertAggregator(self.log_action, self.br_tz)
+        self.reputation = RaiderReputation()
+        self.reputation.load()
+        self.reputation_seen = {}  # {(guild_id, user_id): None}, usado como conjunto com ordem de inserção
+        self.reputation_reported = {}  # {(guild_id, user_id): instante (monotonic) do último reporte}
         self.default_config = {
             "enabled": False,
             "log_channel": None,
@@ -38,8 +70,101 @@ class AntiRaidCog(commands.Cog):
             "max_role_changes_per_hour": 5,
             "max_invites_per_hour": 10,
             "lockdown_duration_minutes": 30,
+            "lockdown_mode": "role",  # "role" edita o @everyone; "channels" aplica overwrites por canal
+            "reputation_opt_in": False,  # Compartilha e consulta a reputação de raiders entre servidores
             "whitelist_roles": []
         }
+        self.init_db()
+        self.restore_pending_lockdowns()
+        self.flush_journal.start()
+        self.prune_journal.start()
+        self.persist_reputation.start()
+
+    def cog_unload(self):
+        self.lockdown_scheduler.stop()
+        self.alerts.stop()
+        self.flush_journal.cancel()
+        self.prune_journal.cancel()
+        self.persist_reputation.cancel()
+        self.journal.close()
+        if self.reputation.dirty:
+            self.reputation.save()
+
+    @tasks.loop(seconds=2)
+    async def flush_journal(self):
+        """Grava em lote os eventos acumulados no diário anti-raid."""
+        await self.journal.flush()
+
+    @tasks.loop(minutes=10)
+    async def persist_reputation(self):
+        """Aplica o decaimento e grava a reputação de raiders em disco quando houver mudanças."""
+        try:
+            self.reputation.rotate()
+            if self.reputation.dirty:
+                await asyncio.to_thread(self.reputation.save)
+        except Exception as e:
+            logger.error(f"Erro ao persistir reputação de raiders: {e}")
+
+    @tasks.loop(hours=24)
+    async def prune_journal(self):
+        """Descarta partições antigas do diário anti-raid."""
+        try:
+            await asyncio.to_thread(self.journal.prune, JOURNAL_RETENTION_MONTHS)
+        except Exception as e:
+            logger.error(f"Erro ao podar diário anti-raid: {e}")
+
+    def init_db(self):
+        """Cria as tabelas auxiliares do anti-raid."""
+        try:
+            cursor = self.db.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS antiraid_config (
+                    guild_id TEXT PRIMARY KEY,
+                    enabled BOOLEAN DEFAULT FALSE,
+                    log_channel INTEGER,
+                    max_messages_per_minute INTEGER,
+                    max_channel_changes_per_hour INTEGER,
+                    max_bans_per_hour INTEGER,
+                    max_role_changes_per_hour INTEGER,
+                    max_invites_per_hour INTEGER,
+                    lockdown_duration_minutes INTEGER,
+                    whitelist_roles TEXT
+                )
+            """)
+            cursor.execute("PRAGMA table_info(antiraid_config)")
+            columns = {row[1] for row in cursor.fetchall()}
+            for column, definition in (("lockdown_mode", "TEXT DEFAULT 'role'"), ("reputation_opt_in", "BOOLEAN DEFAULT FALSE")):
+                if column not in columns:
+                    cursor.execute(f"ALTER TABLE antiraid_config ADD COLUMN {column} {definition}")
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS antiraid_cleanup_audit (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    guild_id TEXT NOT NULL,
+                    moderator_id TEXT,
+                    trigger TEXT NOT NULL,
+                    action TEXT NOT NULL,
+                    since TEXT,
+                    member_ids TEXT NOT NULL,
+                    succeeded INTEGER NOT NULL,
+                    failed INTEGER NOT NULL,
+                    messages_deleted INTEGER NOT NULL,
+                    duration_seconds REAL NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_antiraid_cleanup_guild ON antiraid_cleanup_audit (guild_id, created_at)")
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS antiraid_lockdowns (
+                    guild_id TEXT PRIMARY KEY,
+                    mode TEXT NOT NULL,
+                    unlock_at REAL NOT NULL,
+                    snapshot TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+            """)
+            self.db.commit()
+        except Exception as e:
+            logger.error(f"Erro ao inicializar tabelas do anti-raid: {e}")
 
     def load_config(self, guild_id: str) -> dict:
         """Carrega a configuração de anti-raid do banco de dados."""
@@ -66,8 +191,8 @@ class AntiRaidCog(commands.Cog):
                 INSERT OR REPLACE INTO antiraid_config (
                     guild_id, enabled, log_channel, max_messages_per_minute,
                     max_channel_changes_per_hour, max_bans_per_hour, max_role_changes_per_hour,
-                    max_invites_per_hour, lockdown_duration_minutes, whitelist_roles
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    max_invites_per_hour, lockdown_duration_minutes, lockdown_mode, reputation_opt_in, whitelist_roles
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
                 (
                     guild_id,
@@ -79,6 +204,8 @@ class AntiRaidCog(commands.Cog):
                     config.get("max_role_changes_per_hour", self.default_config["max_role_changes_per_hour"]),
                     config.get("max_invites_per_hour", self.default_config["max_invites_per_hour"]),
                     config.get("lockdown_duration_minutes", self.default_config["lockdown_duration_minutes"]),
+                    config.get("lockdown_mode", self.default_config["lockdown_mode"]),
+                    config.get("reputation_opt_in", self.default_config["reputation_opt_in"]),
                     json.dumps(config.get("whitelist_roles", self.default_config["whitelist_roles"]))
                 )
             )
@@ -98,6 +225,117 @@ class AntiRaidCog(commands.Cog):
                 except Exception as e:
                     logger.error(f"Erro ao enviar log para canal {config['log_channel']} em {guild_id}: {e}")
 
+    def save_lockdown(self, guild_id: str, mode: str, unlock_at: float, snapshot: dict):
+        """Persiste um lockdown pendente com o estado original das permissões."""
+        try:
+            cursor = self.db.cursor()
+            cursor.execute(
+                """
+                INSERT OR REPLACE INTO antiraid_lockdowns (guild_id, mode, unlock_at, snapshot, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (guild_id, mode, unlock_at, json.dumps(snapshot), datetime.now(self.br_tz).isoformat())
+            )
+            self.db.commit()
+        except Exception as e:
+            logger.error(f"Erro ao salvar lockdown de {guild_id}: {e}")
+
+    def load_lockdown(self, guild_id: str) -> dict:
+        """Carrega o lockdown pendente de um servidor."""
+        try:
+            cursor = self.db.cursor()
+            cursor.execute("SELECT mode, unlock_at, snapshot FROM antiraid_lockdowns WHERE guild_id = ?", (guild_id,))
+            result = cursor.fetchone()
+            if result:
+                return {"mode": result[0], "unlock_at": result[1], "snapshot": json.loads(result[2])}
+            return {}
+        except Exception as e:
+            logger.error(f"Erro ao carregar lockdown de {guild_id}: {e}")
+            return {}
+
+    def delete_lockdown(self, guild_id: str):
+        """Remove o registro de lockdown de um servidor."""
+        try:
+            cursor = self.db.cursor()
+            cursor.execute("DELETE FROM antiraid_lockdowns WHERE guild_id = ?", (guild_id,))
+            self.db.commit()
+        except Exception as e:
+            logger.error(f"Erro ao remover lockdown de {guild_id}: {e}")
+
+    def restore_pending_lockdowns(self):
+        """Recoloca no agendador os lockdowns que estavam ativos antes de reiniciar."""
+        try:
+            cursor = self.db.cursor()
+            cursor.execute("SELECT guild_id, unlock_at FROM antiraid_lockdowns")
+            for guild_id, unlock_at in cursor.fetchall():
+                self.lockdown_active[guild_id] = True
+                self.lockdown_scheduler.schedule(guild_id, unlock_at)
+            logger.info(f"Restaurados {len(self.lockdown_scheduler)} lockdowns pendentes")
+        except Exception as e:
+            logger.error(f"Erro ao restaurar lockdowns pendentes: {e}")
+
+    def snapshot_channel_overwrites(self, guild: nextcord.Guild, whitelist: set) -> dict:
+        """Guarda os overwrites de cada canal de texto que o lockdown por canais vai alterar.
+
+        Além do @everyone, cargos com send_messages liberado no canal também são neutralizados,
+        já que um allow de cargo sobrepõe o deny do @everyone.
+        """
+        snapshot = {}
+        everyone = guild.default_role
+        for channel in guild.text_channels:
+            targets = {}
+            for target, overwrite in channel.overwrites.items():
+                if not isinstance(target, nextcord.Role) or target.id in whitelist:
+                    continue
+                if target == everyone or overwrite.send_messages:
+                    allow, deny = overwrite.pair()
+                    targets[str(target.id)] = [allow.value, deny.value]
+            if str(everyone.id) not in targets:
+                targets[str(everyone.id)] = None  # Não havia overwrite: será removido no desbloqueio
+            snapshot[str(channel.id)] = targets
+        return snapshot
+
+    async def _set_overwrite(self, channel: nextcord.TextChannel, role: nextcord.Role,
+                             overwrite: nextcord.PermissionOverwrite, reason: str) -> bool:
+        try:
+            async with self.mitigation.budget.slot():
+                await channel.set_permissions(role, overwrite=overwrite, reason=reason)
+            return True
+        except Exception as e:
+            logger.warning(f"Erro ao alterar overwrite de {role.id} em {channel.id}: {e}")
+            return False
+
+    async def apply_channel_overwrites(self, guild: nextcord.Guild, snapshot: dict, lock: bool) -> tuple[int, float]:
+        """Aplica (lock) ou restaura (unlock) os overwrites de todos os canais em paralelo."""
+        started = time.monotonic()
+        reason = "Anti-Raid: Lockdown por canais " + ("ativado" if lock else "encerrado")
+        everyone_id = str(guild.default_role.id)
+        coros = []
+        for channel_id, targets in snapshot.items():
+            channel = guild.get_channel(int(channel_id))
+            if not channel:
+                continue
+            for role_id, pair in targets.items():
+                role = guild.get_role(int(role_id))
+                if not role:
+                    continue
+                if lock:
+                    overwrite = channel.overwrites_for(role)
+                    if role_id == everyone_id:
+                        overwrite.update(send_messages=False, send_messages_in_threads=False,
+                                         create_public_threads=False, create_private_threads=False)
+                    else:
+                        overwrite.update(send_messages=None)
+                elif pair is None:
+                    overwrite = None
+                else:
+                    overwrite = nextcord.PermissionOverwrite.from_pair(
+                        nextcord.Permissions(pair[0]), nextcord.Permissions(pair[1])
+                    )
+                coros.append(self._set_overwrite(channel, role, overwrite, reason))
+        results = await asyncio.gather(*coros)
+        return results.count(False), time.monotonic() - started
+
     async def activate_lockdown(self, guild: nextcord.Guild):
         guild_id = str(guild.id)
         if guild_id in self.lockdown_active:
@@ -105,51 +343,342 @@ class AntiRaidCog(commands.Cog):
 
         config = self.load_config(guild_id)
         self.lockdown_active[guild_id] = True
+        mode = config.get("lockdown_mode") or "role"
 
         everyone_role = guild.default_role
+        snapshot = {"roles": {}, "channels": {}}
+        if mode == "channels":
+            snapshot["channels"] = self.snapshot_channel_overwrites(guild, set(config["whitelist_roles"]))
+        else:
+            snapshot["roles"][str(everyone_role.id)] = everyone_role.permissions.value
+        unlock_at = time.time() + config["lockdown_duration_minutes"] * 60
+        # Persiste antes de editar para que um reinício no meio do lockdown ainda consiga restaurar
+        self.save_lockdown(guild_id, mode, unlock_at, snapshot)
+
+        details = ""
         try:
-            await everyone_role.edit(
-                permissions=nextcord.Permissions(
+            if mode == "channels":
+                failures, elapsed = await self.apply_channel_overwrites(guild, snapshot["channels"], lock=True)
+                snapshot["lock_seconds"] = elapsed
+                self.save_lockdown(guild_id, mode, unlock_at, snapshot)
+                details = (
+                    f"\n**Modo:** por canais ({len(snapshot['channels'])} canais bloqueados em {elapsed:.1f}s"
+                    + (f", {failures} falhas" if failures else "") + ")"
+                )
+                logger.info(f"Lockdown por canais aplicado em {guild_id}: {len(snapshot['channels'])} canais em {elapsed:.2f}s")
+            else:
+                permissions = nextcord.Permissions(everyone_role.permissions.value)
+                permissions.update(
                     send_messages=False,
                     create_instant_invite=False,
                     manage_channels=False,
                     manage_roles=False
-                ),
-                reason="Anti-Raid: Lockdown ativado devido a atividade suspeita"
-            )
+                )
+                await everyone_role.edit(
+                    permissions=permissions,
+                    reason="Anti-Raid: Lockdown ativado devido a atividade suspeita"
+                )
         except Exception as e:
             logger.error(f"Erro ao ativar lockdown em {guild_id}: {e}")
+            self.delete_lockdown(guild_id)
             self.lockdown_active.pop(guild_id, None)
             return
+        self.lockdown_scheduler.schedule(guild_id, unlock_at)
+        self.journal.append("action_lockdown", guild_id, detail=mode)
 
         embed = nextcord.Embed(
             title="<:lock:1351976522168402081> Modo de Quarentena Ativado",
-            description=f"O servidor entrou em lockdown por {config['lockdown_duration_minutes']} minutos devido a atividades suspeitas.",
+            description=f"O servidor entrou em lockdown por {config['lockdown_duration_minutes']} minutos devido a atividades suspeitas.{details}",
             color=nextcord.Color.red(),
             timestamp=datetime.now(self.br_tz)
         )
         await self.log_action(guild_id, embed)
 
-        await asyncio.sleep(config["lockdown_duration_minutes"] * 60)
-        try:
-            await everyone_role.edit(
-                permissions=nextcord.Permissions.general(),
-                reason="Anti-Raid: Lockdown encerrado"
+    async def release_lockdown(self, guild_id: str):
+        """Encerra o lockdown restaurando exatamente as permissões salvas no snapshot."""
+        lockdown = self.load_lockdown(guild_id)
+        guild = self.bot.get_guild(int(guild_id))
+        if not lockdown or not guild:
+            self.delete_lockdown(guild_id)
+            self.lockdown_active.pop(guild_id, None)
+            return
+
+        failures = 0
+        for role_id, permissions_value in lockdown["snapshot"].get("roles", {}).items():
+            role = guild.get_role(int(role_id))
+            if not role:
+                continue
+            try:
+                await role.edit(
+                    permissions=nextcord.Permissions(permissions_value),
+                    reason="Anti-Raid: Lockdown encerrado"
+                )
+            except Exception as e:
+                failures += 1
+                logger.error(f"Erro ao desativar lockdown em {guild_id}: {e}")
+
+        details = ""
+        channels = lockdown["snapshot"].get("channels", {})
+        if channels:
+            channel_failures, elapsed = await self.apply_channel_overwrites(guild, channels, lock=False)
+            failures += channel_failures
+            details = (
+                f"\n**Canais restaurados:** {len(channels)} em {elapsed:.1f}s"
+                + (f" ({channel_failures} falhas)" if channel_failures else "")
             )
-        except Exception as e:
-            logger.error(f"Erro ao desativar lockdown em {guild_id}: {e}")
+            if "lock_seconds" in lockdown["snapshot"]:
+                details += f"\n**Tempo de bloqueio:** {lockdown['snapshot']['lock_seconds']:.1f}s"
+            logger.info(f"Lockdown por canais revertido em {guild_id}: {len(channels)} canais em {elapsed:.2f}s")
 
+        if failures:
+            # Mantém o snapshot e o estado de lockdown: restaurar é idempotente, então a próxima tentativa refaz tudo
+            attempts = lockdown["snapshot"].get("release_attempts", 0) + 1
+            lockdown["snapshot"]["release_attempts"] = attempts
+            retry_at = time.time() + min(LOCKDOWN_RELEASE_RETRY_SECONDS * 2 ** (attempts - 1), LOCKDOWN_RELEASE_RETRY_MAX)
+            self.save_lockdown(guild_id, lockdown["mode"], retry_at, lockdown["snapshot"])
+            self.lockdown_scheduler.schedule(guild_id, retry_at)
+            logger.warning(
+                f"Desbloqueio de {guild_id} incompleto ({failures} falhas, tentativa {attempts}); "
+                f"nova tentativa em {retry_at - time.time():.0f}s"
+            )
+            return
+
+        self.delete_lockdown(guild_id)
         self.lockdown_active.pop(guild_id, None)
+        self.journal.append("action_unlock", guild_id, detail=lockdown["mode"])
 
         embed = nextcord.Embed(
             title="<:unlock:1351976453901910048> Modo de Quarentena Desativado",
-            description="O servidor voltou ao normal após o período de lockdown.",
+            description=f"O servidor voltou ao normal após o período de lockdown.{details}",
             color=nextcord.Color.green(),
             timestamp=datetime.now(self.br_tz)
         )
         await self.log_action(guild_id, embed)
 
+    def save_cleanup_audit(self, guild_id: str, moderator_id: str, trigger: str, since: datetime, report: dict):
+        """Registra uma limpeza anti-raid na tabela de auditoria."""
+        try:
+            cursor = self.db.cursor()
+            cursor.execute(
+                """
+                INSERT INTO antiraid_cleanup_audit (
+                    guild_id, moderator_id, trigger, action, since, member_ids,
+                    succeeded, failed, messages_deleted, duration_seconds, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    guild_id,
+                    moderator_id,
+                    trigger,
+                    report["action"],
+                    since.isoformat() if since else None,
+                    json.dumps(report["succeeded"] + report["failed"]),
+                    len(report["succeeded"]),
+                    len(report["failed"]),
+                    report["messages_deleted"],
+                    report["duration"],
+                    datetime.now(self.br_tz).isoformat()
+                )
+            )
+            self.db.commit()
+        except Exception as e:
+            logger.error(f"Erro ao registrar auditoria de limpeza em {guild_id}: {e}")
+
+    def cleanup_embed(self, report: dict, trigger: str, done: bool) -> nextcord.Embed:
+        """Monta a embed de progresso/resultado de uma limpeza."""
+        processed = len(report["succeeded"]) + len(report["failed"])
+        embed = nextcord.Embed(
+            title="<:raid:1351968258537947316> Limpeza Anti-Raid " + ("Concluída" if done else "em Andamento"),
+            description=f"**Origem:** {trigger}\n**Ação:** {report['action']}",
+            color=nextcord.Color.green() if done else nextcord.Color.orange(),
+            timestamp=datetime.now(self.br_tz)
+        )
+        embed.add_field(
+            name="Contas",
+            value=f"{processed}/{report['requested']} processadas\n{len(report['succeeded'])} sucesso | {len(report['failed'])} falhas",
+            inline=True
+        )
+        embed.add_field(
+            name="Mensagens",
+            value=(
+                f"{report['messages_deleted']} removidas\n"
+                f"{report['channels_done'] + report['channels_failed']}/{report['channels_total']} canais"
+            ),
+            inline=True
+        )
+        embed.add_field(name="Duração", value=f"{report['duration']:.1f}s", inline=True)
+        return embed
+
+    async def run_cleanup(self, guild: nextcord.Guild, user_ids: set, action: str, trigger: str,
+                          since: datetime = None, moderator_id: str = None, progress=None) -> dict:
+        """Executa a limpeza pós-raid, registra a auditoria e envia o resultado ao canal de logs."""
+        guild_id = str(guild.id)
+        self.cleanup_running.add(guild_id)
+        try:
+            report = await self.mitigation.cleanup(
+                guild, user_ids, action,
+                reason=f"Anti-Raid: Limpeza pós-raid ({trigger})",
+                since=since,
+                progress=progress
+            )
+        finally:
+            self.cleanup_running.discard(guild_id)
+        self.save_cleanup_audit(guild_id, moderator_id, trigger, since, report)
+        self.report_raider(guild_id, report["succeeded"])
+        self.journal.append(
+            "action_cleanup", guild_id, moderator_id,
+            detail=json.dumps({"action": action, "trigger": trigger, "succeeded": len(report["succeeded"]),
+                               "messages_deleted": report["messages_deleted"]})
+        )
+        await self.log_action(guild_id, self.cleanup_embed(report, trigger, done=True))
+        return report
+
+    def register_offender(self, guild: nextcord.Guild, user_id: int, now: datetime):
+        """Registra um infrator e dispara a limpeza automática quando vários agem na mesma janela."""
+        guild_id = str(guild.id)
+        offenders = self.raid_offenders[guild_id]
+        offenders[user_id] = now
+        for uid, detected_at in list(offenders.items()):
+            if (now - detected_at).total_seconds() > RAID_OFFENDER_WINDOW:
+                del offenders[uid]
+        if len(offenders) >= RAID_OFFENDER_THRESHOLD and guild_id not in self.cleanup_running:
+            user_ids = set(offenders)
+            offenders.clear()
+            since = now - timedelta(seconds=RAID_OFFENDER_WINDOW)
+            asyncio.create_task(self.run_cleanup(guild, user_ids, "timeout", "Detecção automática de flood", since=since))
+
+    def is_trusted(self, guild: nextcord.Guild, user: nextcord.abc.User, config: dict) -> bool:
+        """Dono, o próprio bot e membros com cargo na whitelist não são tratados como executores suspeitos."""
+        if user.id in (guild.owner_id, self.bot.user.id):
+            return True
+        member = guild.get_member(user.id)
+        return bool(member and any(r.id in config["whitelist_roles"] for r in member.roles))
+
+    async def neutralize_executor(self, guild: nextcord.Guild, user: nextcord.abc.User, kind: str, count: int):
+        """Remove os cargos perigosos do executor (ou o expulsa, se for um bot) em vez de travar o servidor."""
+        guild_id = str(guild.id)
+        key = (guild.id, user.id)
+        now = time.monotonic()
+        for neutralized_key, neutralized_at in list(self.neutralized.items()):
+            if now - neutralized_at > NEUTRALIZE_COOLDOWN_SECONDS:
+                del self.neutralized[neutralized_key]
+        if key in self.neutralized:
+            return  # Eventos da mesma rajada que ainda chegam pelo audit log
+        self.neutralized[key] = now
+        member = guild.get_member(user.id)
+        result = "Membro não encontrado no servidor"
+        if member:
+            me = guild.me
+            dangerous = [
+                r for r in member.roles
+                if not r.is_default() and r < me.top_role and not r.managed
+                and any(getattr(r.permissions, p) for p in DANGEROUS_PERMISSIONS)
+            ]
+            try:
+                if dangerous:
+                    await member.remove_roles(*dangerous, reason=f"Anti-Raid: {kind} em massa ({count}/h)")
+                if member.bot and any(
+                    getattr(r.permissions, p) for r in member.roles if r.managed for p in DANGEROUS_PERMISSIONS
+                ):
+                    await member.kick(reason=f"Anti-Raid: bot executando {kind} em massa")
+                    result = "Bot expulso"
+                else:
+                    result = f"{len(dangerous)} cargos perigosos removidos"
+            except Exception as e:
+                result = f"Falha ao neutralizar: {e}"
+                logger.error(f"Erro ao neutralizar executor {user.id} em {guild_id}: {e}")
+        self.attributor.forget(guild.id, user.id)
+        self.report_raider(guild_id, [user.id])
+        self.journal.append("action_neutralize", guild.id, user.id, detail=f"{kind}: {result}")
+
+        embed = nextcord.Embed(
+            title="<:alert:1351976384779517972> Executor Neutralizado",
+            description=(
+                f"{user.mention} (`{user.id}`) executou **{count}** ações de `{kind}` na última hora.\n"
+                f"**Resposta:** {result}"
+            ),
+            color=nextcord.Color.red(),
+            timestamp=datetime.now(self.br_tz)
+        )
+        await self.log_action(guild_id, embed)
+
+    async def attribute_destructive_event(self, guild: nextcord.Guild, action: nextcord.AuditLogAction,
+                                          target_id: int, kind: str, limit: int, config: dict) -> bool:
+        """Atribui o evento ao executor e aplica o limite por executor.
+
+        Retorna True quando o evento foi atribuído, dispensando a contagem global que leva ao lockdown.
+        """
+        executor = await self.attributor.attribute(guild, action, target_id)
+        if not executor:
+            self.journal.append(kind, guild.id, target_id=target_id)
+            return False
+        if self.is_trusted(guild, executor, config):
+            self.journal.append(kind, guild.id, executor.id, target_id, detail="trusted")
+            return True
+        self.journal.append(kind, guild.id, executor.id, target_id)
+        count = self.attributor.record(guild.id, executor.id, kind)
+        if count > limit:
+            await self.neutralize_executor(guild, executor, kind, count)
+        return True
+
+    def report_raider(self, guild_id: str, user_ids, config: dict = None):
+        """Envia contas punidas para a reputação compartilhada, se o servidor participa."""
+        config = config or self.load_config(guild_id)
+        if not config.get("reputation_opt_in"):
+            return
+        now = time.monotonic()
+        for key, reported_at in list(self.reputation_reported.items()):
+            if now - reported_at > REPUTATION_REPORT_WINDOW:
+                del self.reputation_reported[key]
+        for user_id in user_ids:
+            # Flood seguido da limpeza automática é um único incidente: a conta conta uma vez só
+            if (guild_id, user_id) in self.reputation_reported:
+                continue
+            self.reputation_reported[(guild_id, user_id)] = now
+            self.reputation.add(user_id)
+
+    async def check_reputation(self, member: nextcord.Member, config: dict, origin: str):
+        """Consulta a reputação de uma conta (O(1)) e alerta ou silencia preventivamente."""
+        if not config.get("reputation_opt_in") or member.bot:
+            return
+        count = self.reputation.count(member.id)
+        if not count:
+            return
+        guild_id = str(member.guild.id)
+        action = "Apenas alerta"
+        if count >= REPUTATION_TIMEOUT_THRESHOLD:
+            try:
+                await member.timeout(timedelta(minutes=10), reason="Anti-Raid: conta punida em outros servidores")
+                action = "Silenciado por 10 minutos"
+                self.journal.append("action_timeout", guild_id, member.id, detail="reputation")
+            except Exception as e:
+                action = f"Falha ao silenciar: {e}"
+                logger.error(f"Erro ao silenciar {member.id} por reputação em {guild_id}: {e}")
+        embed = nextcord.Embed(
+            title="<:alert:1351976384779517972> Conta com Histórico de Raid",
+            description=(
+                f"{member.mention} (`{member.id}`) foi punido pelo Anti-Raid em outros servidores "
+                f"(~{count} ocorrências recentes).\n**Origem:** {origin}\n**Resposta:** {action}"
+            ),
+            color=nextcord.Color.orange(),
+            timestamp=datetime.now(self.br_tz)
+        )
+        await self.alerts.alert(guild_id, embed, member.id, action)
+
     # Listeners para monitoramento
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Um único agendador atende os lockdowns de todos os servidores
+        self.lockdown_scheduler.start()
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: nextcord.Member):
+        config = self.load_config(str(member.guild.id))
+        if not config["enabled"]:
+            return
+        self.reputation_seen[(member.guild.id, member.id)] = None
+        await self.check_reputation(member, config, "Entrada no servidor")
+
     @commands.Cog.listener()
     async def on_message(self, message: nextcord.Message):
         if message.author.bot or not message.guild:
@@ -162,6 +691,12 @@ class AntiRaidCog(commands.Cog):
 
         user_id = message.author.id
         now = datetime.now(self.br_tz)
+        self.journal.append("message", guild_id, user_id, message.channel.id)
+        if config.get("reputation_opt_in") and (message.guild.id, user_id) not in self.reputation_seen:
+            self.reputation_seen[(message.guild.id, user_id)] = None
+            if len(self.reputation_seen) > REPUTATION_SEEN_LIMIT:
+                del self.reputation_seen[next(iter(self.reputation_seen))]
+            await self.check_reputation(message.author, config, "Primeira mensagem")
         self.activity_tracker[(guild_id, user_id, "messages")].append(now)
 
         self.activity_tracker[(guild_id, user_id, "messages")] = [
@@ -170,17 +705,22 @@ class AntiRaidCog(commands.Cog):
         ]
 
         if len(self.activity_tracker[(guild_id, user_id, "messages")]) > config["max_messages_per_minute"]:
+            # Zera antes do await: mensagens que chegam durante o timeout não geram nova detecção
+            del self.activity_tracker[(guild_id, user_id, "messages")]
             try:
                 await message.author.timeout(timedelta(minutes=10), reason="Anti-Raid: Flood detectado")
+                self.journal.append("action_timeout", guild_id, user_id, message.channel.id, detail="flood")
+                self.report_raider(guild_id, [user_id], config)
                 embed = nextcord.Embed(
                     title="<:alert:1351976384779517972> Flood Detectado",
                     description=f"{message.author.mention} foi silenciado por 10 minutos por enviar mensagens em excesso.",
                     color=nextcord.Color.red(),
                     timestamp=now
                 )
-                await self.log_action(guild_id, embed)
+                await self.alerts.alert(guild_id, embed, user_id, "Silenciado por 10 minutos")
             except Exception as e:
                 logger.error(f"Erro ao silenciar {message.author.id} em {guild_id}: {e}")
+            self.register_offender(message.guild, user_id, now)
 
     @commands.Cog.listener()
     async def on_guild_channel_create(self, channel: nextcord.abc.GuildChannel):
@@ -190,6 +730,7 @@ class AntiRaidCog(commands.Cog):
             return
 
         now = datetime.now(self.br_tz)
+        self.journal.append("channel_create", guild_id, target_id=channel.id)
         self.activity_tracker[(guild_id, "channel_create")].append(now)
         self.activity_tracker[(guild_id, "channel_create")] = [
             t for t in self.activity_tracker[(guild_id, "channel_create")]
@@ -206,6 +747,12 @@ class AntiRaidCog(commands.Cog):
         if not config["enabled"]:
             return
 
+        if await self.attribute_destructive_event(
+            channel.guild, nextcord.AuditLogAction.channel_delete, channel.id,
+            "channel_delete", config["max_channel_changes_per_hour"], config
+        ):
+            return
+
         now = datetime.now(self.br_tz)
         self.activity_tracker[(guild_id, "channel_delete")].append(now)
         self.activity_tracker[(guild_id, "channel_delete")] = [
@@ -223,6 +770,12 @@ class AntiRaidCog(commands.Cog):
         if not config["enabled"]:
             return
 
+        if await self.attribute_destructive_event(
+            guild, nextcord.AuditLogAction.ban, user.id,
+            "ban", config["max_bans_per_hour"], config
+        ):
+            return
+
         now = datetime.now(self.br_tz)
         self.activity_tracker[(guild_id, "bans")].append(now)
         self.activity_tracker[(guild_id, "bans")] = [
@@ -241,6 +794,7 @@ class AntiRaidCog(commands.Cog):
             return
 
         now = datetime.now(self.br_tz)
+        self.journal.append("role_create", guild_id, target_id=role.id)
         self.activity_tracker[(guild_id, "role_create")].append(now)
         self.activity_tracker[(guild_id, "role_create")] = [
             t for t in self.activity_tracker[(guild_id, "role_create")]
@@ -257,6 +811,12 @@ class AntiRaidCog(commands.Cog):
         if not config["enabled"]:
             return
 
+        if await self.attribute_destructive_event(
+            role.guild, nextcord.AuditLogAction.role_delete, role.id,
+            "role_delete", config["max_role_changes_per_hour"], config
+        ):
+            return
+
         now = datetime.now(self.br_tz)
         self.activity_tracker[(guild_id, "role_delete")].append(now)
         self.activity_tracker[(guild_id, "role_delete")] = [
@@ -275,6 +835,7 @@ class AntiRaidCog(commands.Cog):
             return
 
         now = datetime.now(self.br_tz)
+        self.journal.append("invite", guild_id, invite.inviter.id if invite.inviter else None, invite.channel.id if invite.channel else None, detail=invite.code)
         self.activity_tracker[(guild_id, "invites")].append(now)
         self.activity_tracker[(guild_id, "invites")] = [
             t for t in self.activity_tracker[(guild_id, "invites")]
@@ -284,13 +845,14 @@ class AntiRaidCog(commands.Cog):
         if len(self.activity_tracker[(guild_id, "invites")]) > config["max_invites_per_hour"]:
             try:
                 await invite.delete(reason="Anti-Raid: Limite de convites excedido")
+                self.journal.append("action_invite_delete", guild_id, detail=invite.code)
                 embed = nextcord.Embed(
                     title="<:alert:1351976384779517972> Spam de Convites Detectado",
                     description="Um convite foi deletado por exceder o limite por hora.",
                     color=nextcord.Color.red(),
                     timestamp=now
                 )
-                await self.log_action(guild_id, embed)
+                await self.alerts.alert(guild_id, embed, invite.inviter.id if invite.inviter else None, "Convite deletado")
             except Exception as e:
                 logger.error(f"Erro ao deletar convite em {guild_id}: {e}")
 
@@ -315,6 +877,20 @@ class AntiRaidCog(commands.Cog):
             embed = self.create_config_embed()
             await self.update_embed(interaction, embed)
 
+        @ui.button(label="Modo de Lockdown", style=nextcord.ButtonStyle.grey, emoji="<:lock:1351976522168402081>")
+        async def lockdown_mode_button(self, button: ui.Button, interaction: Interaction):
+            self.config["lockdown_mode"] = "channels" if self.config.get("lockdown_mode") != "channels" else "role"
+            self.cog.save_config(self.guild_id, self.config)
+            embed = self.create_config_embed()
+            await self.update_embed(interaction, embed)
+
+        @ui.button(label="Reputação Global", style=nextcord.ButtonStyle.grey, emoji="<:raid:1351968258537947316>")
+        async def reputation_button(self, button: ui.Button, interaction: Interaction):
+            self.config["reputation_opt_in"] = not self.config.get("reputation_opt_in")
+            self.cog.save_config(self.guild_id, self.config)
+            embed = self.create_config_embed()
+            await self.update_embed(interaction, embed)
+
         @ui.select(
             placeholder="Definir Canal de Logs",
             options=[nextcord.SelectOption(label="Escolha um canal", value="placeholder", emoji="<:raid:1351968258537947316>")],
@@ -392,7 +968,11 @@ class AntiRaidCog(commands.Cog):
             )
             embed.add_field(
                 name="Status",
-                value=f"**Ativado:** {'Sim' if self.config['enabled'] else 'Não'}",
+                value=(
+                    f"**Ativado:** {'Sim' if self.config['enabled'] else 'Não'}\n"
+                    f"**Lockdown:** {'Por canais' if self.config.get('lockdown_mode') == 'channels' else 'Cargo @everyone'}\n"
+                    f"**Reputação Global:** {'Sim' if self.config.get('reputation_opt_in') else 'Não'}"
+                ),
                 inline=True
             )
             embed.add_field(
@@ -434,5 +1014,57 @@ class AntiRaidCog(commands.Cog):
                 "Erro ao iniciar a configuração. Tente novamente.", ephemeral=True
             )
 
+    # Comando para limpeza manual pós-raid
+    @nextcord.slash_command(name="raid_cleanup", description="Pune e remove as mensagens de contas que entraram ou floodaram desde um horário.")
+    @commands.has_permissions(administrator=True)
+    async def raid_cleanup(
+        self,
+        interaction: Interaction,
+        since: str = SlashOption(description="Desde quando (ex.: 30m, 2h, 1d ou 14:30)", required=True),
+        acao: str = SlashOption(description="Ação aplicada às contas", choices={"Banir": "ban", "Expulsar": "kick", "Silenciar": "timeout"}, default="ban")
+    ):
+        guild = interaction.guild
+        guild_id = str(guild.id)
+        since_dt = parse_since(since, self.br_tz)
+        if not since_dt or acao not in CLEANUP_ACTIONS:
+            await interaction.response.send_message("Horário inválido! Use 30m, 2h, 1d ou HH:MM.", ephemeral=True)
+            return
+        if guild_id in self.cleanup_running:
+            await interaction.response.send_message("Já existe uma limpeza em andamento neste servidor.", ephemeral=True)
+            return
+
+        config = self.load_config(guild_id)
+        whitelist = set(config["whitelist_roles"])
+        user_ids = {
+            m.id for m in guild.members
+            if m.joined_at and m.joined_at >= since_dt and not m.bot
+            and m.id != guild.owner_id and m.top_role.id not in whitelist
+        }
+        user_ids |= {uid for uid, detected_at in self.raid_offenders[guild_id].items() if detected_at >= since_dt}
+        if not user_ids:
+            await interaction.response.send_message("Nenhuma conta suspeita encontrada nesse período.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        trigger = f"Manual por {interaction.user} desde {since_dt.strftime('%d/%m/%Y %H:%M')}"
+        empty_report = {
+            "action": acao, "requested": len(user_ids), "succeeded": [], "failed": [],
+            "messages_deleted": 0, "channels_total": 0, "channels_done": 0, "channels_failed": 0, "duration": 0.0
+        }
+        status_message = await interaction.followup.send(embed=self.cleanup_embed(empty_report, trigger, done=False), ephemeral=True)
+
+        async def progress(report: dict):
+            await status_message.edit(embed=self.cleanup_embed(report, trigger, done=False))
+
+        report = await self.run_cleanup(
+            guild, user_ids, acao, trigger,
+            since=since_dt, moderator_id=str(interaction.user.id), progress=progress
+        )
+        try:
+            await status_message.edit(embed=self.cleanup_embed(report, trigger, done=True))
+        except Exception as e:
+            logger.error(f"Erro ao atualizar status da limpeza em {guild_id}: {e}")
+        logger.info(f"Limpeza anti-raid executada por {interaction.user.id} em {guild_id}: {len(user_ids)} contas")
+
 def setup(bot):
     bot.add_cog(AntiRaidCog(bot))
\ No newline at end of file
@@ -6,34 +6,100 @@
 # Developer Of Version: Grok (xAI)
 
 import nextcord
-from nextcord.ext import commands
+from nextcord.ext import commands, tasks
 from nextcord import Interaction, SlashOption, ui
-import sqlite3
 import json
 from datetime import datetime
 import pytz
 import asyncio
-from typing import Dict, Optional
+from typing import Dict, Optional, Set
 import logging
 import os
-import html
-from io import BytesIO
 import uuid
+import time
+from utils.database import get_database
+from utils.scheduler import DeadlineScheduler
+from utils.admission import AdmissionQueue, QueueFull
+from utils.asset_archive import AssetArchive, new_stats
+from utils.ticket_search import TicketSearchIndex, backfill
+from utils.ticket_stats import TicketStats
+from utils.transcript_export import TranscriptExporter, bundle_url
+from utils.transcript_jobs import TranscriptJobQueue
+from utils.transcript_store import TranscriptStore
+from utils.discord_markdown import MentionResolver
+from utils.transcript import (
+    DEFAULT_THEME, MESSAGE_EXTRAS, THEMES, TranscriptRenderPool, embed_to_record, load_templates, message_to_record,
+    publish_stylesheet, stream_transcript
+)
 
 logger = logging.getLogger("DataBit.TicketCog")
 
+# Colunas adicionadas à tabela tickets: nome -> (tipo, caminho no JSON antigo da coluna data)
+TICKET_COLUMNS = {
+    "first_response_at": ("TEXT", "$.first_response_at"),
+    "assumed_at": ("TEXT", "$.assumed_at"),
+    "closed_by": ("TEXT", "$.closed_by"),
+    "closed_at": ("TEXT", "$.closed_at"),
+    "rating": ("INTEGER", "$.rating"),
+    "captured": ("INTEGER DEFAULT 0", "$.captured"),
+    "inactivity_notified": ("INTEGER DEFAULT 0", "$.inactivity_notified"),
+}
+UPDATABLE_TICKET_COLUMNS = {"assumed_by", "last_activity", "status", *TICKET_COLUMNS}
+TICKET_SELECT = "ticket_id, guild_id, user_id, category, created_at, assumed_by, last_activity, status, " + ", ".join(TICKET_COLUMNS)
+
+TRANSCRIPT_WORKERS = int(os.getenv("TRANSCRIPT_WORKERS", "2"))  # Processos dedicados à renderização de transcrições
+TRANSCRIPT_PACK_AFTER_DAYS = 30  # Transcrições mais antigas que isso são movidas para o tar mensal
+TICKET_CREATION_RATE = 0.5  # Canais de ticket criados por segundo em cada servidor, após a rajada inicial
+TICKET_CREATION_BURST = 5
+TICKET_QUEUE_UPDATE_SECONDS = 5  # Intervalo para atualizar a posição na fila mostrada ao usuário
+SNAPSHOT_BATCH = 500  # Mensagens do histórico gravadas por transação ao fechar tickets sem captura
+TRANSCRIPT_JOB_RETENTION_DAYS = 30  # Registros de trabalhos de transcrição concluídos mantidos para consulta
+TRANSCRIPT_JOB_DELAY = 15  # Segundos entre o fechamento e a transcrição: o canal já foi apagado e o fechamento gravado
+SNAPSHOT_RETRY_SECONDS = 600  # Nova tentativa de fechamento automático quando as mensagens não puderam ser salvas
+CREATING = "criando"  # Reserva em open_by_user enquanto o canal do ticket ainda está sendo criado
+
 class TicketCog(commands.Cog):
     def __init__(self, bot):
         logger.info("Inicializando TicketCog")
         self.bot = bot
         self.db_path = "ticket_system.db"
+        self.db = get_database(self.db_path)
         self.transcript_base_url = "https://databit-v1.discloud.app/transcripts"
         try:
             self.init_database()
             self.active_tickets: Dict[str, Dict] = {}
+            self.ticket_by_channel: Dict[int, str] = {}  # channel_id -> ticket_key
+            self.open_by_user: Dict[tuple, str] = {}  # (guild_id, user_id, categoria) -> ticket_key ou CREATING
+            self.ticket_creation = AdmissionQueue(TICKET_CREATION_RATE, TICKET_CREATION_BURST, name="criacao-tickets")
+            # Views persistentes: registradas uma vez, atendem os painéis e menus de todos os servidores após reinícios
+            self.panel_view = self.TicketPanelView(self)
+            self.menu_view = self.TicketMenuView(self)
+            self.bot.add_view(self.panel_view)
+            self.bot.add_view(self.menu_view)
+            self.pending_message_ops = []  # Operações de captura aguardando gravação em lote
+            self.pending_activity: Dict[str, str] = {}  # ticket_key -> última atividade ainda não gravada
+            self.capture_lock = asyncio.Lock()  # Serializa a gravação dos lotes de captura com o snapshot do fechamento
+            self.closing_tickets: Set[str] = set()  # Tickets salvando as mensagens para fechar
+            self.inactivity_scheduler = DeadlineScheduler(self.on_inactivity_deadline, name="inatividade-tickets")
             self.br_tz = pytz.timezone("America/Sao_Paulo")
             self.load_active_tickets()
             os.makedirs("transcripts", exist_ok=True)
+            load_templates()
+            publish_stylesheet()
+            self.render_pool = TranscriptRenderPool(TRANSCRIPT_WORKERS)  # Iniciado no on_ready, fora do event loop
+            self.asset_archive = AssetArchive(self.db_path)
+            self.transcript_store = TranscriptStore(self.db_path)
+            self.transcript_exporter = TranscriptExporter(self.db_path, self.transcript_store)
+            self.transcript_jobs = TranscriptJobQueue(
+                self.db_path,
+                [("renderizar", self.job_render), ("enviar", self.job_upload), ("indexar", self.job_index)],
+                on_failure=self.on_transcript_job_failed
+            )
+            self.search_index = TicketSearchIndex(self.db_path)
+            self.ticket_stats = TicketStats(self.db_path)
+            self.ticket_stats.rebuild()
+            self.flush_message_capture.start()
+            self.compact_transcripts.start()
             logger.info("TicketCog inicializado com sucesso")
         except Exception as e:
             logger.error(f"Erro ao inicializar TicketCog: {e}", exc_info=True)
@@ -41,7 +107,7 @@ class TicketCog(commands.Cog):
 
     def init_database(self):
         """Inicializa o banco de dados SQLite."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.db.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS tickets (
@@ -62,6 +128,51 @@ class TicketCog(commands.Cog):
                     config TEXT
                 )
             """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS ticket_messages (
+                    message_id INTEGER PRIMARY KEY,
+                    ticket_id TEXT NOT NULL,
+                    author_id INTEGER NOT NULL,
+                    author_name TEXT,
+                    author_avatar TEXT,
+                    content TEXT,
+                    attachments TEXT,
+                    created_at TEXT NOT NULL,
+                    edited_at TEXT,
+                    deleted INTEGER DEFAULT 0
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_ticket_messages_ticket ON ticket_messages (ticket_id, message_id)")
+            # Migração: menções, embeds, resposta e figurinhas ficam em JSON na coluna extras
+            cursor.execute("PRAGMA table_info(ticket_messages)")
+            if "extras" not in {row[1] for row in cursor.fetchall()}:
+                cursor.execute("ALTER TABLE ticket_messages ADD COLUMN extras TEXT")
+            # Migração: campos que antes só existiam no JSON da coluna data viram colunas próprias
+            cursor.execute("PRAGMA table_info(tickets)")
+            existing = {row[1] for row in cursor.fetchall()}
+            for column, (column_type, json_path) in TICKET_COLUMNS.items():
+                if column not in existing:
+                    cursor.execute(f"ALTER TABLE tickets ADD COLUMN {column} {column_type}")
+                    cursor.execute(
+                        f"UPDATE tickets SET {column} = json_extract(data, ?) WHERE data IS NOT NULL AND json_valid(data) AND json_extract(data, ?) IS NOT NULL",
+                        (json_path, json_path)
+                    )
+                    logger.info(f"Coluna tickets.{column} criada e preenchida a partir da coluna data ({cursor.rowcount} tickets)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_tickets_guild_status ON tickets (guild_id, status)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_tickets_guild_user ON tickets (guild_id, user_id)")
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS ticket_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    ticket_id TEXT NOT NULL,
+                    guild_id TEXT NOT NULL,
+                    event TEXT NOT NULL,
+                    actor_id TEXT,
+                    created_at TEXT NOT NULL,
+                    detail TEXT
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_ticket_events_ticket ON ticket_events (ticket_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_ticket_events_guild_created ON ticket_events (guild_id, created_at)")
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS ticket_categories (
                     guild_id TEXT,
@@ -77,7 +188,7 @@ class TicketCog(commands.Cog):
     def load_categories(self, guild_id: str) -> Dict[str, Dict]:
         """Carrega as categorias de tickets do SQLite para um servidor."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT category_id, name, description, emoji FROM ticket_categories WHERE guild_id = ?", (guild_id,))
                 categories = {}
@@ -96,7 +207,7 @@ class TicketCog(commands.Cog):
     def save_category(self, guild_id: str, category_id: str, name: str, description: str, emoji: Optional[str]):
         """Salva uma nova categoria no SQLite."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     INSERT OR REPLACE INTO ticket_categories (guild_id, category_id, name, description, emoji)
@@ -110,7 +221,7 @@ class TicketCog(commands.Cog):
     def update_category(self, guild_id: str, category_id: str, name: Optional[str] = None, description: Optional[str] = None, emoji: Optional[str] = None):
         """Atualiza uma categoria existente no SQLite."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT name, description, emoji FROM ticket_categories WHERE guild_id = ? AND category_id = ?", (guild_id, category_id))
                 current = cursor.fetchone()
@@ -134,7 +245,7 @@ class TicketCog(commands.Cog):
     def delete_category(self, guild_id: str, category_id: str):
         """Remove uma categoria do SQLite."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM ticket_categories WHERE guild_id = ? AND category_id = ?", (guild_id, category_id))
                 conn.commit()
@@ -147,20 +258,26 @@ class TicketCog(commands.Cog):
     def load_active_tickets(self):
         """Carrega tickets com status 'aberto' do SQLite para o cache."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT ticket_id, user_id, category, created_at, assumed_by, last_activity, status FROM tickets WHERE status = 'aberto'")
-                tickets = cursor.fetchall()
+                cursor.execute(f"SELECT {TICKET_SELECT} FROM tickets WHERE status = 'aberto'")
+                tickets = [self.row_to_ticket(row) for row in cursor.fetchall()]
+                cursor.execute("""
+                    SELECT m.ticket_id, COUNT(*) FROM ticket_messages m
+                    JOIN tickets t ON t.ticket_id = m.ticket_id
+                    WHERE t.status = 'aberto' AND m.deleted = 0
+                    GROUP BY m.ticket_id
+                """)
+                message_counts = dict(cursor.fetchall())
                 for ticket in tickets:
-                    ticket_key = ticket[0]
-                    self.active_tickets[ticket_key] = {
-                        "user_id": ticket[1],
-                        "category": ticket[2],
-                        "created_at": datetime.fromisoformat(ticket[3]),
-                        "assumed_by": ticket[4],
-                        "last_activity": datetime.fromisoformat(ticket[5]),
-                        "status": ticket[6]
-                    }
+                    ticket_key = ticket.pop("ticket_id")
+                    ticket.pop("guild_id")
+                    ticket["created_at"] = datetime.fromisoformat(ticket["created_at"])
+                    ticket["last_activity"] = datetime.fromisoformat(ticket["last_activity"])
+                    ticket["message_count"] = message_counts.get(ticket_key, 0)
+                    self.active_tickets[ticket_key] = ticket
+                    self.open_by_user[(ticket_key.split("_")[0], ticket["user_id"], ticket["category"])] = ticket_key
+                    self.ticket_by_channel[int(ticket_key.split("_")[1])] = ticket_key
                 logger.info(f"Carregados {len(self.active_tickets)} tickets ativos do SQLite")
         except Exception as e:
             logger.error(f"Erro ao carregar tickets ativos: {e}", exc_info=True)
@@ -177,6 +294,8 @@ class TicketCog(commands.Cog):
             "embed_color_rgb": [43, 45, 49],
             "tempo_notificacao_horas": 24,
             "tempo_fechamento_horas": 48,
+            "tema_transcript": DEFAULT_THEME,
+            "retencao_transcripts_dias": 0,
             "menu_message_id": None,
             "embed_menu": {
                 "title": "<:logo2:1350090849903710208> Ticket's System",
@@ -216,7 +335,7 @@ class TicketCog(commands.Cog):
             }
         }
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT config FROM ticket_config WHERE guild_id = ?", (guild_id,))
                 result = cursor.fetchone()
@@ -230,7 +349,7 @@ class TicketCog(commands.Cog):
     def save_config(self, guild_id: str, config: dict):
         """Salva a configuração de tickets no SQLite."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     INSERT OR REPLACE INTO ticket_config (guild_id, config)
@@ -241,197 +360,517 @@ class TicketCog(commands.Cog):
         except Exception as e:
             logger.error(f"Erro ao salvar ticket_config de {guild_id}: {e}", exc_info=True)
 
+    @staticmethod
+    def row_to_ticket(row: tuple) -> dict:
+        """Converte uma linha de `SELECT {TICKET_SELECT}` no dicionário usado pelo cog."""
+        ticket = dict(zip(TICKET_SELECT.split(", "), row))
+        ticket["captured"] = bool(ticket["captured"])
+        ticket["inactivity_notified"] = bool(ticket["inactivity_notified"])
+        return ticket
+
     def load_ticket(self, guild_id: str, ticket_id: str) -> dict:
         """Carrega um ticket específico do SQLite."""
         ticket_key = f"{guild_id}_{ticket_id}"
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT data FROM tickets WHERE ticket_id = ?", (ticket_key,))
-                result = cursor.fetchone()
-                if result:
-                    return json.loads(result[0])
-                return {}
+            row = self.db.fetchone(f"SELECT {TICKET_SELECT} FROM tickets WHERE ticket_id = ?", (ticket_key,))
+            return self.row_to_ticket(row) if row else {}
         except Exception as e:
             logger.error(f"Erro ao carregar ticket {ticket_key}: {e}", exc_info=True)
             return {}
 
+    @staticmethod
+    def to_column(value):
+        """Converte um valor do ticket em memória para o formato gravado na coluna."""
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, bool):
+            return int(value)
+        return value
+
     def save_ticket(self, guild_id: str, ticket_id: str, data: dict):
-        """Salva um ticket no SQLite."""
+        """Grava o ticket completo no SQLite (usado na abertura; mudanças posteriores passam por update_ticket)."""
         ticket_key = f"{guild_id}_{ticket_id}"
-        data = data.copy()
-        data["ticket_id"] = ticket_key
-        data["guild_id"] = guild_id
-        if "created_at" not in data:
-            data["created_at"] = datetime.now(self.br_tz)
-        if "last_activity" not in data:
-            data["last_activity"] = data["created_at"]
-
-        # Converter datetime para string antes de salvar
-        if isinstance(data["created_at"], datetime):
-            data["created_at"] = data["created_at"].isoformat()
-        if isinstance(data["last_activity"], datetime):
-            data["last_activity"] = data["last_activity"].isoformat()
-
+        created_at = data.get("created_at") or datetime.now(self.br_tz)
+        row = {
+            "ticket_id": ticket_key,
+            "guild_id": guild_id,
+            "user_id": data["user_id"],
+            "category": data["category"],
+            "created_at": created_at,
+            "assumed_by": data.get("assumed_by"),
+            "last_activity": data.get("last_activity") or created_at,
+            "status": data["status"],
+            **{column: data.get(column) for column in TICKET_COLUMNS}
+        }
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT OR REPLACE INTO tickets (
-                        ticket_id, guild_id, user_id, category, created_at, assumed_by, last_activity, status, data
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    ticket_key,
-                    guild_id,
-                    data["user_id"],
-                    data["category"],
-                    data["created_at"],
-                    data.get("assumed_by"),
-                    data["last_activity"],
-                    data["status"],
-                    json.dumps(data)
-                ))
-                conn.commit()
+            with self.db.connection() as conn:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO tickets ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                    [self.to_column(value) for value in row.values()]
+                )
                 logger.info(f"Ticket salvo: {ticket_key}")
         except Exception as e:
             logger.error(f"Erro ao salvar ticket {ticket_key}: {e}", exc_info=True)
 
-    async def generate_transcript(self, channel: nextcord.TextChannel, ticket_data: dict) -> tuple[str, str]:
-        """Gera um transcript em HTML do canal do ticket com Tailwind CSS."""
-        guild_id = str(channel.guild.id)
+    def update_ticket(self, ticket_key: str, fields: dict, event: Optional[str] = None,
+                      actor_id: Optional[str] = None, detail: Optional[dict] = None):
+        """Atualiza só as colunas informadas e, se houver, registra o evento na mesma transação."""
+        invalid = set(fields) - UPDATABLE_TICKET_COLUMNS
+        if invalid:
+            raise ValueError(f"Colunas não atualizáveis em tickets: {', '.join(sorted(invalid))}")
+        try:
+            with self.db.connection() as conn:
+                if fields:
+                    conn.execute(
+                        f"UPDATE tickets SET {', '.join(f'{column} = ?' for column in fields)} WHERE ticket_id = ?",
+                        (*(self.to_column(value) for value in fields.values()), ticket_key)
+                    )
+                if event:
+                    conn.execute(
+                        "INSERT INTO ticket_events (ticket_id, guild_id, event, actor_id, created_at, detail) VALUES (?, ?, ?, ?, ?, ?)",
+                        (
+                            ticket_key, ticket_key.split("_")[0], event, actor_id,
+                            datetime.now(self.br_tz).isoformat(), json.dumps(detail) if detail else None
+                        )
+                    )
+        except Exception as e:
+            logger.error(f"Erro ao atualizar ticket {ticket_key} ({event or ', '.join(fields)}): {e}", exc_info=True)
+
+    def log_event(self, ticket_key: str, event: str, actor_id: Optional[str] = None, detail: Optional[dict] = None):
+        """Registra uma transição de estado do ticket em ticket_events."""
+        self.update_ticket(ticket_key, {}, event, actor_id, detail)
+
+    def record_stats(self, ticket_key: str, ticket_data: dict, moment: datetime, attendant: Optional[str] = None, **metrics):
+        """Soma as métricas de um evento do ticket nos agregados diários do servidor, categoria e atendente."""
+        self.ticket_stats.record(ticket_key.split("_")[0], moment, ticket_data.get("category"), attendant, **metrics)
+
+    def forget_ticket(self, ticket_key: str):
+        """Remove o ticket dos índices em memória."""
+        ticket_data = self.active_tickets.pop(ticket_key, None)
+        if ticket_data:
+            user_key = (ticket_key.split("_")[0], ticket_data["user_id"], ticket_data["category"])
+            if self.open_by_user.get(user_key) == ticket_key:
+                del self.open_by_user[user_key]
+        self.ticket_by_channel.pop(int(ticket_key.split("_")[1]), None)
+        self.pending_activity.pop(ticket_key, None)
+        self.closing_tickets.discard(ticket_key)
+
+    def write_message_ops(self, ops: list, activity: Dict[str, str]):
+        """Grava em uma única transação as mensagens capturadas, edições, remoções e a última atividade dos tickets."""
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "UPDATE tickets SET last_activity = ?, inactivity_notified = 0 WHERE ticket_id = ?",
+                [(last_activity, ticket_key) for ticket_key, last_activity in activity.items()]
+            )
+            for op in ops:
+                if op[0] == "insert":
+                    record = op[2]
+                    extras = {field: record[field] for field in MESSAGE_EXTRAS if record.get(field)}
+                    cursor.execute("""
+                        INSERT OR REPLACE INTO ticket_messages (
+                            message_id, ticket_id, author_id, author_name, author_avatar, content, attachments, created_at, extras
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (
+                        record["id"], op[1], record["author_id"], record["author_name"], record["author_avatar"],
+                        record["content"], json.dumps(record["attachments"]), record["created_at"],
+                        json.dumps(extras) if extras else None
+                    ))
+                elif op[0] == "edit":
+                    cursor.execute(
+                        "UPDATE ticket_messages SET content = ?, edited_at = ? WHERE message_id = ?",
+                        (op[2], op[3], op[1])
+                    )
+                elif op[0] == "embeds":
+                    cursor.execute(
+                        "UPDATE ticket_messages SET extras = json_set(COALESCE(extras, '{}'), '$.embeds', json(?)) WHERE message_id = ?",
+                        (json.dumps(op[2]), op[1])
+                    )
+                elif op[0] == "delete":
+                    cursor.execute("UPDATE ticket_messages SET deleted = 1 WHERE message_id = ?", (op[1],))
+            conn.commit()
+
+    def flush_captured_messages(self):
+        """Grava imediatamente as operações de captura pendentes."""
+        ops, self.pending_message_ops = self.pending_message_ops, []
+        activity, self.pending_activity = self.pending_activity, {}
+        if not ops and not activity:
+            return
+        try:
+            self.write_message_ops(ops, activity)
+        except Exception as e:
+            logger.error(f"Erro ao gravar {len(ops)} mensagens capturadas: {e}", exc_info=True)
+
+    @tasks.loop(seconds=2)
+    async def flush_message_capture(self):
+        """Grava em lote as mensagens capturadas e a atividade dos canais de ticket."""
+        async with self.capture_lock:
+            ops, self.pending_message_ops = self.pending_message_ops, []
+            activity, self.pending_activity = self.pending_activity, {}
+            if not ops and not activity:
+                return
+            try:
+                await asyncio.to_thread(self.write_message_ops, ops, activity)
+            except Exception as e:
+                logger.error(f"Erro ao gravar {len(ops)} mensagens capturadas: {e}", exc_info=True)
+
+    @tasks.loop(hours=6)
+    async def compact_transcripts(self):
+        """Aplica a retenção de transcrições de cada servidor e empacota as antigas."""
+        try:
+            rows = await self.db.fetchall_async("SELECT guild_id, config FROM ticket_config")
+            retention = {guild_id: json.loads(config).get("retencao_transcripts_dias", 0) for guild_id, config in rows}
+            stats = await asyncio.to_thread(self.transcript_store.compact, retention, TRANSCRIPT_PACK_AFTER_DAYS)
+            if any(stats.values()):
+                logger.info(
+                    f"Compactação de transcrições: {stats['compressed']} comprimidas, {stats['expired']} expiradas "
+                    f"({stats['messages_removed']} mensagens apagadas), "
+                    f"{stats['packed']} empacotadas, {stats['packs_removed']} pacotes removidos, "
+                    f"{stats['bytes_freed'] / 1024 / 1024:.1f} MiB liberados"
+                )
+            pruned = await asyncio.to_thread(self.transcript_jobs.prune, TRANSCRIPT_JOB_RETENTION_DAYS)
+            if pruned:
+                logger.info(f"{pruned} registros de trabalhos de transcrição concluídos removidos")
+            indexed = await asyncio.to_thread(backfill, self.db_path, self.transcript_store.root)
+            if indexed:
+                logger.info(f"{indexed} transcrições antigas adicionadas ao índice de busca")
+        except Exception as e:
+            logger.error(f"Erro na compactação de transcrições: {e}", exc_info=True)
+
+    def cog_unload(self):
+        self.flush_message_capture.cancel()
+        self.compact_transcripts.cancel()
+        self.transcript_jobs.stop()
+        self.flush_captured_messages()
+        self.render_pool.shutdown()
+        self.inactivity_scheduler.stop()
+        self.ticket_creation.close()
+        self.panel_view.stop()
+        self.menu_view.stop()
+        self.bot.loop.create_task(self.asset_archive.close())
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        for ticket_key in list(self.active_tickets):
+            self.schedule_inactivity(ticket_key)
+        self.inactivity_scheduler.start()
+        try:
+            # Criar e aquecer os processos leva alguns segundos; numa thread, o event loop segue livre
+            await asyncio.to_thread(self.render_pool.start)
+        except Exception as e:
+            logger.error(f"Erro ao iniciar o pool de renderização; transcrições serão renderizadas no processo do bot: {e}", exc_info=True)
+        self.transcript_jobs.start()
+
+    @commands.Cog.listener()
+    async def on_message(self, message: nextcord.Message):
+        ticket_key = self.ticket_by_channel.get(message.channel.id)
+        if not ticket_key:
+            return
+        ticket_data = self.active_tickets[ticket_key]
+        self.pending_message_ops.append(("insert", ticket_key, message_to_record(message, self.br_tz)))
+        ticket_data["message_count"] = ticket_data.get("message_count", 0) + 1
+        if message.author.bot:
+            return
+        if not ticket_data.get("first_response_at") and str(message.author.id) != ticket_data["user_id"]:
+            # Primeira mensagem de alguém que não é quem abriu o ticket (o canal só é visível à equipe)
+            ticket_data["first_response_at"] = datetime.now(self.br_tz)
+            await asyncio.to_thread(self.update_ticket, ticket_key, {"first_response_at": ticket_data["first_response_at"]}, "primeira_resposta", str(message.author.id))
+            await asyncio.to_thread(
+                self.record_stats, ticket_key, ticket_data, ticket_data["first_response_at"], str(message.author.id),
+                first_response=(ticket_data["first_response_at"] - ticket_data["created_at"]).total_seconds()
+            )
+        # A atividade só é gravada no próximo lote; o agendador confere last_activity ao atingir o prazo
+        ticket_data["last_activity"] = datetime.now(self.br_tz)
+        self.pending_activity[ticket_key] = ticket_data["last_activity"].isoformat()
+        if ticket_data.get("inactivity_notified"):
+            ticket_data["inactivity_notified"] = False
+            self.schedule_inactivity(ticket_key)
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: nextcord.RawMessageUpdateEvent):
+        if payload.channel_id not in self.ticket_by_channel:
+            return
+        if "content" in payload.data:
+            edited_at = payload.data.get("edited_timestamp") or datetime.now(self.br_tz).isoformat()
+            self.pending_message_ops.append(("edit", payload.message_id, payload.data["content"], edited_at))
+        if payload.data.get("embeds"):
+            # Pré-visualizações de links chegam depois da mensagem, em uma edição só com os embeds
+            embeds = [embed_to_record(nextcord.Embed.from_dict(embed)) for embed in payload.data["embeds"]]
+            self.pending_message_ops.append(("embeds", payload.message_id, embeds))
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: nextcord.RawMessageDeleteEvent):
+        ticket_key = self.ticket_by_channel.get(payload.channel_id)
+        if not ticket_key:
+            return
+        ticket_data = self.active_tickets[ticket_key]
+        self.pending_message_ops.append(("delete", payload.message_id))
+        ticket_data["message_count"] = max(ticket_data.get("message_count", 0) - 1, 0)
+
+    def fetch_captured_page(self, ticket_key: str, after_id: int, limit: int) -> list:
+        """Lê uma página de mensagens capturadas de um ticket, em ordem cronológica."""
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT message_id, author_id, author_name, author_avatar, content, attachments, created_at, edited_at, extras
+                FROM ticket_messages
+                WHERE ticket_id = ? AND message_id > ? AND deleted = 0
+                ORDER BY message_id
+                LIMIT ?
+            """, (ticket_key, after_id, limit))
+            return [
+                {
+                    "id": row[0],
+                    "author_id": row[1],
+                    "author_name": row[2],
+                    "author_avatar": row[3],
+                    "content": row[4] or "",
+                    "attachments": json.loads(row[5]) if row[5] else [],
+                    "created_at": row[6],
+                    "edited": bool(row[7]),
+                    **(json.loads(row[8]) if row[8] else {})
+                }
+                for row in cursor.fetchall()
+            ]
+
+    async def captured_records(self, ticket_key: str, page_size: int = 500):
+        """Itera as mensagens capturadas de um ticket lendo o banco em páginas, fora do event loop."""
+        after_id = 0
+        while True:
+            page = await asyncio.to_thread(self.fetch_captured_page, ticket_key, after_id, page_size)
+            for record in page:
+                yield record
+            if len(page) < page_size:
+                return
+            after_id = page[-1]["id"]
+
+    async def snapshot_ticket(self, channel: nextcord.TextChannel, ticket_key: str, ticket_data: dict):
+        """Garante que todas as mensagens do ticket estejam em ticket_messages antes de o canal ser apagado."""
+        if ticket_data.get("captured"):
+            # Só falta gravar o lote de captura; o lock espera um flush periódico que ainda esteja gravando.
+            # Ao contrário do flush periódico, um erro aqui sobe e as operações voltam para o próximo lote.
+            async with self.capture_lock:
+                ops, self.pending_message_ops = self.pending_message_ops, []
+                activity, self.pending_activity = self.pending_activity, {}
+                try:
+                    await asyncio.to_thread(self.write_message_ops, ops, activity)
+                except Exception:
+                    self.pending_message_ops[:0] = ops
+                    self.pending_activity = {**activity, **self.pending_activity}
+                    raise
+            return
+        # Tickets abertos antes da captura: copia o histórico do canal em lotes, sem renderizar nada aqui
+        batch = []
+        async for message in channel.history(limit=None, oldest_first=True):
+            batch.append(("insert", ticket_key, message_to_record(message, self.br_tz)))
+            if len(batch) >= SNAPSHOT_BATCH:
+                await asyncio.to_thread(self.write_message_ops, batch, {})
+                batch = []
+        if batch:
+            await asyncio.to_thread(self.write_message_ops, batch, {})
+        ticket_data["captured"] = True
+        await asyncio.to_thread(self.update_ticket, ticket_key, {"captured": True})
+
+    async def hand_off_transcript(self, channel: nextcord.TextChannel, ticket_key: str, ticket_data: dict) -> bool:
+        """Salva as mensagens do ticket e agenda a transcrição em segundo plano.
+
+        Roda antes de qualquer mudança de estado do fechamento: se retornar False, o ticket continua aberto e rastreado.
+        """
+        self.closing_tickets.add(ticket_key)
+        started = time.perf_counter()
+        try:
+            await self.snapshot_ticket(channel, ticket_key, ticket_data)
+            await asyncio.to_thread(
+                self.transcript_jobs.enqueue, ticket_key, str(channel.guild.id), delay=TRANSCRIPT_JOB_DELAY
+            )
+        except Exception as e:
+            self.closing_tickets.discard(ticket_key)
+            logger.error(f"Erro ao salvar as mensagens do ticket {ticket_key} para a transcrição: {e}", exc_info=True)
+            await channel.send(
+                "⚠️ Não foi possível salvar as mensagens para a transcrição. "
+                "O ticket continua aberto para que o histórico não se perca; tente encerrá-lo novamente em instantes."
+            )
+            return False
+        logger.info(f"Mensagens do ticket {ticket_key} salvas e transcrição agendada em {time.perf_counter() - started:.2f}s")
+        return True
+
+    def job_context(self, job: dict) -> tuple:
+        """Servidor, ID do canal e dados (do banco) do ticket de um trabalho de transcrição."""
+        guild = self.bot.get_guild(int(job["guild_id"]))
+        if guild is None:
+            raise RuntimeError(f"Servidor {job['guild_id']} indisponível")
+        guild_id, channel_id = job["ticket_key"].split("_")
+        ticket_data = self.load_ticket(guild_id, channel_id)
+        if not ticket_data:
+            raise RuntimeError(f"Ticket {job['ticket_key']} não encontrado")
+        return guild, int(channel_id), ticket_data
+
+    async def job_render(self, job: dict) -> dict:
+        guild, channel_id, ticket_data = self.job_context(job)
+        return {"arquivo": await self.generate_transcript(guild, channel_id, ticket_data)}
+
+    async def job_upload(self, job: dict):
+        guild, channel_id, ticket_data = self.job_context(job)
+        await self.send_transcript(self.load_config(job["guild_id"]), ticket_data, guild, channel_id, job["data"]["arquivo"])
+
+    async def job_index(self, job: dict):
+        guild, channel_id, ticket_data = self.job_context(job)
+        categories = self.load_categories(job["guild_id"])
+        category_name = categories.get(ticket_data["category"], {"name": "Desconhecida"})["name"]
+        await self.index_transcript(ticket_data, job["guild_id"], channel_id, job["data"]["arquivo"], category_name)
+        await asyncio.to_thread(self.log_event, job["ticket_key"], "transcricao_concluida", detail={"arquivo": job["data"]["arquivo"]})
+
+    async def on_transcript_job_failed(self, job: dict):
+        """Registra a falha definitiva da transcrição e avisa no canal de logs do servidor."""
+        await asyncio.to_thread(
+            self.log_event, job["ticket_key"], "transcricao_falhou", detail={"etapa": job["stage"], "erro": job["last_error"]}
+        )
+        config = self.load_config(job["guild_id"])
+        logs_channel = self.bot.get_channel(config["canal_logs"]) if config.get("canal_logs") else None
+        if logs_channel:
+            await logs_channel.send(embed=nextcord.Embed(
+                title="⚠️ Falha na Transcrição",
+                description=(
+                    f"A transcrição do ticket {job['ticket_key'].split('_')[1]} falhou na etapa **{job['stage']}** "
+                    f"após {job['attempts']} tentativas.\n```{job['last_error'][:900]}```\n"
+                    f"As mensagens continuam salvas; use `/transcript_jobs reprocessar:True` para tentar de novo."
+                ),
+                color=nextcord.Color.red(),
+                timestamp=datetime.now(self.br_tz)
+            ))
+
+    async def generate_transcript(self, guild: nextcord.Guild, channel_id: int, ticket_data: dict) -> str:
+        """Gera o transcript em HTML a partir das mensagens salvas do ticket, renderizando e gravando em streaming."""
+        guild_id = str(guild.id)
         categories = self.load_categories(guild_id)
         category_name = categories.get(ticket_data["category"], {"name": "Desconhecida"})["name"]
+        opener = self.bot.get_user(int(ticket_data["user_id"]))
+        closed_at = datetime.fromisoformat(ticket_data["closed_at"]) if ticket_data.get("closed_at") else datetime.now(self.br_tz)
 
-        messages = []
-        async for message in channel.history(limit=None, oldest_first=True):
-            messages.append({
-                "author": message.author,
-                "content": message.content,
-                "timestamp": message.created_at.astimezone(self.br_tz),
-                "attachments": [attachment.url for attachment in message.attachments]
-            })
-
-        html_content = """
-<!DOCTYPE html>
-<html lang="pt-BR">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Transcrição do Ticket #{ticket_id}</title>
-    <script src="https://cdn.tailwindcss.com"></script>
-    <style>
-        body {{
-            background-color: #36393f;
-        }}
-    </style>
-</head>
-<body class="min-h-screen flex flex-col items-center justify-center">
-    <div class="w-full max-w-3xl bg-gray-800 rounded-lg shadow-lg p-6">
-        <div class="text-center mb-6">
-            <h1 class="text-2xl font-bold text-white">Transcrição do Ticket #{ticket_id}</h1>
-            <p class="text-gray-400">Categoria: {category}</p>
-            <p class="text-gray-400">Aberto por: {user_name} | Fechado em: {closed_at}</p>
-        </div>
-        <div class="space-y-4">
-"""
-
-        # Criar dicionário com valores para formatação
-        format_data = {
-            "ticket_id": channel.id,
+        meta = {
+            "ticket_id": channel_id,
             "category": category_name,
-            "user_name": self.bot.get_user(int(ticket_data["user_id"])).name,
-            "closed_at": datetime.now(self.br_tz).strftime("%d/%m/%Y %H:%M")
+            "user_name": opener.name if opener else str(ticket_data["user_id"]),
+            "closed_at": closed_at.strftime("%d/%m/%Y %H:%M"),
+            "theme": self.load_config(guild_id).get("tema_transcript", DEFAULT_THEME),
+            "asset_base_url": f"{self.transcript_base_url}/static"
         }
 
-        # Usar format_map para evitar KeyError em chaves não fornecidas
-        html_content = html_content.format_map(format_data)
-
-        for msg in messages:
-            avatar_url = msg["author"].avatar.url if msg["author"].avatar else "https://discord.com/assets/1f0bfc0865d324c25817.png"
-            content = html.escape(msg["content"]) if msg["content"] else ""
-            timestamp = msg["timestamp"].strftime("%d/%m/%Y %H:%M")
-            attachments = "".join([f'<a href="{url}" class="text-blue-400 hover:underline">{os.path.basename(url)}</a><br>' for url in msg["attachments"]])
-
-            html_content += f"""
-            <div class="flex items-start space-x-3">
-                <img src="{avatar_url}" alt="Avatar" class="w-10 h-10 rounded-full">
-                <div class="flex-1">
-                    <div class="flex items-center space-x-2">
-                        <span class="font-semibold text-white">{html.escape(msg["author"].name)}</span>
-                        <span class="text-xs text-gray-500">{timestamp}</span>
-                    </div>
-                    <p class="text-gray-200">{content}</p>
-                    {attachments}
-                </div>
-            </div>
-            """
-
-        html_content += """
-        </div>
-    </div>
-</body>
-</html>
-"""
-
-        transcript_filename = f"ticket_{channel.id}_{datetime.now(self.br_tz).strftime('%Y%m%d_%H%M%S')}.html"
-        transcript_path = f"transcripts/{transcript_filename}"
-        with open(transcript_path, "w", encoding="utf-8") as f:
-            f.write(html_content)
-
-        return transcript_path, transcript_filename
-
-    async def send_transcript(self, config: dict, ticket_data: dict, channel: nextcord.TextChannel):
-        """Envia o transcript para o canal de logs com botões para visualização e download."""
+        records = self.captured_records(f"{guild_id}_{channel_id}")
+        asset_stats = new_stats()
+        records = self.asset_archive.rewrite_records(records, f"{self.transcript_base_url}/assets", asset_stats)
+        resolver = MentionResolver(guild, self.bot)
+        records = resolver.annotate(records)
+
+        transcript_filename = f"ticket_{channel_id}_{datetime.now(self.br_tz).strftime('%Y%m%d_%H%M%S')}.html"
+        transcript_path = self.transcript_store.path_for(transcript_filename)
+        started = time.perf_counter()
         try:
-            transcript_path, transcript_filename = await self.generate_transcript(channel, ticket_data)
-            if config.get("canal_transcripts"):
-                transcripts_channel = self.bot.get_channel(config["canal_transcripts"])
-                if transcripts_channel:
-                    guild_id = str(channel.guild.id)
-                    categories = self.load_categories(guild_id)
-                    category_name = categories.get(ticket_data["category"], {"name": "Desconhecida"})["name"]
-                    embed = nextcord.Embed(
-                        title="Nova Transcrição de Ticket",
-                        description=(
-                            f"**Ticket ID:** {channel.id}\n"
-                            f"**Categoria:** {category_name}\n"
-                            f"**Aberto por:** {self.bot.get_user(int(ticket_data['user_id'])).mention}\n"
-                            f"**Fechado em:** {datetime.now(self.br_tz).strftime('%d/%m/%Y %H:%M')}"
-                        ),
-                        color=nextcord.Color.from_rgb(*config["embed_color_rgb"]),
-                        timestamp=datetime.now(self.br_tz)
-                    )
+            count = await stream_transcript(records, transcript_path, meta, pool=self.render_pool, compress=True)
+        except BaseException:
+            # Uma nova tentativa gera outro arquivo; o parcial não fica para trás
+            if os.path.exists(transcript_path):
+                os.remove(transcript_path)
+            raise
+        await asyncio.to_thread(
+            self.transcript_store.register, transcript_filename, guild_id, str(channel_id),
+            meta={key: meta[key] for key in ("ticket_id", "category", "user_name", "closed_at", "theme")}
+        )
+        logger.info(f"Transcrição {transcript_filename} gerada com {count} mensagens em {time.perf_counter() - started:.2f}s")
+        logger.info(
+            f"Arquivos de {transcript_filename}: {asset_stats['downloaded']} baixados, {asset_stats['reused']} reaproveitados, "
+            f"{asset_stats['failed']} falhas, {asset_stats['bytes_stored'] / 1024:.1f} KiB gravados, "
+            f"{asset_stats['bytes_saved'] / 1024:.1f} KiB economizados pela deduplicação"
+        )
+        logger.info(
+            f"Menções de {transcript_filename}: {resolver.stats['gateway']} da captura, {resolver.stats['cache']} do cache, "
+            f"{resolver.stats['batched']} em lote, {resolver.stats['fetched']} buscadas individualmente, "
+            f"{resolver.stats['missing']} não encontradas"
+        )
 
-                    view = ui.View(timeout=None)
+        return transcript_filename
 
-                    # Botão Ver Transcript Online
-                    online_button = ui.Button(
-                        label="Ver Transcript Online",
-                        style=nextcord.ButtonStyle.link,
-                        url=f"{self.transcript_base_url}/{transcript_filename}",
-                        emoji="🌐"
-                    )
-                    view.add_item(online_button)
-
-                    # Botão Download Transcript
-                    with open(transcript_path, "rb") as f:
-                        file = nextcord.File(BytesIO(f.read()), filename=transcript_filename)
-                        download_button = ui.Button(
-                            label="Download Transcript",
-                            style=nextcord.ButtonStyle.grey,
-                            emoji="📥"
-                        )
-                        async def download_callback(interaction: Interaction):
-                            with open(transcript_path, "rb") as f:
-                                file = nextcord.File(BytesIO(f.read()), filename=transcript_filename)
-                                await interaction.response.send_message(file=file, ephemeral=True)
-                        download_button.callback = download_callback
-                        view.add_item(download_button)
-
-                    await transcripts_channel.send(embed=embed, view=view, file=file)
-                    logger.info(f"Transcrição enviada para o canal {transcripts_channel.id}")
-        except Exception as e:
-            logger.error(f"Erro ao gerar/enviar transcrição para o ticket {channel.id}: {e}", exc_info=True)
+    async def index_transcript(self, ticket_data: dict, guild_id: str, channel_id: int, transcript_filename: str, category_name: str):
+        """Adiciona as mensagens do ticket fechado ao índice de busca (todas já estão em ticket_messages após o snapshot)."""
+        attendant = str(ticket_data["assumed_by"]) if ticket_data.get("assumed_by") else None
+        indexed = await asyncio.to_thread(
+            self.search_index.index_captured, f"{guild_id}_{channel_id}", guild_id, str(channel_id),
+            transcript_filename, category_name, attendant, time.time()
+        )
+        logger.info(f"{indexed} mensagens de {transcript_filename} indexadas para busca")
+
+    async def send_transcript(self, config: dict, ticket_data: dict, guild: nextcord.Guild, channel_id: int, transcript_filename: str):
+        """Envia o transcript para o canal de logs com botões para visualização e download."""
+        if not config.get("canal_transcripts"):
+            return
+        transcripts_channel = self.bot.get_channel(config["canal_transcripts"])
+        if not transcripts_channel:
+            return
+        categories = self.load_categories(str(guild.id))
+        category_name = categories.get(ticket_data["category"], {"name": "Desconhecida"})["name"]
+        closed_at = datetime.fromisoformat(ticket_data["closed_at"]) if ticket_data.get("closed_at") else datetime.now(self.br_tz)
+        embed = nextcord.Embed(
+            title="Nova Transcrição de Ticket",
+            description=(
+                f"**Ticket ID:** {channel_id}\n"
+                f"**Categoria:** {category_name}\n"
+                f"**Aberto por:** <@{ticket_data['user_id']}>\n"
+                f"**Fechado em:** {closed_at.strftime('%d/%m/%Y %H:%M')}"
+            ),
+            color=nextcord.Color.from_rgb(*config["embed_color_rgb"]),
+            timestamp=closed_at
+        )
+
+        view = ui.View(timeout=None)
+
+        # Botão Ver Transcript Online
+        online_button = ui.Button(
+            label="Ver Transcript Online",
+            style=nextcord.ButtonStyle.link,
+            url=f"{self.transcript_base_url}/{transcript_filename}",
+            emoji="🌐"
+        )
+        view.add_item(online_button)
+
+        # Botões de exportação (JSONL e texto), gerados em streaming pelo servidor de transcrições
+        for label, extension, emoji in (("JSONL", "jsonl", "🧾"), ("Texto", "txt", "📄")):
+            view.add_item(ui.Button(
+                label=label,
+                style=nextcord.ButtonStyle.link,
+                url=f"{self.transcript_base_url}/{transcript_filename}/export.{extension}",
+                emoji=emoji
+            ))
+
+        # O HTML é lido do gzip em blocos durante o upload; acima do limite do servidor, fica só o link
+        info = await asyncio.to_thread(self.transcript_store.describe, transcript_filename)
+        attachable = bool(info) and (info["raw_size"] or 0) <= guild.filesize_limit
+
+        # Botão Download Transcript
+        download_button = ui.Button(
+            label="Download Transcript",
+            style=nextcord.ButtonStyle.grey,
+            emoji="📥",
+            disabled=not attachable
+        )
+        async def download_callback(interaction: Interaction):
+            decoded = await asyncio.to_thread(self.transcript_store.open_decoded, transcript_filename)
+            if decoded is None:
+                await interaction.response.send_message("Esta transcrição não está mais disponível.", ephemeral=True)
+                return
+            file = nextcord.File(decoded, filename=transcript_filename)
+            await interaction.response.send_message(file=file, ephemeral=True)
+        download_button.callback = download_callback
+        view.add_item(download_button)
+
+        file = None
+        if attachable:
+            decoded = await asyncio.to_thread(self.transcript_store.open_decoded, transcript_filename)
+            file = nextcord.File(decoded, filename=transcript_filename) if decoded else None
+        else:
+            embed.add_field(name="Arquivo", value="Transcrição grande demais para anexar; use os links acima.", inline=False)
+
+        await transcripts_channel.send(embed=embed, view=view, file=file)
+        logger.info(f"Transcrição enviada para o canal {transcripts_channel.id}")
 
     async def update_menu_embed(self, guild_id: str):
         """Atualiza o menu de tickets existente com as categorias atuais."""
@@ -465,21 +904,7 @@ class TicketCog(commands.Cog):
                 nextcord.SelectOption(label=cat["name"], value=cat_id, emoji=cat["emoji"] or "<:seta:1350166397040463922>", description=cat["desc"])
                 for cat_id, cat in categories.items()
             ]
-            select = ui.Select(placeholder="Selecione uma categoria...", options=options)
-
-            async def select_callback(interaction: Interaction):
-                category_id = interaction.data["values"][0]
-                ticket_channel = await self.create_ticket_channel(interaction, guild_id, category_id)
-                if ticket_channel:
-                    await interaction.response.send_message(f"Ticket criado: {ticket_channel.mention}", ephemeral=True)
-                else:
-                    await interaction.response.send_message("Erro ao criar o ticket. Contate um administrador.", ephemeral=True)
-
-            select.callback = select_callback
-            view = ui.View(timeout=None)
-            view.add_item(select)
-
-            await message.edit(embed=embed, view=view, content=None)
+            await message.edit(embed=embed, view=self.TicketMenuView(self, options), content=None)
             logger.info(f"Menu de tickets atualizado em {channel.id}")
         except nextcord.errors.NotFound:
             # Se a mensagem não for encontrada, recriar o menu
@@ -516,36 +941,74 @@ class TicketCog(commands.Cog):
             nextcord.SelectOption(label=cat["name"], value=cat_id, emoji=cat["emoji"] or "<:seta:1350166397040463922>", description=cat["desc"])
             for cat_id, cat in categories.items()
         ]
-        select = ui.Select(placeholder="Selecione uma categoria...", options=options)
-
-        async def select_callback(interaction: Interaction):
-            category_id = interaction.data["values"][0]
-            ticket_channel = await self.create_ticket_channel(interaction, guild_id, category_id)
-            if ticket_channel:
-                await interaction.response.send_message(f"Ticket criado: {ticket_channel.mention}", ephemeral=True)
-            else:
-                await interaction.response.send_message("Erro ao criar o ticket. Contate um administrador.", ephemeral=True)
-
-        select.callback = select_callback
-        view = ui.View(timeout=None)
-        view.add_item(select)
-
-        message = await channel.send(embed=embed, view=view)
+        message = await channel.send(embed=embed, view=self.TicketMenuView(self, options))
         config["canal_menu"] = channel.id
         config["menu_message_id"] = message.id
         self.save_config(guild_id, config)
 
+    async def request_ticket(self, interaction: Interaction, guild_id: str, category_id: str):
+        """Admite um pedido de ticket: um ticket aberto por usuário e categoria, criação em fila por servidor."""
+        user_key = (guild_id, str(interaction.user.id), category_id)
+        existing = self.open_by_user.get(user_key)
+        if existing == CREATING:
+            await interaction.response.send_message("Seu ticket nessa categoria já está sendo criado, aguarde!", ephemeral=True)
+            return
+        if existing:
+            await interaction.response.send_message(f"Você já tem um ticket aberto nessa categoria: <#{existing.split('_')[1]}>", ephemeral=True)
+            return
+        self.open_by_user[user_key] = CREATING
+        # Responde antes de entrar na fila: a criação pode esperar mais que os 3 segundos que o Discord dá
+        # para a resposta, e o worker da fila usa interaction.followup, que exige a interação já respondida
+        try:
+            await interaction.response.defer(ephemeral=True)
+        except Exception:
+            del self.open_by_user[user_key]
+            raise
+        try:
+            sequence, future = self.ticket_creation.submit(
+                guild_id, lambda: self.create_ticket_channel(interaction, guild_id, category_id)
+            )
+        except QueueFull:
+            if self.open_by_user.get(user_key) == CREATING:
+                del self.open_by_user[user_key]
+            logger.warning(f"Fila de criação de tickets cheia em {guild_id}; pedido de {interaction.user.id} recusado")
+            await interaction.followup.send("Muitos tickets sendo abertos agora. Tente novamente em instantes.", ephemeral=True)
+            return
+        try:
+            position = self.ticket_creation.position(guild_id, sequence)
+            status = None
+            if position:
+                status = await interaction.followup.send(
+                    f"⏳ Muitos tickets sendo abertos agora. Sua posição na fila: **{position + 1}**", ephemeral=True, wait=True
+                )
+            while not future.done():
+                await asyncio.wait({future}, timeout=TICKET_QUEUE_UPDATE_SECONDS)
+                current = self.ticket_creation.position(guild_id, sequence)
+                if status and not future.done() and current != position:
+                    position = current
+                    await status.edit(content=f"⏳ Muitos tickets sendo abertos agora. Sua posição na fila: **{position + 1}**")
+            ticket_channel = future.result()
+        except Exception as e:
+            logger.error(f"Erro ao criar ticket para {interaction.user.id} em {guild_id}: {e}", exc_info=True)
+            await interaction.followup.send("Erro ao criar o ticket. Contate um administrador.", ephemeral=True)
+            return
+        finally:
+            if self.open_by_user.get(user_key) == CREATING:
+                del self.open_by_user[user_key]
+        if ticket_channel:  # None: create_ticket_channel já explicou o motivo ao usuário
+            await interaction.followup.send(f"Ticket criado: {ticket_channel.mention}", ephemeral=True)
+
     async def create_ticket_channel(self, interaction: Interaction, guild_id: str, category_id: str):
-        """Cria um canal de ticket com base na categoria selecionada."""
+        """Cria um canal de ticket com base na categoria selecionada (chamado pela fila de admissão)."""
         config = self.load_config(guild_id)
         categories = self.load_categories(guild_id)
         if category_id not in categories:
-            await interaction.response.send_message("Categoria inválida!", ephemeral=True)
+            await interaction.followup.send("Categoria inválida!", ephemeral=True)
             return None
 
         category_channel = interaction.guild.get_channel(config["categoria_tickets"])
         if not category_channel or not isinstance(category_channel, nextcord.CategoryChannel):
-            await interaction.response.send_message("Categoria de tickets não configurada ou inválida!", ephemeral=True)
+            await interaction.followup.send("Categoria de tickets não configurada ou inválida!", ephemeral=True)
             return None
 
         # Criar canal de ticket
@@ -570,9 +1033,15 @@ class TicketCog(commands.Cog):
             "assumed_by": None,
             "assumed_at": None,
             "last_activity": created_at,
-            "status": "aberto"
+            "status": "aberto",
+            "captured": True,
+            "message_count": 0
         }
-        self.save_ticket(guild_id, str(ticket_channel.id), self.active_tickets[ticket_key])
+        self.ticket_by_channel[ticket_channel.id] = ticket_key
+        self.open_by_user[(guild_id, str(interaction.user.id), category_id)] = ticket_key
+        await asyncio.to_thread(self.save_ticket, guild_id, str(ticket_channel.id), self.active_tickets[ticket_key])
+        await asyncio.to_thread(self.log_event, ticket_key, "aberto", str(interaction.user.id), {"categoria": category_id})
+        await asyncio.to_thread(self.record_stats, ticket_key, self.active_tickets[ticket_key], created_at, opened=1)
         
         # Log detalhado
         logger.info(
@@ -634,26 +1103,26 @@ class TicketCog(commands.Cog):
         if embed_config["image"]:
             embed.set_image(url=embed_config["image"])
 
-        view = ui.View(timeout=None)
-
-        assume_button = ui.Button(label="Assumir Ticket", style=nextcord.ButtonStyle.green, emoji="<:accept:1350169522077962324>")
-        assume_button.callback = lambda i: self.assume_ticket(i, channel, user, config, ticket_key, embed, view)
-        view.add_item(assume_button)
-
-        close_button = ui.Button(label="Encerrar Ticket", style=nextcord.ButtonStyle.red, emoji="<:rejects:1350169812751614064>")
-        close_button.callback = lambda i: self.close_ticket(i, channel, user, config, ticket_key, embed, view)
-        view.add_item(close_button)
+        await channel.send(embed=embed, view=self.panel_view)
+        self.schedule_inactivity(ticket_key, config)
 
-        notify_button = ui.Button(label="Notificar", style=nextcord.ButtonStyle.grey, emoji="<:notify:1350170693978951820>")
-        notify_button.callback = lambda i: self.notify_inactivity(i, channel, user, config, ticket_key, embed, view)
-        view.add_item(notify_button)
+    async def resolve_opener(self, guild: nextcord.Guild, ticket_data: dict) -> nextcord.abc.User:
+        """Quem abriu o ticket: membro do cache do servidor ou, se saiu, o usuário buscado na API."""
+        return guild.get_member(int(ticket_data["user_id"])) or await self.bot.fetch_user(int(ticket_data["user_id"]))
 
-        await channel.send(embed=embed, view=view)
-        asyncio.create_task(self.monitor_inactivity(channel, user, config, ticket_key))
+    async def handle_panel_action(self, interaction: Interaction, handler):
+        """Encaminha um botão do painel para o ticket do canal, consultando só o índice em memória."""
+        ticket_key = self.ticket_by_channel.get(interaction.channel_id)
+        if not ticket_key:
+            await interaction.response.send_message("Este ticket não está mais ativo!", ephemeral=True)
+            return
+        await handler(interaction, ticket_key)
 
-    async def assume_ticket(self, interaction: Interaction, channel, user, config, ticket_key, embed, view):
+    async def assume_ticket(self, interaction: Interaction, ticket_key: str):
         """Permite que um atendente assuma o ticket."""
         ticket_data = self.active_tickets[ticket_key]
+        channel = interaction.channel
+        config = self.load_config(str(channel.guild.id))
         if ticket_data["assumed_by"]:
             await interaction.response.send_message("Este ticket já foi assumido!", ephemeral=True)
             return
@@ -662,8 +1131,21 @@ class TicketCog(commands.Cog):
             return
 
         ticket_data["assumed_by"] = str(interaction.user.id)
-        ticket_data["last_activity"] = datetime.now(self.br_tz)
-        self.save_ticket(str(channel.guild.id), str(channel.id), ticket_data)
+        ticket_data["assumed_at"] = ticket_data["last_activity"] = datetime.now(self.br_tz)
+        ticket_data["inactivity_notified"] = False
+        await asyncio.to_thread(self.update_ticket, ticket_key, {
+            "assumed_by": ticket_data["assumed_by"],
+            "assumed_at": ticket_data["assumed_at"],
+            "last_activity": ticket_data["last_activity"],
+            "inactivity_notified": False
+        }, "assumido", ticket_data["assumed_by"])
+        await asyncio.to_thread(
+            self.record_stats, ticket_key, ticket_data, ticket_data["assumed_at"], ticket_data["assumed_by"],
+            assumed=1, assume=(ticket_data["assumed_at"] - ticket_data["created_at"]).total_seconds()
+        )
+        user = await self.resolve_opener(channel.guild, ticket_data)
+        embed = interaction.message.embeds[0]
+        self.schedule_inactivity(ticket_key, config)
         guild_id = str(channel.guild.id)
         categories = self.load_categories(guild_id)
         category = categories.get(ticket_data["category"], {"name": "Desconhecida"})
@@ -676,7 +1158,7 @@ class TicketCog(commands.Cog):
             f"<:readd:1350154929746215037> **Atendente Responsável:** {interaction.user.mention}"
         )
         await channel.send(f"{user.mention}, seu ticket foi assumido por {interaction.user.mention}!")
-        await interaction.message.edit(embed=embed, view=view)
+        await interaction.message.edit(embed=embed)
 
         assumed_embed = nextcord.Embed(
             title=embed_config["title"],
@@ -696,12 +1178,18 @@ class TicketCog(commands.Cog):
             await channel.send(f"Não consegui notificar {user.mention} por DM (bloqueada).")
         await interaction.response.send_message("Ticket assumido!", ephemeral=True)
 
-    async def close_ticket(self, interaction: Interaction, channel, user, config, ticket_key, embed, view):
+    async def close_ticket(self, interaction: Interaction, ticket_key: str):
         """Encerra o ticket e deleta o canal."""
         ticket_data = self.active_tickets[ticket_key]
-        if ticket_data.get("status") == "fechado":
+        if ticket_data.get("status") == "fechado" or ticket_key in self.closing_tickets:
             await interaction.response.send_message("Este ticket já está fechado!", ephemeral=True)
             return
+        channel = interaction.channel
+        config = self.load_config(str(channel.guild.id))
+
+        await interaction.response.send_message("Ticket será encerrado e deletado em 5 segundos...", ephemeral=True)
+        if not await self.hand_off_transcript(channel, ticket_key, ticket_data):
+            return
 
         # Registrar quem fechou o ticket
         closed_by = str(interaction.user.id)
@@ -712,7 +1200,13 @@ class TicketCog(commands.Cog):
         ticket_data["closed_by"] = closed_by
         ticket_data["closed_at"] = closed_at.isoformat()
         
-        self.save_ticket(str(channel.guild.id), str(channel.id), ticket_data)
+        await asyncio.to_thread(
+            self.update_ticket, ticket_key, {"status": "fechado", "closed_by": closed_by, "closed_at": closed_at}, "fechado", closed_by
+        )
+        await asyncio.to_thread(
+            self.record_stats, ticket_key, ticket_data, closed_at, ticket_data.get("assumed_by"), closed=1,
+            resolution=(closed_at - ticket_data["created_at"]).total_seconds(), messages=ticket_data.get("message_count", 0)
+        )
         
         # Log detalhado
         logger.info(
@@ -721,8 +1215,8 @@ class TicketCog(commands.Cog):
             f"Tempo aberto: {(closed_at - ticket_data['created_at']).total_seconds()/3600:.2f} horas."
         )
 
-        await interaction.response.send_message("Ticket será encerrado e deletado em 5 segundos...", ephemeral=True)
         await interaction.message.edit(view=None)
+        user = await self.resolve_opener(channel.guild, ticket_data)
         await channel.edit(name=f"closed-ticket-{user.name}")
 
         # Enviar log completo para o canal de logs
@@ -765,8 +1259,10 @@ class TicketCog(commands.Cog):
                 # Informações de atendimento
                 if ticket_data.get("assumed_by"):
                     staff = self.bot.get_user(int(ticket_data["assumed_by"]))
-                    assumed_at = ticket_data.get("assumed_at", "Desconhecido")
-                    if isinstance(assumed_at, str):
+                    assumed_at = ticket_data.get("assumed_at") or "Desconhecido"
+                    if isinstance(assumed_at, datetime):
+                        assumed_at = assumed_at.strftime("%d/%m/%Y %H:%M:%S")
+                    elif isinstance(assumed_at, str):
                         try:
                             assumed_at = datetime.fromisoformat(assumed_at).strftime("%d/%m/%Y %H:%M:%S")
                         except:
@@ -797,24 +1293,27 @@ class TicketCog(commands.Cog):
                 
                 log_embed.add_field(
                     name="📊 Estatísticas",
-                    value=f"Duração total: {duration_str}\nMensagens: {len([m async for m in channel.history(limit=None)])}",
+                    value=f"Duração total: {duration_str}\nMensagens: {ticket_data.get('message_count', 0)}",
                     inline=False
                 )
                 
                 await logs_channel.send(embed=log_embed)
 
-        await self.send_transcript(config, ticket_data, channel)
+        self.cancel_inactivity(ticket_key)
         await self.request_evaluation(user, config, ticket_data, channel)
-        del self.active_tickets[ticket_key]
+        self.forget_ticket(ticket_key)
         await asyncio.sleep(5)
         await channel.delete()
 
-    async def notify_inactivity(self, interaction: Interaction, channel, user, config, ticket_key, embed, view):
+    async def notify_inactivity(self, interaction: Interaction, ticket_key: str):
         """Notifica o usuário sobre inatividade no ticket."""
         ticket_data = self.active_tickets[ticket_key]
         if ticket_data["assumed_by"] and str(interaction.user.id) != ticket_data["assumed_by"]:
             await interaction.response.send_message("Apenas o atendente responsável pode notificar!", ephemeral=True)
             return
+        channel = interaction.channel
+        config = self.load_config(str(channel.guild.id))
+        user = await self.resolve_opener(channel.guild, ticket_data)
 
         embed_config = config["embed_inactivity"]
         inactivity_embed = nextcord.Embed(
@@ -832,110 +1331,149 @@ class TicketCog(commands.Cog):
         try:
             await user.send(embed=inactivity_embed)
             await channel.send(f"{user.mention} foi notificado sobre a inatividade.")
+            await asyncio.to_thread(self.log_event, ticket_key, "notificado", str(interaction.user.id))
         except nextcord.Forbidden:
             await channel.send(f"Não consegui notificar {user.mention} por DM (bloqueada).")
         await interaction.response.send_message("Notificação enviada!", ephemeral=True)
 
-    async def monitor_inactivity(self, channel: nextcord.TextChannel, user: nextcord.Member, config: dict, ticket_key: str):
-        """Monitora a inatividade do ticket e fecha automaticamente se necessário."""
-        while ticket_key in self.active_tickets:
-            await asyncio.sleep(3600)  # Verificar a cada hora
-            ticket_data = self.active_tickets.get(ticket_key, {})
-            last_activity = ticket_data["last_activity"]
-            hours_inactive = (datetime.now(self.br_tz) - last_activity).total_seconds() / 3600
-            
-            # Log de verificação de inatividade
-            logger.debug(
-                f"Verificando inatividade do ticket {channel.id}. "
-                f"Horas inativo: {hours_inactive:.2f}/{config['tempo_fechamento_horas']}. "
-                f"Última atividade: {last_activity.strftime('%d/%m/%Y %H:%M:%S')}"
+    def schedule_inactivity(self, ticket_key: str, config: Optional[dict] = None):
+        """Agenda (ou reagenda) os prazos de aviso e fechamento por inatividade a partir da última atividade."""
+        ticket_data = self.active_tickets.get(ticket_key)
+        if not ticket_data:
+            return
+        config = config or self.load_config(ticket_key.split("_")[0])
+        last_activity = ticket_data["last_activity"].timestamp()
+        if not ticket_data.get("inactivity_notified"):
+            self.inactivity_scheduler.schedule((ticket_key, "notificar"), last_activity + config["tempo_notificacao_horas"] * 3600)
+        self.inactivity_scheduler.schedule((ticket_key, "fechar"), last_activity + config["tempo_fechamento_horas"] * 3600)
+
+    def cancel_inactivity(self, ticket_key: str):
+        self.inactivity_scheduler.cancel((ticket_key, "notificar"))
+        self.inactivity_scheduler.cancel((ticket_key, "fechar"))
+
+    async def on_inactivity_deadline(self, key: tuple):
+        """Executado pelo agendador no prazo exato de aviso ou fechamento de um ticket."""
+        ticket_key, action = key
+        ticket_data = self.active_tickets.get(ticket_key)
+        if not ticket_data or ticket_data.get("status") == "fechado":
+            return
+        guild_id, channel_id = ticket_key.split("_")
+        channel = self.bot.get_channel(int(channel_id))
+        if not channel:
+            logger.warning(f"Canal do ticket {ticket_key} não existe mais; removendo dos tickets ativos")
+            self.cancel_inactivity(ticket_key)
+            self.forget_ticket(ticket_key)
+            return
+        config = self.load_config(guild_id)
+        hours_inactive = (datetime.now(self.br_tz) - ticket_data["last_activity"]).total_seconds() / 3600
+        limit = config["tempo_notificacao_horas"] if action == "notificar" else config["tempo_fechamento_horas"]
+        if hours_inactive < limit:
+            self.schedule_inactivity(ticket_key, config)  # Houve atividade depois do agendamento
+            return
+        user = await self.resolve_opener(channel.guild, ticket_data)
+        if action == "notificar":
+            logger.info(
+                f"Ticket {channel.id} inativo por {hours_inactive:.2f} horas. "
+                f"Notificando usuário {user} (ID: {user.id})."
             )
+            ticket_data["inactivity_notified"] = True
+            await asyncio.to_thread(self.update_ticket, ticket_key, {"inactivity_notified": True}, "notificado_auto", detail={"horas_inativo": round(hours_inactive, 2)})
+            await channel.send(f"{user.mention}, seu ticket está inativo há {int(hours_inactive)} horas. Responda ou ele será fechado em breve!")
+        else:
+            await self.auto_close_ticket(channel, user, config, ticket_key, hours_inactive)
+
+    async def auto_close_ticket(self, channel: nextcord.TextChannel, user: nextcord.abc.User, config: dict, ticket_key: str, hours_inactive: float):
+        """Fecha o ticket por inatividade, registra o log e envia a transcrição."""
+        ticket_data = self.active_tickets[ticket_key]
+        if ticket_key in self.closing_tickets:
+            return
+        self.cancel_inactivity(ticket_key)
+        if not await self.hand_off_transcript(channel, ticket_key, ticket_data):
+            # O ticket segue aberto; o fechamento automático é tentado de novo mais tarde
+            self.inactivity_scheduler.schedule((ticket_key, "fechar"), time.time() + SNAPSHOT_RETRY_SECONDS)
+            return
 
-            if hours_inactive >= config["tempo_notificacao_horas"]:
-                # Log de notificação de inatividade
-                logger.info(
-                    f"Ticket {channel.id} inativo por {hours_inactive:.2f} horas. "
-                    f"Notificando usuário {user} (ID: {user.id})."
+        # Registrar fechamento por inatividade
+        closed_at = datetime.now(self.br_tz)
+        ticket_data["status"] = "fechado"
+        ticket_data["closed_by"] = "auto"
+        ticket_data["closed_at"] = closed_at.isoformat()
+        await asyncio.to_thread(
+            self.update_ticket, ticket_key, {"status": "fechado", "closed_by": "auto", "closed_at": closed_at},
+            "fechado_auto", detail={"horas_inativo": round(hours_inactive, 2)}
+        )
+        await asyncio.to_thread(
+            self.record_stats, ticket_key, ticket_data, closed_at, ticket_data.get("assumed_by"), closed=1,
+            resolution=(closed_at - ticket_data["created_at"]).total_seconds(), messages=ticket_data.get("message_count", 0)
+        )
+        
+        # Log detalhado
+        logger.info(
+            f"Ticket {channel.id} fechado automaticamente por inatividade. "
+            f"Aberto por: {ticket_data['user_id']}, Assumido por: {ticket_data.get('assumed_by', 'Ninguém')}. "
+            f"Tempo inativo: {hours_inactive:.2f} horas. "
+            f"Tempo total aberto: {(closed_at - ticket_data['created_at']).total_seconds()/3600:.2f} horas."
+        )
+
+        # Enviar log completo para o canal de logs
+        if config["canal_logs"]:
+            logs_channel = self.bot.get_channel(config["canal_logs"])
+            if logs_channel:
+                guild_id = str(channel.guild.id)
+                categories = self.load_categories(guild_id)
+                category_name = categories.get(ticket_data["category"], {"name": "Desconhecida"})["name"]
+                
+                log_embed = nextcord.Embed(
+                    title="⏳ Ticket Encerrado por Inatividade",
+                    color=nextcord.Color.orange(),
+                    timestamp=closed_at
                 )
-                await channel.send(f"{user.mention}, seu ticket está inativo há {int(hours_inactive)} horas. Responda ou ele será fechado em breve!")
                 
-            if hours_inactive >= config["tempo_fechamento_horas"]:
-                # Registrar fechamento por inatividade
-                closed_at = datetime.now(self.br_tz)
-                ticket_data["status"] = "fechado"
-                ticket_data["closed_by"] = "auto"
-                ticket_data["closed_at"] = closed_at.isoformat()
-                self.save_ticket(str(channel.guild.id), str(channel.id), ticket_data)
+                opener = self.bot.get_user(int(ticket_data["user_id"]))
+                log_embed.add_field(
+                    name="👤 Usuário",
+                    value=f"{opener.mention}\nID: {opener.id}",
+                    inline=True
+                )
                 
-                # Log detalhado
-                logger.info(
-                    f"Ticket {channel.id} fechado automaticamente por inatividade. "
-                    f"Aberto por: {ticket_data['user_id']}, Assumido por: {ticket_data.get('assumed_by', 'Ninguém')}. "
-                    f"Tempo inativo: {hours_inactive:.2f} horas. "
-                    f"Tempo total aberto: {(closed_at - ticket_data['created_at']).total_seconds()/3600:.2f} horas."
+                created_at = ticket_data["created_at"].strftime("%d/%m/%Y %H:%M:%S") if isinstance(ticket_data["created_at"], datetime) else ticket_data["created_at"]
+                log_embed.add_field(
+                    name="🎟️ Ticket",
+                    value=f"ID: {channel.id}\nCategoria: {category_name}",
+                    inline=True
                 )
+                
+                if ticket_data.get("assumed_by"):
+                    staff = self.bot.get_user(int(ticket_data["assumed_by"]))
+                    log_embed.add_field(
+                        name="🛎️ Atendente",
+                        value=f"{staff.mention}\nID: {staff.id}",
+                        inline=True
+                    )
+                
+                log_embed.add_field(
+                    name="⏱️ Tempo",
+                    value=f"Aberto em: {created_at}\nFechado em: {closed_at.strftime('%d/%m/%Y %H:%M:%S')}",
+                    inline=False
+                )
+                
+                log_embed.add_field(
+                    name="📊 Estatísticas",
+                    value=(
+                        f"Tempo inativo: {hours_inactive:.1f} horas\n"
+                        f"Tempo total: {(closed_at - ticket_data['created_at']).total_seconds()/3600:.1f} horas\n"
+                        f"Mensagens: {ticket_data.get('message_count', 0)}"
+                    ),
+                    inline=False
+                )
+                
+                await logs_channel.send(embed=log_embed)
 
-                # Enviar log completo para o canal de logs
-                if config["canal_logs"]:
-                    logs_channel = self.bot.get_channel(config["canal_logs"])
-                    if logs_channel:
-                        guild_id = str(channel.guild.id)
-                        categories = self.load_categories(guild_id)
-                        category_name = categories.get(ticket_data["category"], {"name": "Desconhecida"})["name"]
-                        
-                        log_embed = nextcord.Embed(
-                            title="⏳ Ticket Encerrado por Inatividade",
-                            color=nextcord.Color.orange(),
-                            timestamp=closed_at
-                        )
-                        
-                        opener = self.bot.get_user(int(ticket_data["user_id"]))
-                        log_embed.add_field(
-                            name="👤 Usuário",
-                            value=f"{opener.mention}\nID: {opener.id}",
-                            inline=True
-                        )
-                        
-                        created_at = ticket_data["created_at"].strftime("%d/%m/%Y %H:%M:%S") if isinstance(ticket_data["created_at"], datetime) else ticket_data["created_at"]
-                        log_embed.add_field(
-                            name="🎟️ Ticket",
-                            value=f"ID: {channel.id}\nCategoria: {category_name}",
-                            inline=True
-                        )
-                        
-                        if ticket_data.get("assumed_by"):
-                            staff = self.bot.get_user(int(ticket_data["assumed_by"]))
-                            log_embed.add_field(
-                                name="🛎️ Atendente",
-                                value=f"{staff.mention}\nID: {staff.id}",
-                                inline=True
-                            )
-                        
-                        log_embed.add_field(
-                            name="⏱️ Tempo",
-                            value=f"Aberto em: {created_at}\nFechado em: {closed_at.strftime('%d/%m/%Y %H:%M:%S')}",
-                            inline=False
-                        )
-                        
-                        log_embed.add_field(
-                            name="📊 Estatísticas",
-                            value=(
-                                f"Tempo inativo: {hours_inactive:.1f} horas\n"
-                                f"Tempo total: {(closed_at - ticket_data['created_at']).total_seconds()/3600:.1f} horas\n"
-                                f"Mensagens: {len([m async for m in channel.history(limit=None)])}"
-                            ),
-                            inline=False
-                        )
-                        
-                        await logs_channel.send(embed=log_embed)
-
-                await channel.send("Ticket fechado automaticamente por inatividade e será deletado em 5 segundos.")
-                await self.send_transcript(config, ticket_data, channel)
-                await self.request_evaluation(user, config, ticket_data, channel)
-                del self.active_tickets[ticket_key]
-                await asyncio.sleep(5)
-                await channel.delete()
-                break
+        await channel.send("Ticket fechado automaticamente por inatividade e será deletado em 5 segundos.")
+        await self.request_evaluation(user, config, ticket_data, channel)
+        self.forget_ticket(ticket_key)
+        await asyncio.sleep(5)
+        await channel.delete()
 
     async def request_evaluation(self, user: nextcord.Member, config: dict, ticket_data: dict, channel: nextcord.TextChannel):
         """Solicita uma avaliação do atendimento."""
@@ -965,6 +1503,9 @@ class TicketCog(commands.Cog):
         )
 
         async def select_callback(interaction: Interaction):
+            if ticket_data.get("rating"):
+                await interaction.response.send_message("Você já avaliou este atendimento!", ephemeral=True)
+                return
             rating = interaction.data["values"][0]
             rating_text = {
                 "1": "Péssimo",
@@ -973,6 +1514,12 @@ class TicketCog(commands.Cog):
                 "4": "Bom",
                 "5": "Excelente"
             }.get(rating, "Desconhecido")
+            ticket_data["rating"] = int(rating)
+            ticket_key = f"{channel.guild.id}_{channel.id}"
+            await asyncio.to_thread(self.update_ticket, ticket_key, {"rating": int(rating)}, "avaliado", str(user.id))
+            await asyncio.to_thread(
+                self.record_stats, ticket_key, ticket_data, datetime.now(self.br_tz), ticket_data.get("assumed_by"), rating=int(rating)
+            )
             
             # Log da avaliação
             logger.info(
@@ -1054,6 +1601,36 @@ class TicketCog(commands.Cog):
         except nextcord.Forbidden:
             await channel.send(f"{user.mention}, avalie o atendimento aqui (DM bloqueada):", embed=embed, view=view)
 
+    class TicketPanelView(ui.View):
+        """Botões do painel do ticket com custom_id fixo; o ticket é identificado pelo canal da interação."""
+        def __init__(self, parent_cog):
+            super().__init__(timeout=None)
+            self.parent_cog = parent_cog
+
+        @ui.button(label="Assumir Ticket", style=nextcord.ButtonStyle.green, emoji="<:accept:1350169522077962324>", custom_id="databit_ticket:assumir")
+        async def assume(self, button: ui.Button, interaction: Interaction):
+            await self.parent_cog.handle_panel_action(interaction, self.parent_cog.assume_ticket)
+
+        @ui.button(label="Encerrar Ticket", style=nextcord.ButtonStyle.red, emoji="<:rejects:1350169812751614064>", custom_id="databit_ticket:encerrar")
+        async def close(self, button: ui.Button, interaction: Interaction):
+            await self.parent_cog.handle_panel_action(interaction, self.parent_cog.close_ticket)
+
+        @ui.button(label="Notificar", style=nextcord.ButtonStyle.grey, emoji="<:notify:1350170693978951820>", custom_id="databit_ticket:notificar")
+        async def notify(self, button: ui.Button, interaction: Interaction):
+            await self.parent_cog.handle_panel_action(interaction, self.parent_cog.notify_inactivity)
+
+    class TicketMenuView(ui.View):
+        """Menu de categorias com custom_id fixo; a instância registrada sem opções atende os menus já enviados."""
+        def __init__(self, parent_cog, options: Optional[list] = None):
+            super().__init__(timeout=None)
+            self.parent_cog = parent_cog
+            select = ui.Select(placeholder="Selecione uma categoria...", options=options or [], custom_id="databit_ticket:menu")
+            select.callback = self.on_select
+            self.add_item(select)
+
+        async def on_select(self, interaction: Interaction):
+            await self.parent_cog.request_ticket(interaction, str(interaction.guild.id), interaction.data["values"][0])
+
     class AddCategoryModal(nextcord.ui.Modal):
         """Modal para adicionar uma nova categoria."""
         def __init__(self, parent_cog):
@@ -1366,7 +1943,13 @@ class TicketCog(commands.Cog):
         cor_g: int = SlashOption(description="Cor G (0-255)", default=45, min_value=0, max_value=255),
         cor_b: int = SlashOption(description="Cor B (0-255)", default=49, min_value=0, max_value=255),
         tempo_notificacao: int = SlashOption(description="Horas para notificar inatividade", default=24, min_value=1, max_value=168),
-        tempo_fechamento: int = SlashOption(description="Horas para fechar ticket inativo", default=48, min_value=2, max_value=168)
+        tempo_fechamento: int = SlashOption(description="Horas para fechar ticket inativo", default=48, min_value=2, max_value=168),
+        tema_transcript: str = SlashOption(
+            description="Tema visual das transcrições",
+            choices={label: key for key, label in THEMES.items()},
+            default=DEFAULT_THEME
+        ),
+        retencao_transcripts: int = SlashOption(description="Dias para manter as transcrições (0 = para sempre)", default=0, min_value=0, max_value=3650)
     ):
         """Comando para configurar o sistema de tickets."""
         guild_id = str(interaction.guild.id)
@@ -1380,7 +1963,9 @@ class TicketCog(commands.Cog):
             "canal_transcripts": canal_transcripts.id,
             "embed_color_rgb": [cor_r, cor_g, cor_b],
             "tempo_notificacao_horas": tempo_notificacao,
-            "tempo_fechamento_horas": tempo_fechamento
+            "tempo_fechamento_horas": tempo_fechamento,
+            "tema_transcript": tema_transcript,
+            "retencao_transcripts_dias": retencao_transcripts
         })
         self.save_config(guild_id, config)
         await interaction.response.send_message(
@@ -1389,7 +1974,9 @@ class TicketCog(commands.Cog):
             f"**Cargo:** {cargo_suporte.mention}\n**Avaliações:** {canal_avaliacoes.mention}\n"
             f"**Logs:** {canal_logs.mention}\n**Transcrições:** {canal_transcripts.mention}\n"
             f"**Cor RGB:** {cor_r},{cor_g},{cor_b}\n"
-            f"**Notificação:** {tempo_notificacao}h\n**Fechamento:** {tempo_fechamento}h",
+            f"**Notificação:** {tempo_notificacao}h\n**Fechamento:** {tempo_fechamento}h\n"
+            f"**Tema das Transcrições:** {THEMES[tema_transcript]}\n"
+            f"**Retenção das Transcrições:** {f'{retencao_transcripts} dias' if retencao_transcripts else 'Permanente'}",
             ephemeral=True
         )
 
@@ -1406,6 +1993,218 @@ class TicketCog(commands.Cog):
         await self.create_menu_embed(guild_id, channel)
         await interaction.response.send_message(f"Menu de tickets criado em {channel.mention}!", ephemeral=True)
 
+    @nextcord.slash_command(name="search_tickets", description="Busca nas mensagens dos tickets fechados.")
+    @commands.has_permissions(administrator=True)
+    async def search_tickets(
+        self,
+        interaction: Interaction,
+        termo: str = SlashOption(description="Palavras a buscar", required=True),
+        categoria: str = SlashOption(description="Filtrar pelo nome da categoria", required=False),
+        atendente: nextcord.Member = SlashOption(description="Filtrar pelo atendente que assumiu o ticket", required=False),
+        desde: str = SlashOption(description="Fechados a partir de (DD/MM/AAAA)", required=False),
+        ate: str = SlashOption(description="Fechados até (DD/MM/AAAA)", required=False)
+    ):
+        """Comando para buscar tickets fechados por conteúdo."""
+        guild_id = str(interaction.guild.id)
+        try:
+            since = self.br_tz.localize(datetime.strptime(desde, "%d/%m/%Y")).timestamp() if desde else None
+            until = self.br_tz.localize(datetime.strptime(ate, "%d/%m/%Y")).timestamp() + 86399 if ate else None
+        except ValueError:
+            await interaction.response.send_message("Data inválida! Use o formato DD/MM/AAAA.", ephemeral=True)
+            return
+        await interaction.response.defer(ephemeral=True)
+        try:
+            started = time.perf_counter()
+            results = await asyncio.to_thread(
+                self.search_index.search, guild_id, termo, categoria, str(atendente.id) if atendente else None, since, until
+            )
+            elapsed = (time.perf_counter() - started) * 1000
+        except Exception as e:
+            logger.error(f"Erro na busca de tickets em {guild_id}: {e}", exc_info=True)
+            await interaction.followup.send("Erro ao buscar tickets!", ephemeral=True)
+            return
+
+        config = self.load_config(guild_id)
+        embed = nextcord.Embed(
+            title="🔎 Busca de Tickets",
+            description=f"**{len(results)}** tickets encontrados para `{termo[:100]}` ({elapsed:.0f} ms)." if results else f"Nenhum ticket encontrado para `{termo[:100]}`.",
+            color=nextcord.Color.from_rgb(*config["embed_color_rgb"]),
+            timestamp=datetime.now(self.br_tz)
+        )
+        for result in results:
+            closed_at = datetime.fromtimestamp(result["closed_at"], self.br_tz).strftime("%d/%m/%Y %H:%M")
+            embed.add_field(
+                name=f"Ticket #{result['ticket_id']} • {result['category'] or 'Sem categoria'}"[:256],
+                value=(
+                    f"{result['snippet'][:700]}\n"
+                    f"**Autor:** {result['author']} | **Fechado em:** {closed_at} | **Ocorrências:** {result['hits']}\n"
+                    f"[Abrir transcrição]({self.transcript_base_url}/{result['transcript']})"
+                ),
+                inline=False
+            )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+    @staticmethod
+    def format_duration(seconds: Optional[float]) -> str:
+        if seconds is None:
+            return "-"
+        minutes = int(seconds // 60)
+        if minutes < 60:
+            return f"{minutes}min"
+        return f"{minutes // 60}h{minutes % 60:02d}"
+
+    @nextcord.slash_command(name="ticket_stats", description="Mostra as métricas de atendimento dos tickets.")
+    @commands.has_permissions(administrator=True)
+    async def ticket_stats_command(
+        self,
+        interaction: Interaction,
+        agrupar: str = SlashOption(
+            description="Agrupar as métricas por",
+            choices={"Servidor": "guild", "Categoria": "category", "Atendente": "attendant"},
+            default="guild"
+        ),
+        desde: str = SlashOption(description="A partir de (DD/MM/AAAA)", required=False),
+        ate: str = SlashOption(description="Até (DD/MM/AAAA)", required=False)
+    ):
+        """Comando para consultar tempos de resposta, resolução e notas dos tickets."""
+        guild_id = str(interaction.guild.id)
+        try:
+            since = datetime.strptime(desde, "%d/%m/%Y").date() if desde else None
+            until = datetime.strptime(ate, "%d/%m/%Y").date() if ate else None
+        except ValueError:
+            await interaction.response.send_message("Data inválida! Use o formato DD/MM/AAAA.", ephemeral=True)
+            return
+        await interaction.response.defer(ephemeral=True)
+        try:
+            summaries = await asyncio.to_thread(self.ticket_stats.summary, guild_id, since, until, agrupar)
+        except Exception as e:
+            logger.error(f"Erro ao consultar métricas de tickets em {guild_id}: {e}", exc_info=True)
+            await interaction.followup.send("Erro ao consultar as métricas!", ephemeral=True)
+            return
+
+        config = self.load_config(guild_id)
+        categories = self.load_categories(guild_id)
+        period = f"{desde or 'início'} até {ate or 'hoje'}"
+        embed = nextcord.Embed(
+            title="📊 Métricas de Atendimento",
+            description=f"Período: {period}" if summaries else f"Nenhum ticket no período ({period}).",
+            color=nextcord.Color.from_rgb(*config["embed_color_rgb"]),
+            timestamp=datetime.now(self.br_tz)
+        )
+        for summary in summaries:
+            if agrupar == "category":
+                name = categories.get(summary["key"], {"name": "Categoria removida"})["name"]
+            elif agrupar == "attendant":
+                member = interaction.guild.get_member(int(summary["key"]))
+                name = member.display_name if member else f"ID {summary['key']}"
+            else:
+                name = interaction.guild.name
+            ratings = " ".join(f"{value}⭐ {amount}" for value, amount in summary["ratings"].items())
+            embed.add_field(
+                name=name[:256],
+                value=(
+                    f"**Abertos:** {summary['opened']} | **Assumidos:** {summary['assumed']} | **Fechados:** {summary['closed']}\n"
+                    f"**1ª resposta:** {self.format_duration(summary['first_response_avg_seconds'])} | "
+                    f"**Para assumir:** {self.format_duration(summary['assume_avg_seconds'])} | "
+                    f"**Resolução:** {self.format_duration(summary['resolution_avg_seconds'])}\n"
+                    f"**Mensagens/ticket:** {summary['messages_per_ticket'] or 0:.1f} | "
+                    f"**Nota média:** {summary['rating_avg'] or 0:.2f}\n{ratings}"
+                ),
+                inline=False
+            )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+    @nextcord.slash_command(name="export_tickets", description="Gera um link para baixar em ZIP as transcrições de um período.")
+    @commands.has_permissions(administrator=True)
+    async def export_tickets_command(
+        self,
+        interaction: Interaction,
+        desde: str = SlashOption(description="A partir de (DD/MM/AAAA)", required=False),
+        ate: str = SlashOption(description="Até (DD/MM/AAAA)", required=False)
+    ):
+        """Comando para exportar as transcrições do servidor; o ZIP é montado pelo servidor de transcrições durante o download."""
+        guild_id = str(interaction.guild.id)
+        try:
+            since = int(self.br_tz.localize(datetime.strptime(desde, "%d/%m/%Y")).timestamp()) if desde else 0
+            until = int(self.br_tz.localize(datetime.strptime(ate, "%d/%m/%Y")).timestamp()) + 86399 if ate else int(time.time())
+        except ValueError:
+            await interaction.response.send_message("Data inválida! Use o formato DD/MM/AAAA.", ephemeral=True)
+            return
+        await interaction.response.defer(ephemeral=True)
+        try:
+            bundle = await asyncio.to_thread(self.transcript_exporter.bundle, guild_id, since, until)
+        except ValueError as e:
+            await interaction.followup.send(str(e), ephemeral=True)
+            return
+        except Exception as e:
+            logger.error(f"Erro ao preparar exportação de transcrições em {guild_id}: {e}", exc_info=True)
+            await interaction.followup.send("Erro ao preparar a exportação!", ephemeral=True)
+            return
+        period = f"{desde or 'início'} até {ate or 'hoje'}"
+        if not bundle.count:
+            await interaction.followup.send(f"Nenhuma transcrição no período ({period}).", ephemeral=True)
+            return
+
+        config = self.load_config(guild_id)
+        embed = nextcord.Embed(
+            title="📦 Exportação de Transcrições",
+            description=(
+                f"**Período:** {period}\n"
+                f"**Transcrições:** {bundle.count}\n"
+                f"**Tamanho:** {bundle.size / 1024 / 1024:.1f} MiB\n"
+                f"O link vale por 24 horas e o download pode ser retomado se cair."
+            ),
+            color=nextcord.Color.from_rgb(*config["embed_color_rgb"]),
+            timestamp=datetime.now(self.br_tz)
+        )
+        view = ui.View()
+        view.add_item(ui.Button(
+            label="Baixar ZIP",
+            style=nextcord.ButtonStyle.link,
+            url=bundle_url(self.transcript_base_url, guild_id, since, until),
+            emoji="📥"
+        ))
+        await interaction.followup.send(embed=embed, view=view, ephemeral=True)
+        logger.info(f"Exportação de {bundle.count} transcrições gerada por {interaction.user.id} em {guild_id} ({period})")
+
+    @nextcord.slash_command(name="transcript_jobs", description="Mostra o andamento das transcrições em segundo plano.")
+    @commands.has_permissions(administrator=True)
+    async def transcript_jobs_command(
+        self,
+        interaction: Interaction,
+        reprocessar: bool = SlashOption(description="Tentar de novo as transcrições que falharam", required=False, default=False)
+    ):
+        """Comando para acompanhar a fila de transcrições do servidor e reprocessar as que falharam."""
+        guild_id = str(interaction.guild.id)
+        try:
+            retried = self.transcript_jobs.retry_failed(guild_id) if reprocessar else 0
+            summary = self.transcript_jobs.summary(guild_id)
+            unfinished = self.transcript_jobs.unfinished(guild_id)
+        except Exception as e:
+            logger.error(f"Erro ao consultar a fila de transcrições de {guild_id}: {e}", exc_info=True)
+            await interaction.response.send_message("Erro ao consultar a fila de transcrições!", ephemeral=True)
+            return
+
+        config = self.load_config(guild_id)
+        embed = nextcord.Embed(
+            title="🗂️ Fila de Transcrições",
+            description=(
+                f"**Pendentes:** {summary['pendente']} | **Em execução:** {summary['executando']}\n"
+                f"**Concluídas:** {summary['concluido']} | **Falharam:** {summary['falhou']}"
+                + (f"\n{retried} transcrições devolvidas à fila." if reprocessar else "")
+            ),
+            color=nextcord.Color.from_rgb(*config["embed_color_rgb"]),
+            timestamp=datetime.now(self.br_tz)
+        )
+        for job in unfinished:
+            value = f"Etapa: {job['stage']} | Tentativas: {job['attempts']}"
+            if job["status"] == "pendente" and job["next_attempt_at"] > time.time():
+                value += f"\nPróxima tentativa <t:{int(job['next_attempt_at'])}:R>"
+            if job["last_error"]:
+                value += f"\n```{job['last_error'][:200]}```"
+            embed.add_field(name=f"Ticket {job['ticket_key'].split('_')[1]} ({job['status']})", value=value, inline=False)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
 def setup(bot):
     logger.info("Chamando setup para TicketCog")
     try:
@@ -0,0 +1,6 @@
+# utils/__init__.py
+# Description: Serviços compartilhados entre as cogs do DataBit (limites de API, mitigação de raids, agendadores e transcrições)
+# Date of Creation: 19/10/2026
+# Created by: CodeProjects
+# Version: 1.0
+# Developer Of Version: CodeProjects - Serviços Escaláveis para seu Game
@@ -0,0 +1,96 @@
+# utils/admission.py
+# Description: Fila de admissão por servidor para operações caras na API (ex.: criação de canais de ticket), com posição na fila e limite de rajada
+# Date of Creation: 19/10/2026
+# Created by: CodeProjects
+# Version: 1.0
+# Developer Of Version: CodeProjects - Serviços Escaláveis para seu Game
+
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from utils.rate_limit import ApiBudget
+
+logger = logging.getLogger("DataBit.Admission")
+
+
+class QueueFull(Exception):
+    """O servidor já tem o máximo de pedidos aguardando na fila."""
+
+
+class _GuildQueue:
+    def __init__(self, budget: ApiBudget):
+        self.budget = budget
+        self.entries: Deque[Tuple[int, asyncio.Future, Callable[[], Awaitable]]] = deque()
+        self.submitted = 0  # Número de sequência do último pedido aceito
+        self.served = 0  # Pedidos já retirados da fila (concluídos ou em execução)
+        self.worker: Optional[asyncio.Task] = None
+
+
+class AdmissionQueue:
+    """Executa os pedidos de cada servidor um de cada vez, na ordem de chegada, dentro de um orçamento de taxa.
+
+    Cada pedido recebe um número de sequência; a posição na fila é a diferença para o último
+    pedido retirado, então consultar a posição é O(1). Os workers existem só enquanto há fila.
+    """
+
+    def __init__(self, rate: float = 0.5, burst: int = 3, max_pending: int = 50, name: str = "admissao"):
+        self.rate = rate
+        self.burst = burst
+        self.max_pending = max_pending
+        self.name = name
+        self._queues: Dict[str, _GuildQueue] = {}
+
+    def _queue(self, guild_id: str) -> _GuildQueue:
+        queue = self._queues.get(guild_id)
+        if queue is None:
+            queue = self._queues[guild_id] = _GuildQueue(ApiBudget(rate=self.rate, burst=self.burst, concurrency=1))
+        return queue
+
+    def submit(self, guild_id: str, job: Callable[[], Awaitable]) -> Tuple[int, asyncio.Future]:
+        """Enfileira o pedido e retorna (sequência, future com o resultado de job())."""
+        queue = self._queue(guild_id)
+        if len(queue.entries) >= self.max_pending:
+            raise QueueFull(guild_id)
+        queue.submitted += 1
+        future = asyncio.get_running_loop().create_future()
+        queue.entries.append((queue.submitted, future, job))
+        if queue.worker is None or queue.worker.done():
+            queue.worker = asyncio.create_task(self._work(guild_id, queue))
+        return queue.submitted, future
+
+    def position(self, guild_id: str, sequence: int) -> int:
+        """Quantos pedidos estão na frente (0 = é o próximo ou já está sendo executado)."""
+        queue = self._queues.get(guild_id)
+        if queue is None:
+            return 0
+        return max(0, sequence - queue.served - 1)
+
+    async def _work(self, guild_id: str, queue: _GuildQueue):
+        while queue.entries:
+            _, future, job = queue.entries.popleft()
+            queue.served += 1
+            if future.done():  # Pedido cancelado enquanto esperava
+                continue
+            try:
+                async with queue.budget.slot():
+                    future.set_result(await job())
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+        if self._queues.get(guild_id) is queue and not queue.entries:
+            del self._queues[guild_id]
+
+    def pending(self, guild_id: str) -> int:
+        queue = self._queues.get(guild_id)
+        return len(queue.entries) if queue else 0
+
+    def close(self):
+        for guild_id, queue in self._queues.items():
+            if queue.worker:
+                queue.worker.cancel()
+            for _, future, _ in queue.entries:
+                future.cancel()
+            logger.info(f"Fila {self.name} de {guild_id} descartada com {len(queue.entries)} pedidos")
+        self._queues.clear()
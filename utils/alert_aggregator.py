@@ -0,0 +1,103 @@
+# utils/alert_aggregator.py
+# Description: Agrupador de alertas por servidor para não inundar o canal de logs durante uma raid
+# Date of Creation: 19/10/2026
+# Created by: CodeProjects
+# Version: 1.0
+# Developer Of Version: CodeProjects - Serviços Escaláveis para seu Game
+
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+import nextcord
+
+logger = logging.getLogger("DataBit.AlertAggregator")
+
+SUMMARY_MAX_USERS = 25  # Usuários listados por resumo
+
+
+class _GuildWindow:
+    def __init__(self):
+        self.counts = Counter()  # (título, ação) -> quantidade
+        self.users = defaultdict(Counter)  # título -> {user_id: quantidade}
+        self.task: Optional[asyncio.Task] = None
+
+    def empty(self) -> bool:
+        return not self.counts
+
+
+class AlertAggregator:
+    """Envia o primeiro alerta de uma rajada na hora e agrupa os seguintes em um resumo por janela.
+
+    Enquanto houver alertas a cada janela, um único resumo é enviado por janela; quando uma janela
+    termina vazia, o próximo alerta volta a ser enviado imediatamente.
+    """
+
+    def __init__(self, send: Callable[[str, nextcord.Embed], Awaitable[None]], tz, window: float = 10.0):
+        self.send = send
+        self.tz = tz
+        self.window = window
+        self._windows: Dict[str, _GuildWindow] = {}
+        self.sent = 0
+        self.suppressed = 0
+
+    async def alert(self, guild_id: str, embed: nextcord.Embed, user_id: Optional[int] = None, action: str = ""):
+        state = self._windows.get(guild_id)
+        if state is None:
+            state = self._windows[guild_id] = _GuildWindow()
+            state.task = asyncio.create_task(self._run_window(guild_id))
+            self.sent += 1
+            await self.send(guild_id, embed)
+            return
+        title = embed.title or "Alerta"
+        state.counts[(title, action)] += 1
+        if user_id is not None:
+            state.users[title][user_id] += 1
+        self.suppressed += 1
+
+    async def _run_window(self, guild_id: str):
+        try:
+            while True:
+                await asyncio.sleep(self.window)
+                state = self._windows[guild_id]
+                if state.empty():
+                    del self._windows[guild_id]
+                    return
+                summary = self.build_summary(state)
+                self._windows[guild_id] = _GuildWindow()
+                self._windows[guild_id].task = state.task
+                self.sent += 1
+                try:
+                    await self.send(guild_id, summary)
+                except Exception as e:
+                    logger.error(f"Erro ao enviar resumo de alertas para {guild_id}: {e}")
+        except asyncio.CancelledError:
+            self._windows.pop(guild_id, None)
+            raise
+
+    def build_summary(self, state: _GuildWindow) -> nextcord.Embed:
+        total = sum(state.counts.values())
+        embed = nextcord.Embed(
+            title="<:alert:1351976384779517972> Resumo de Alertas Anti-Raid",
+            description=f"**{total}** alertas agrupados nos últimos {int(self.window)} segundos.",
+            color=nextcord.Color.red(),
+            timestamp=datetime.now(self.tz)
+        )
+        for (title, action), count in state.counts.most_common(10):
+            users = state.users.get(title, Counter())
+            listed = [f"<@{uid}> ×{n}" for uid, n in users.most_common(SUMMARY_MAX_USERS)]
+            if len(users) > SUMMARY_MAX_USERS:
+                listed.append(f"e mais {len(users) - SUMMARY_MAX_USERS}")
+            value = f"**Ocorrências:** {count}" + (f"\n**Ação:** {action}" if action else "")
+            if listed:
+                value += "\n" + ", ".join(listed)
+            embed.add_field(name=title[:256], value=value[:1024], inline=False)
+        return embed
+
+    def stop(self):
+        for state in self._windows.values():
+            if state.task:
+                state.task.cancel()
+        self._windows.clear()
@@ -0,0 +1,249 @@
+# utils/antiraid_journal.py
+# Description: Diário append-only de eventos do anti-raid (gravação em lotes, tabelas mensais) e ferramenta de replay para calibrar limites
+# Date of Creation: 19/10/2026
+# Created by: CodeProjects
+# Version: 1.0
+# Developer Of Version: CodeProjects - Serviços Escaláveis para seu Game
+#
+# Uso do replay (offline, sem o bot rodando):
+#   python -m utils.antiraid_journal --guild 123456789 --max-messages-per-minute 10 15 20 --max-bans-per-hour 3 5
+
+import argparse
+import asyncio
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from utils.audit_attribution import NEUTRALIZE_COOLDOWN_SECONDS
+
+logger = logging.getLogger("DataBit.AntiRaidJournal")
+
+JOURNAL_DB = "antiraid_journal.db"
+PARTITION_PATTERN = re.compile(r"^events_(\d{6})$")
+
+# Tipo de evento -> (limite da configuração, janela em segundos)
+THRESHOLD_KINDS = {
+    "message": ("max_messages_per_minute", 60),
+    "channel_create": ("max_channel_changes_per_hour", 3600),
+    "channel_delete": ("max_channel_changes_per_hour", 3600),
+    "ban": ("max_bans_per_hour", 3600),
+    "role_create": ("max_role_changes_per_hour", 3600),
+    "role_delete": ("max_role_changes_per_hour", 3600),
+    "invite": ("max_invites_per_hour", 3600),
+}
+FLOOD_TIMEOUT_SECONDS = 600  # Usuário silenciado não gera novas detecções de flood
+
+
+def partition_for(ts: float) -> str:
+    return "events_" + datetime.fromtimestamp(ts, timezone.utc).strftime("%Y%m")
+
+
+def partition_bounds(ts: float) -> tuple:
+    """Retorna (nome, início, fim) da partição mensal que contém ts."""
+    moment = datetime.fromtimestamp(ts, timezone.utc)
+    start = datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+    end = datetime(moment.year + moment.month // 12, moment.month % 12 + 1, 1, tzinfo=timezone.utc)
+    return "events_" + start.strftime("%Y%m"), start.timestamp(), end.timestamp()
+
+
+class EventJournal:
+    """Acumula eventos em memória e os grava em lotes em tabelas SQLite particionadas por mês."""
+
+    def __init__(self, db_path: str = JOURNAL_DB, max_buffer: int = 50000):
+        self.db_path = db_path
+        self.max_buffer = max_buffer
+        self._buffer: List[tuple] = []
+        self._lock = threading.Lock()
+        self._partitions = set()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+    def append(self, kind: str, guild_id, user_id=None, target_id=None, detail: Optional[str] = None, ts: Optional[float] = None):
+        """Registra um evento no buffer (sem I/O)."""
+        if len(self._buffer) >= self.max_buffer:
+            return  # Protege a memória se o disco estiver travado; o evento é descartado
+        self._buffer.append((
+            ts or time.time(),
+            int(guild_id),
+            int(user_id) if user_id is not None else None,
+            kind,
+            int(target_id) if target_id is not None else None,
+            detail
+        ))
+
+    def _ensure_partition(self, name: str):
+        if name in self._partitions:
+            return
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {name} (
+                ts REAL NOT NULL,
+                guild_id INTEGER NOT NULL,
+                user_id INTEGER,
+                kind TEXT NOT NULL,
+                target_id INTEGER,
+                detail TEXT
+            )
+        """)
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{name}_guild_ts ON {name} (guild_id, ts)")
+        self._partitions.add(name)
+
+    def _write(self, batch: List[tuple]):
+        grouped = defaultdict(list)
+        name, start, end = None, 0.0, -1.0
+        for event in batch:
+            if not start <= event[0] < end:
+                name, start, end = partition_bounds(event[0])
+            grouped[name].append(event)
+        with self._lock, self._conn:
+            for name, events in grouped.items():
+                self._ensure_partition(name)
+                self._conn.executemany(f"INSERT INTO {name} VALUES (?, ?, ?, ?, ?, ?)", events)
+
+    async def flush(self):
+        """Grava o buffer atual em uma única transação, fora do event loop."""
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        try:
+            await asyncio.to_thread(self._write, batch)
+        except Exception as e:
+            logger.error(f"Erro ao gravar {len(batch)} eventos no diário anti-raid: {e}")
+
+    def flush_sync(self):
+        batch, self._buffer = self._buffer, []
+        if batch:
+            self._write(batch)
+
+    def prune(self, keep_months: int):
+        """Remove partições inteiras mais antigas que keep_months (sem DELETE linha a linha)."""
+        now = datetime.now(timezone.utc)
+        oldest = (now.year * 12 + now.month - 1) - keep_months
+        with self._lock, self._conn:
+            for name in list_partitions(self._conn):
+                stamp = int(PARTITION_PATTERN.match(name).group(1))
+                if (stamp // 100) * 12 + (stamp % 100) - 1 < oldest:
+                    self._conn.execute(f"DROP TABLE {name}")
+                    self._partitions.discard(name)
+                    logger.info(f"Partição {name} do diário anti-raid removida")
+
+    def close(self):
+        self.flush_sync()
+        self._conn.close()
+
+
+def list_partitions(conn: sqlite3.Connection) -> List[str]:
+    rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'events_%'").fetchall()
+    return sorted(name for (name,) in rows if PARTITION_PATTERN.match(name))
+
+
+def load_events(db_path: str, guild_id: int, start: Optional[float] = None, end: Optional[float] = None) -> List[tuple]:
+    """Lê (ts, user_id, kind) de um servidor em ordem cronológica, pulando partições fora do intervalo."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        events = []
+        start_part = partition_for(start) if start else None
+        end_part = partition_for(end) if end else None
+        for name in list_partitions(conn):
+            if (start_part and name < start_part) or (end_part and name > end_part):
+                continue
+            events.extend(conn.execute(
+                f"SELECT ts, user_id, kind FROM {name} WHERE guild_id = ? AND ts >= ? AND ts <= ? AND detail IS NOT 'trusted' AND kind IN ({','.join('?' * len(THRESHOLD_KINDS))}) ORDER BY ts",
+                (guild_id, start or 0, end or float("inf"), *THRESHOLD_KINDS)
+            ).fetchall())
+        return events
+    finally:
+        conn.close()
+
+
+def replay(events: Iterable[tuple], kinds: Iterable[str], limit: int, window: int, lockdown_seconds: int = 1800) -> Dict[str, int]:
+    """Reexecuta as regras de detecção do AntiRaidCog para um tipo de evento com um limite candidato.
+
+    Mensagens contam por usuário; eventos atribuídos (com user_id) contam por executor e tipo e
+    neutralizam o executor; eventos sem executor contam por tipo no servidor e disparam lockdown,
+    que vale para o servidor inteiro (durante ele, os eventos seguem contando, mas não há outro).
+    """
+    kinds = set(kinds)
+    windows = defaultdict(deque)
+    suppressed_until: Dict = {}
+    result = {"detections": 0, "executors_neutralized": 0, "lockdowns": 0}
+    for ts, user_id, kind in events:
+        if kind not in kinds:
+            continue
+        if kind == "message":
+            key = suppress_key = user_id
+        elif kind == "invite":
+            key = suppress_key = "invites"
+        elif user_id is not None:
+            key, suppress_key = ("executor", user_id, kind), ("executor", user_id)
+        else:
+            key, suppress_key = (kind, "guild"), "lockdown"
+        if suppress_key != "lockdown" and suppressed_until.get(suppress_key, 0) > ts:
+            continue
+        timestamps = windows[key]
+        timestamps.append(ts)
+        while ts - timestamps[0] > window:
+            timestamps.popleft()
+        if len(timestamps) <= limit:
+            continue
+        if suppress_key == "lockdown":
+            if suppressed_until.get("lockdown", 0) > ts:
+                continue  # activate_lockdown ignora servidores já em lockdown
+            result["detections"] += 1
+            result["lockdowns"] += 1
+            suppressed_until["lockdown"] = ts + lockdown_seconds
+            continue
+        result["detections"] += 1
+        if kind == "message":
+            suppressed_until[key] = ts + FLOOD_TIMEOUT_SECONDS
+            timestamps.clear()
+        elif kind == "invite":
+            continue  # O convite excedente é apagado; não há lockdown
+        else:
+            result["executors_neutralized"] += 1
+            suppressed_until[suppress_key] = ts + NEUTRALIZE_COOLDOWN_SECONDS
+            for other in [k for k in windows if isinstance(k, tuple) and k[:2] == suppress_key]:
+                windows[other].clear()  # attributor.forget zera as taxas do executor
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay do diário anti-raid com limites candidatos.")
+    parser.add_argument("--db", default=JOURNAL_DB)
+    parser.add_argument("--guild", type=int, required=True)
+    parser.add_argument("--start", help="Data inicial (AAAA-MM-DD)")
+    parser.add_argument("--end", help="Data final (AAAA-MM-DD)")
+    parser.add_argument("--lockdown-duration-minutes", type=int, default=30)
+    options = sorted({name for name, _ in THRESHOLD_KINDS.values()})
+    for option in options:
+        parser.add_argument("--" + option.replace("_", "-"), type=int, nargs="+", dest=option)
+    args = parser.parse_args(argv)
+
+    start = datetime.fromisoformat(args.start).replace(tzinfo=timezone.utc).timestamp() if args.start else None
+    end = datetime.fromisoformat(args.end).replace(tzinfo=timezone.utc).timestamp() + 86399 if args.end else None
+    began = time.perf_counter()
+    events = load_events(args.db, args.guild, start, end)
+    print(f"{len(events)} eventos carregados em {time.perf_counter() - began:.2f}s")
+
+    for option in options:
+        candidates = getattr(args, option)
+        if not candidates:
+            continue
+        kinds = [kind for kind, (name, _) in THRESHOLD_KINDS.items() if name == option]
+        window = THRESHOLD_KINDS[kinds[0]][1]
+        for limit in candidates:
+            began = time.perf_counter()
+            result = replay(events, kinds, limit, window, args.lockdown_duration_minutes * 60)
+            print(
+                f"{option}={limit}: {result['detections']} detecções, {result['lockdowns']} lockdowns, "
+                f"{result['executors_neutralized']} executores neutralizados ({time.perf_counter() - began:.2f}s)"
+            )
+
+
+if __name__ == "__main__":
+    main()
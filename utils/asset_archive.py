@@ -0,0 +1,198 @@
+# utils/asset_archive.py
+# Description: Arquivo endereçado por conteúdo (SHA-256) para anexos e avatares das transcrições, com downloads paralelos limitados e deduplicação entre tickets
+# Date of Creation: 19/10/2026
+# Created by: CodeProjects
+# Version: 1.0
+# Developer Of Version: CodeProjects - Serviços Escaláveis para seu Game
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import uuid
+from typing import AsyncIterable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from utils.database import get_database
+
+logger = logging.getLogger("DataBit.AssetArchive")
+
+ASSETS_DIR = os.path.join("transcripts", "assets")
+MAX_ASSET_BYTES = 25 * 1024 * 1024  # Arquivos maiores continuam apontando para o CDN do Discord
+CHUNK_SIZE = 64 * 1024
+EXTENSION_PATTERN = re.compile(r"\.([A-Za-z0-9]{1,8})$")
+
+
+def asset_key(url: str) -> str:
+    """Chave estável de uma URL do Discord: os parâmetros de assinatura (ex, is, hm, size) mudam a cada envio."""
+    parts = urlsplit(url)
+    return f"{parts.netloc}{parts.path}"
+
+
+def new_stats() -> dict:
+    return {"downloaded": 0, "reused": 0, "failed": 0, "bytes_downloaded": 0, "bytes_stored": 0, "bytes_saved": 0}
+
+
+class AssetArchive:
+    """Baixa anexos e avatares uma única vez e os guarda como <sha256>.<ext>.
+
+    O índice url -> hash fica no SQLite, então um avatar ou anexo repetido em outro ticket não é
+    baixado de novo; conteúdos iguais vindos de URLs diferentes ocupam um único arquivo.
+    """
+
+    def __init__(self, db_path: str, root: str = ASSETS_DIR, concurrency: int = 8, max_bytes: int = MAX_ASSET_BYTES):
+        self.db_path = db_path
+        self.db = get_database(db_path)
+        self.root = root
+        self.max_bytes = max_bytes
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        os.makedirs(root, exist_ok=True)
+        with self.db.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS transcript_assets (
+                    url_key TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    size INTEGER NOT NULL
+                )
+            """)
+
+    def _lookup(self, keys: List[str]) -> Dict[str, tuple]:
+        with self.db.connection() as conn:
+            rows = conn.execute(
+                f"SELECT url_key, name, size FROM transcript_assets WHERE url_key IN ({','.join('?' * len(keys))})",
+                keys
+            ).fetchall()
+        return {key: (name, size) for key, name, size in rows}
+
+    def _remember(self, key: str, name: str, size: int):
+        with self.db.connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO transcript_assets (url_key, name, size) VALUES (?, ?, ?)", (key, name, size))
+
+    async def _download(self, url: str, stats: dict) -> Optional[str]:
+        """Baixa a URL calculando o hash em streaming; retorna o nome do arquivo arquivado."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=120))
+        match = EXTENSION_PATTERN.search(urlsplit(url).path)
+        extension = match.group(1).lower() if match else "bin"
+        tmp_path = os.path.join(self.root, f".{uuid.uuid4().hex}.part")
+        digest = hashlib.sha256()
+        size = 0
+        moved = False
+        try:
+            async with self._semaphore:
+                async with self._session.get(url) as response:
+                    if response.status != 200:
+                        logger.warning(f"Falha ao arquivar {url}: HTTP {response.status}")
+                        return None
+                    if (response.content_length or 0) > self.max_bytes:
+                        return None
+                    f = await asyncio.to_thread(open, tmp_path, "wb")
+                    try:
+                        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                            size += len(chunk)
+                            if size > self.max_bytes:
+                                return None
+                            digest.update(chunk)
+                            await asyncio.to_thread(f.write, chunk)
+                    finally:
+                        await asyncio.to_thread(f.close)
+            name = f"{digest.hexdigest()}.{extension}"
+            path = os.path.join(self.root, name)
+            stats["bytes_downloaded"] += size
+            if os.path.exists(path):
+                stats["bytes_saved"] += size  # Mesmo conteúdo já arquivado a partir de outra URL
+            else:
+                await asyncio.to_thread(os.replace, tmp_path, path)
+                moved = True
+                stats["bytes_stored"] += size
+        finally:
+            # Acima do limite, duplicado ou download interrompido (timeout, conexão caída): o .part não fica para trás
+            if not moved and os.path.exists(tmp_path):
+                await asyncio.to_thread(os.remove, tmp_path)
+        await asyncio.to_thread(self._remember, asset_key(url), name, size)
+        return name
+
+    async def _archive_one(self, url: str, stats: dict) -> Optional[str]:
+        key = asset_key(url)
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._download(url, stats))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        try:
+            return await asyncio.shield(future)
+        except Exception as e:
+            logger.error(f"Erro ao arquivar {url}: {e}")
+            return None
+
+    async def archive(self, urls: List[str], stats: dict) -> Dict[str, str]:
+        """Garante que as URLs estejam arquivadas e retorna url -> nome do arquivo local."""
+        unique = {url: asset_key(url) for url in dict.fromkeys(urls)}
+        known = await asyncio.to_thread(self._lookup, list(set(unique.values()))) if unique else {}
+        names: Dict[str, str] = {}
+        missing = []
+        for url, key in unique.items():
+            if key in known and os.path.exists(os.path.join(self.root, known[key][0])):
+                names[url] = known[key][0]
+                stats["reused"] += 1
+                stats["bytes_saved"] += known[key][1]
+            else:
+                missing.append(url)
+        results = await asyncio.gather(*(self._archive_one(url, stats) for url in missing))
+        for url, name in zip(missing, results):
+            if name:
+                names[url] = name
+                stats["downloaded"] += 1
+            else:
+                stats["failed"] += 1
+        return names
+
+    async def rewrite_records(self, records: AsyncIterable[dict], base_url: str, stats: dict, page_size: int = 100):
+        """Repassa os registros trocando avatares e anexos por links do servidor de transcrições.
+
+        Os registros são processados em páginas: as URLs de cada página são baixadas em paralelo
+        antes de a página seguir para a renderização. URLs que falharem mantêm o link original.
+        """
+        resolved: Dict[str, str] = {}
+        attempted = set()
+        page: List[dict] = []
+
+        async def flush():
+            urls = []
+            for record in page:
+                if record["author_avatar"]:
+                    urls.append(record["author_avatar"])
+                urls.extend(a["url"] for a in record["attachments"])
+            pending = [url for url in dict.fromkeys(urls) if url not in attempted]
+            attempted.update(pending)
+            if pending:
+                resolved.update(await self.archive(pending, stats))
+            for record in page:
+                avatar = record["author_avatar"]
+                if avatar in resolved:
+                    record["author_avatar"] = f"{base_url}/{resolved[avatar]}"
+                for attachment in record["attachments"]:
+                    if attachment["url"] in resolved:
+                        attachment["filename"] = attachment.get("filename") or os.path.basename(urlsplit(attachment["url"]).path)
+                        attachment["url"] = f"{base_url}/{resolved[attachment['url']]}"
+
+        async for record in records:
+            page.append(record)
+            if len(page) >= page_size:
+                await flush()
+                for item in page:
+                    yield item
+                page = []
+        if page:
+            await flush()
+            for item in page:
+                yield item
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
@@ -0,0 +1,97 @@
+# utils/audit_attribution.py
+# Description: Atribuição de eventos destrutivos ao executor via audit log, com buscas agrupadas e cache curto
+# Date of Creation: 19/10/2026
+# Created by: CodeProjects
+# Version: 1.0
+# Developer Of Version: CodeProjects - Serviços Escaláveis para seu Game
+
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+from typing import Dict, Optional, Tuple
+
+import nextcord
+
+logger = logging.getLogger("DataBit.AuditAttribution")
+
+CACHE_TTL = 10  # Segundos em que uma busca de audit log é reaproveitada
+MIN_FETCH_INTERVAL = 1.0  # Intervalo mínimo entre buscas para o mesmo servidor e ação
+FETCH_LIMIT = 50  # Entradas lidas por busca
+MAX_ENTRY_AGE = 60  # Entradas mais antigas que isso não são atribuídas a eventos atuais
+LOOKUP_RETRIES = 2  # O audit log pode chegar alguns instantes depois do evento do gateway
+NEUTRALIZE_COOLDOWN_SECONDS = 600  # Executor neutralizado não é neutralizado de novo nesse intervalo
+
+
+class AuditLogAttributor:
+    """Descobre quem executou uma ação destrutiva sem multiplicar as chamadas a guild.audit_logs.
+
+    Consultas simultâneas para o mesmo (servidor, ação) compartilham uma única busca, o resultado
+    fica em cache por alguns segundos e as taxas por executor são mantidas em janelas deslizantes.
+    """
+
+    def __init__(self):
+        self._cache: Dict[Tuple[int, nextcord.AuditLogAction], Tuple[float, dict]] = {}
+        self._inflight: Dict[Tuple[int, nextcord.AuditLogAction], asyncio.Future] = {}
+        self._last_fetch: Dict[Tuple[int, nextcord.AuditLogAction], float] = {}
+        self._executor_events = defaultdict(deque)
+        self.fetch_count = 0
+
+    async def _fetch(self, guild: nextcord.Guild, action: nextcord.AuditLogAction) -> dict:
+        key = (guild.id, action)
+        wait = self._last_fetch.get(key, 0) + MIN_FETCH_INTERVAL - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        self._last_fetch[key] = time.monotonic()
+        self.fetch_count += 1
+        entries = {}
+        cutoff = nextcord.utils.utcnow().timestamp() - MAX_ENTRY_AGE
+        async for entry in guild.audit_logs(limit=FETCH_LIMIT, action=action):
+            if entry.created_at.timestamp() < cutoff:
+                break
+            target_id = getattr(entry.target, "id", None)
+            if target_id is not None and target_id not in entries:
+                entries[target_id] = entry.user
+        self._cache[key] = (time.monotonic(), entries)
+        return entries
+
+    async def _entries(self, guild: nextcord.Guild, action: nextcord.AuditLogAction, refresh: bool) -> dict:
+        key = (guild.id, action)
+        cached = self._cache.get(key)
+        if not refresh and cached and time.monotonic() - cached[0] <= CACHE_TTL:
+            return cached[1]
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(guild, action))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def attribute(self, guild: nextcord.Guild, action: nextcord.AuditLogAction, target_id: int) -> Optional[nextcord.abc.User]:
+        """Retorna o usuário que executou a ação sobre target_id, ou None se não for possível atribuir."""
+        try:
+            entries = await self._entries(guild, action, refresh=False)
+            for _ in range(LOOKUP_RETRIES):
+                if target_id in entries:
+                    break
+                entries = await self._entries(guild, action, refresh=True)
+            return entries.get(target_id)
+        except nextcord.Forbidden:
+            logger.warning(f"Sem permissão para ler o audit log de {guild.id}")
+        except Exception as e:
+            logger.error(f"Erro ao consultar audit log de {guild.id} ({action}): {e}")
+        return None
+
+    def record(self, guild_id: int, executor_id: int, kind: str, window: int = 3600) -> int:
+        """Registra uma ação do executor e retorna quantas ele fez dentro da janela."""
+        now = time.monotonic()
+        events = self._executor_events[(guild_id, executor_id, kind)]
+        events.append(now)
+        while events and now - events[0] > window:
+            events.popleft()
+        return len(events)
+
+    def forget(self, guild_id: int, executor_id: int):
+        """Zera as taxas de um executor (por exemplo, depois de neutralizado)."""
+        for key in [k for k in self._executor_events if k[0] == guild_id and k[1] == executor_id]:
+            del self._executor_events[key]
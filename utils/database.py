@@ -0,0 +1,158 @@
+# utils/database.py
+# Description: Conexões SQLite persistentes em modo WAL (uma por thread), com cache de statements e fachada assíncrona
+# Date of Creation: 19/10/2026
+# Created by: CodeProjects
+# Version: 1.0
+# Developer Of Version: CodeProjects - Serviços Escaláveis para seu Game
+#
+# Micro-benchmark (conexão por chamada x conexão persistente):
+#   python -m utils.database --operations 20000
+
+import argparse
+import asyncio
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("DataBit.Database")
+
+CACHED_STATEMENTS = 256  # Statements preparados mantidos por conexão
+BUSY_TIMEOUT_MS = 5000
+
+_databases: Dict[str, "Database"] = {}
+_databases_lock = threading.Lock()
+
+
+class Database:
+    """Mantém uma conexão aberta por thread para o mesmo arquivo SQLite.
+
+    connection() devolve a conexão da thread atual; usada como `with db.connection() as conn:`
+    ela abre e confirma (ou desfaz) uma transação sem fechar a conexão, então os statements
+    preparados continuam em cache entre as chamadas. Os métodos assíncronos rodam a consulta
+    em uma thread, fora do event loop.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connections: Dict[int, Tuple[threading.Thread, sqlite3.Connection]] = {}
+        self._lock = threading.Lock()
+
+    def connection(self) -> sqlite3.Connection:
+        thread = threading.current_thread()
+        entry = self._connections.get(thread.ident)
+        if entry and entry[0] is thread:
+            return entry[1]
+        conn = sqlite3.connect(self.path, cached_statements=CACHED_STATEMENTS, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        with self._lock:
+            self._prune()
+            self._connections[thread.ident] = (thread, conn)
+        return conn
+
+    def _prune(self):
+        """Fecha as conexões de threads que já terminaram (ex.: threads por requisição do Flask)."""
+        for ident, (thread, conn) in list(self._connections.items()):
+            if not thread.is_alive():
+                conn.close()
+                del self._connections[ident]
+
+    def execute(self, sql: str, params=()) -> int:
+        with self.connection() as conn:
+            return conn.execute(sql, params).rowcount
+
+    def executemany(self, sql: str, rows) -> int:
+        with self.connection() as conn:
+            return conn.executemany(sql, rows).rowcount
+
+    def fetchone(self, sql: str, params=()) -> Optional[tuple]:
+        return self.connection().execute(sql, params).fetchone()
+
+    def fetchall(self, sql: str, params=()) -> List[tuple]:
+        return self.connection().execute(sql, params).fetchall()
+
+    async def execute_async(self, sql: str, params=()) -> int:
+        return await asyncio.to_thread(self.execute, sql, params)
+
+    async def executemany_async(self, sql: str, rows) -> int:
+        return await asyncio.to_thread(self.executemany, sql, rows)
+
+    async def fetchone_async(self, sql: str, params=()) -> Optional[tuple]:
+        return await asyncio.to_thread(self.fetchone, sql, params)
+
+    async def fetchall_async(self, sql: str, params=()) -> List[tuple]:
+        return await asyncio.to_thread(self.fetchall, sql, params)
+
+    def close(self):
+        with self._lock:
+            for _, conn in self._connections.values():
+                try:
+                    conn.close()
+                except Exception as e:
+                    logger.error(f"Erro ao fechar conexão com {self.path}: {e}")
+            self._connections.clear()
+
+
+def get_database(path: str) -> Database:
+    """Retorna o gerenciador compartilhado do arquivo (um por caminho no processo)."""
+    key = os.path.abspath(path)
+    with _databases_lock:
+        if key not in _databases:
+            _databases[key] = Database(path)
+        return _databases[key]
+
+
+def benchmark(operations: int) -> Dict[str, float]:
+    """Compara leituras e escritas pontuais abrindo uma conexão por chamada e usando o Database."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        with sqlite3.connect(path) as conn:
+            conn.execute("CREATE TABLE tickets (ticket_id TEXT PRIMARY KEY, last_activity TEXT, data TEXT)")
+            conn.executemany("INSERT INTO tickets VALUES (?, ?, ?)", [(str(i), "2026-01-01", "{}") for i in range(1000)])
+        conn.close()
+
+        started = time.perf_counter()
+        for i in range(operations):
+            with sqlite3.connect(path) as conn:
+                conn.execute("SELECT data FROM tickets WHERE ticket_id = ?", (str(i % 1000),)).fetchone()
+            conn.close()
+        results["leitura, conexão por chamada"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for i in range(operations // 10):
+            with sqlite3.connect(path) as conn:
+                conn.execute("UPDATE tickets SET last_activity = ? WHERE ticket_id = ?", (str(i), str(i % 1000)))
+            conn.close()
+        results["escrita, conexão por chamada"] = (time.perf_counter() - started) * 10
+
+        db = Database(path)
+        started = time.perf_counter()
+        for i in range(operations):
+            db.fetchone("SELECT data FROM tickets WHERE ticket_id = ?", (str(i % 1000),))
+        results["leitura, Database (WAL)"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for i in range(operations // 10):
+            db.execute("UPDATE tickets SET last_activity = ? WHERE ticket_id = ?", (str(i), str(i % 1000)))
+        results["escrita, Database (WAL)"] = (time.perf_counter() - started) * 10
+        db.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmark do acesso ao SQLite dos tickets.")
+    parser.add_argument("--operations", type=int, default=20000)
+    args = parser.parse_args(argv)
+    for name, elapsed in benchmark(args.operations).items():
+        print(f"{name}: {args.operations / elapsed:,.0f} ops/s ({elapsed / args.operations * 1e6:.1f} µs/op)")
+
+
+if __name__ == "__main__":
+    main()
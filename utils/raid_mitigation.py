@@ -0,0 +1,158 @@
+# utils/raid_mitigation.py
+# Description: Motor de mitigação de raids com bans/kicks/timeouts e limpeza de mensagens em paralelo sob um orçamento de API
+# Date of Creation: 19/10/2026
+# Created by: CodeProjects
+# Version: 1.0
+# Developer Of Version: CodeProjects - Serviços Escaláveis para seu Game
+
+import asyncio
+import logging
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Iterable, Optional
+
+import nextcord
+
+from utils.rate_limit import ApiBudget
+
+logger = logging.getLogger("DataBit.RaidMitigation")
+
+CLEANUP_ACTIONS = ("ban", "kick", "timeout")
+PROGRESS_INTERVAL = 2  # Segundos entre relatórios de progresso
+DEFAULT_PURGE_WINDOW = timedelta(minutes=10)
+HISTORY_PAGE = 100  # Mensagens por requisição de histórico (máximo da API) e por exclusão em massa
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)  # Mais antigas que isso não entram na exclusão em massa
+
+
+def parse_since(value: str, tz) -> Optional[datetime]:
+    """Converte '30m', '2h', '1d' ou 'HH:MM' (hoje) em um datetime no fuso informado."""
+    value = value.strip().lower()
+    now = datetime.now(tz)
+    match = re.fullmatch(r"(\d+)\s*([smhd])", value)
+    if match:
+        amount, unit = int(match.group(1)), match.group(2)
+        seconds = {"s": 1, "m": 60, "h": 3600, "d": 86400}[unit] * amount
+        return now - timedelta(seconds=seconds)
+    match = re.fullmatch(r"(\d{1,2}):(\d{2})", value)
+    if match:
+        since = now.replace(hour=int(match.group(1)), minute=int(match.group(2)), second=0, microsecond=0)
+        if since > now:
+            since -= timedelta(days=1)
+        return since
+    return None
+
+
+class RaidMitigationEngine:
+    """Executa ações de limpeza pós-raid em paralelo, respeitando um orçamento compartilhado de API."""
+
+    def __init__(self, budget: Optional[ApiBudget] = None):
+        self.budget = budget or ApiBudget()
+
+    async def _punish(self, guild: nextcord.Guild, user_id: int, action: str, reason: str, report: dict):
+        try:
+            async with self.budget.slot():
+                if action == "ban":
+                    await guild.ban(nextcord.Object(id=user_id), reason=reason, delete_message_seconds=0)
+                elif action == "kick":
+                    await guild.kick(nextcord.Object(id=user_id), reason=reason)
+                else:
+                    member = guild.get_member(user_id)
+                    if not member:
+                        raise LookupError("membro não está no servidor")
+                    await member.timeout(timedelta(minutes=10), reason=reason)
+            report["succeeded"].append(user_id)
+        except Exception as e:
+            report["failed"].append(user_id)
+            logger.warning(f"Falha ao aplicar {action} em {user_id} no servidor {guild.id}: {e}")
+
+    async def _purge(self, channel: nextcord.TextChannel, user_ids: set, after: datetime, reason: str, report: dict):
+        """Limpa as mensagens dos usuários no canal página por página, com um slot do orçamento por requisição."""
+        try:
+            before = None
+            while True:
+                async with self.budget.slot():
+                    page = [
+                        m async for m in channel.history(limit=HISTORY_PAGE, before=before, after=after, oldest_first=False)
+                    ]
+                if not page:
+                    break
+                before = page[-1]
+                targets = [m for m in page if m.author.id in user_ids]
+                cutoff = nextcord.utils.utcnow() - BULK_DELETE_MAX_AGE
+                recent = [m for m in targets if m.created_at > cutoff]
+                if recent:
+                    async with self.budget.slot():
+                        await channel.delete_messages(recent, reason=reason)
+                    report["messages_deleted"] += len(recent)
+                for message in targets:
+                    if message.created_at > cutoff:
+                        continue
+                    async with self.budget.slot():
+                        await message.delete()
+                    report["messages_deleted"] += 1
+                if len(page) < HISTORY_PAGE:
+                    break
+            report["channels_done"] += 1
+        except Exception as e:
+            report["channels_failed"] += 1
+            logger.warning(f"Falha ao limpar mensagens em {channel.id} no servidor {channel.guild.id}: {e}")
+
+    async def cleanup(
+        self,
+        guild: nextcord.Guild,
+        user_ids: Iterable[int],
+        action: str,
+        reason: str,
+        since: Optional[datetime] = None,
+        progress: Optional[Callable[[dict], Awaitable[None]]] = None
+    ) -> dict:
+        """Aplica a ação a todos os usuários e limpa suas mensagens em todos os canais de texto ao mesmo tempo."""
+        if action not in CLEANUP_ACTIONS:
+            raise ValueError(f"Ação de limpeza inválida: {action}")
+        user_ids = set(user_ids)
+        after = since or (nextcord.utils.utcnow() - DEFAULT_PURGE_WINDOW)
+        me = guild.me
+        channels = [
+            c for c in guild.text_channels
+            if c.permissions_for(me).manage_messages and c.permissions_for(me).read_message_history
+        ]
+        report = {
+            "action": action,
+            "requested": len(user_ids),
+            "succeeded": [],
+            "failed": [],
+            "messages_deleted": 0,
+            "channels_total": len(channels),
+            "channels_done": 0,
+            "channels_failed": 0,
+            "duration": 0.0
+        }
+        started = time.monotonic()
+
+        tasks = [asyncio.create_task(self._punish(guild, uid, action, reason, report)) for uid in user_ids]
+        tasks += [asyncio.create_task(self._purge(c, user_ids, after, reason, report)) for c in channels]
+
+        reporter = None
+        if progress:
+            async def report_progress():
+                while True:
+                    await asyncio.sleep(PROGRESS_INTERVAL)
+                    report["duration"] = time.monotonic() - started
+                    try:
+                        await progress(report)
+                    except Exception as e:
+                        logger.warning(f"Erro ao reportar progresso da limpeza em {guild.id}: {e}")
+            reporter = asyncio.create_task(report_progress())
+
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            if reporter:
+                reporter.cancel()
+        report["duration"] = time.monotonic() - started
+        logger.info(
+            f"Limpeza anti-raid em {guild.id}: {action} {len(report['succeeded'])}/{report['requested']} contas, "
+            f"{report['messages_deleted']} mensagens em {report['channels_done']} canais ({report['duration']:.1f}s)"
+        )
+        return report
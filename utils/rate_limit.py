@@ -0,0 +1,44 @@
+# utils/rate_limit.py
+# Description: Orçamento compartilhado de chamadas à API do Discord (token bucket + limite de concorrência)
+# Date of Creation: 19/10/2026
+# Created by: CodeProjects
+# Version: 1.0
+# Developer Of Version: CodeProjects - Serviços Escaláveis para seu Game
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+
+class ApiBudget:
+    """Limita a taxa (req/s) e a concorrência de chamadas à API compartilhadas por várias tarefas."""
+
+    def __init__(self, rate: float = 40.0, burst: int = 40, concurrency: int = 10):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Aguarda até haver um token disponível no orçamento."""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Reserva uma vaga de concorrência e um token antes de executar a chamada."""
+        async with self._semaphore:
+            await self.acquire()
+            yield
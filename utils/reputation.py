@@ -0,0 +1,160 @@
+# utils/reputation.py
+# Description: Índice de reputação de raiders entre servidores com Bloom filter e count-min sketch por gerações (memória constante)
+# Date of Creation: 19/10/2026
+# Created by: CodeProjects
+# Version: 1.0
+# Developer Of Version: CodeProjects - Serviços Escaláveis para seu Game
+
+import hashlib
+import json
+import logging
+import math
+import os
+import struct
+import threading
+import time
+from typing import List
+
+logger = logging.getLogger("DataBit.Reputation")
+
+REPUTATION_FILE = os.path.join("data", "raider_reputation.bin")
+FILE_MAGIC = b"DBREP1\n"
+
+
+class _Generation:
+    """Um Bloom filter e um count-min sketch cobrindo uma fatia de tempo."""
+
+    def __init__(self, bloom_bits: int, sketch_width: int, sketch_depth: int, started_at: float):
+        self.started_at = started_at
+        self.bloom = bytearray(bloom_bits // 8)
+        self.sketch = bytearray(sketch_width * sketch_depth)
+
+
+class RaiderReputation:
+    """Conjunto aproximado de contas punidas pelo anti-raid, compartilhado entre servidores.
+
+    Consultas e inserções são O(k) com k fixo; a memória depende só da capacidade configurada,
+    não do número de IDs inseridos. O decaimento descarta a geração mais antiga a cada
+    decay_days / generations dias, então uma conta expira entre decay_days*(g-1)/g e decay_days.
+    """
+
+    def __init__(self, capacity: int = 2_000_000, error_rate: float = 0.001, decay_days: float = 30,
+                 generations: int = 4, sketch_width: int = 1 << 18, sketch_depth: int = 4, path: str = REPUTATION_FILE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.generations_count = generations
+        self.rotation_seconds = decay_days * 86400 / generations
+        bits = int(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.bloom_bits = (bits + 7) // 8 * 8
+        self.hash_count = max(1, round(self.bloom_bits / capacity * math.log(2)))
+        self.sketch_width = sketch_width
+        self.sketch_depth = sketch_depth
+        self.path = path
+        self.dirty = False
+        self._lock = threading.Lock()
+        self.generations: List[_Generation] = [self._new_generation(time.time())]
+
+    def _new_generation(self, started_at: float) -> _Generation:
+        return _Generation(self.bloom_bits, self.sketch_width, self.sketch_depth, started_at)
+
+    @staticmethod
+    def _hashes(user_id: int):
+        digest = hashlib.blake2b(struct.pack(">Q", int(user_id)), digest_size=16).digest()
+        return struct.unpack(">QQ", digest)
+
+    def _bloom_positions(self, user_id: int):
+        h1, h2 = self._hashes(user_id)
+        return [(h1 + i * h2) % self.bloom_bits for i in range(self.hash_count)]
+
+    def _sketch_positions(self, user_id: int):
+        h1, h2 = self._hashes(user_id)
+        width = self.sketch_width
+        return [row * width + (h2 + row * h1) % width for row in range(self.sketch_depth)]
+
+    def rotate(self, now: float = None):
+        """Abre uma nova geração quando a atual venceu e descarta as que passaram do decaimento."""
+        now = now or time.time()
+        with self._lock:
+            if now - self.generations[-1].started_at < self.rotation_seconds:
+                return
+            self.generations.append(self._new_generation(now))
+            del self.generations[:-self.generations_count]
+            self.dirty = True
+        logger.info(f"Reputação rotacionada: {len(self.generations)} gerações ativas")
+
+    def add(self, user_id: int):
+        """Marca a conta como punida pelo anti-raid."""
+        bloom_positions = self._bloom_positions(user_id)
+        sketch_positions = self._sketch_positions(user_id)
+        with self._lock:
+            current = self.generations[-1]
+            for pos in bloom_positions:
+                current.bloom[pos >> 3] |= 1 << (pos & 7)
+            for pos in sketch_positions:
+                if current.sketch[pos] < 255:
+                    current.sketch[pos] += 1
+            self.dirty = True
+
+    def contains(self, user_id: int) -> bool:
+        positions = self._bloom_positions(user_id)
+        return any(
+            all(gen.bloom[pos >> 3] & (1 << (pos & 7)) for pos in positions)
+            for gen in self.generations
+        )
+
+    def count(self, user_id: int) -> int:
+        """Estimativa (por cima) de quantas punições a conta recebeu dentro do período de decaimento."""
+        if not self.contains(user_id):
+            return 0
+        positions = self._sketch_positions(user_id)
+        return sum(min(gen.sketch[pos] for pos in positions) for gen in self.generations)
+
+    def memory_bytes(self) -> int:
+        return sum(len(gen.bloom) + len(gen.sketch) for gen in self.generations)
+
+    def save(self):
+        """Grava o índice de forma atômica (arquivo temporário + rename)."""
+        with self._lock:
+            header = json.dumps({
+                "bloom_bits": self.bloom_bits,
+                "hash_count": self.hash_count,
+                "sketch_width": self.sketch_width,
+                "sketch_depth": self.sketch_depth,
+                "generations": [gen.started_at for gen in self.generations]
+            }).encode("utf-8")
+            payload = [bytes(gen.bloom) + bytes(gen.sketch) for gen in self.generations]
+            self.dirty = False
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(FILE_MAGIC)
+            f.write(struct.pack(">I", len(header)))
+            f.write(header)
+            for chunk in payload:
+                f.write(chunk)
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        """Carrega o índice do disco; mantém um índice vazio se o arquivo não existir ou for incompatível."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "rb") as f:
+                if f.read(len(FILE_MAGIC)) != FILE_MAGIC:
+                    raise ValueError("formato desconhecido")
+                (header_len,) = struct.unpack(">I", f.read(4))
+                header = json.loads(f.read(header_len))
+                if (header["bloom_bits"], header["hash_count"], header["sketch_width"], header["sketch_depth"]) != \
+                        (self.bloom_bits, self.hash_count, self.sketch_width, self.sketch_depth):
+                    raise ValueError("parâmetros diferentes da configuração atual")
+                generations = []
+                for started_at in header["generations"]:
+                    gen = self._new_generation(started_at)
+                    f.readinto(gen.bloom)
+                    f.readinto(gen.sketch)
+                    generations.append(gen)
+            if generations:
+                self.generations = generations[-self.generations_count:]
+            logger.info(f"Reputação carregada: {len(self.generations)} gerações, {self.memory_bytes() / 1024 / 1024:.1f} MiB")
+        except Exception as e:
+            logger.error(f"Erro ao carregar reputação de {self.path}: {e}")
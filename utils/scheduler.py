@@ -0,0 +1,99 @@
+# utils/scheduler.py
+# Description: Agendador único baseado em min-heap para prazos de vários servidores (lockdowns, inatividade de tickets)
+# Date of Creation: 19/10/2026
+# Created by: CodeProjects
+# Version: 1.0
+# Developer Of Version: CodeProjects - Serviços Escaláveis para seu Game
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger("DataBit.Scheduler")
+
+
+class DeadlineScheduler:
+    """Dispara um callback por chave no prazo agendado, usando uma única tarefa e um min-heap.
+
+    Reagendar uma chave é O(log n): a entrada antiga fica no heap e é descartada ao chegar ao topo.
+    Os prazos são timestamps de época (time.time()) para poderem ser persistidos e restaurados.
+    """
+
+    def __init__(self, callback: Callable[[Hashable], Awaitable[None]], name: str = "scheduler"):
+        self.callback = callback
+        self.name = name
+        self._heap = []
+        self._deadlines: Dict[Hashable, float] = {}
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._deadlines
+
+    def deadline(self, key: Hashable) -> Optional[float]:
+        return self._deadlines.get(key)
+
+    def schedule(self, key: Hashable, when: float):
+        """Agenda (ou reagenda) a chave para o timestamp informado."""
+        self._deadlines[key] = when
+        heapq.heappush(self._heap, (when, next(self._counter), key))
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._compact()
+        self._wakeup.set()
+
+    def cancel(self, key: Hashable):
+        """Remove o prazo da chave; a entrada no heap é descartada de forma preguiçosa."""
+        self._deadlines.pop(key, None)
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if self._deadlines.get(entry[2]) == entry[0]]
+        heapq.heapify(self._heap)
+
+    def _discard_stale(self):
+        while self._heap and self._deadlines.get(self._heap[0][2]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    async def _fire(self, key: Hashable):
+        try:
+            await self.callback(key)
+        except Exception as e:
+            logger.error(f"Erro ao executar prazo {key} no agendador {self.name}: {e}", exc_info=True)
+
+    async def run(self):
+        while True:
+            self._discard_stale()
+            if not self._heap:
+                timeout = None
+            else:
+                timeout = self._heap[0][0] - time.time()
+                if timeout <= 0:
+                    _, _, key = heapq.heappop(self._heap)
+                    del self._deadlines[key]
+                    asyncio.create_task(self._fire(key))
+                    continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self.run())
+            logger.info(f"Agendador {self.name} iniciado com {len(self)} prazos pendentes")
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
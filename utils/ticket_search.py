@@ -0,0 +1,198 @@
+# utils/ticket_search.py
+# Description: Índice de busca full-text (SQLite FTS5) das mensagens de tickets fechados e reindexação das transcrições já existentes
+# Date of Creation: 19/10/2026
+# Created by: CodeProjects
+# Version: 1.0
+# Developer Of Version: CodeProjects - Serviços Escaláveis para seu Game
+#
+# Reindexação das transcrições antigas (offline, sem o bot rodando):
+#   python -m utils.ticket_search --db ticket_system.db --transcripts transcripts
+
+import argparse
+import gzip
+import logging
+import sqlite3
+import time
+from typing import Iterable, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from utils.database import get_database
+from utils.transcript_store import TranscriptStore
+
+logger = logging.getLogger("DataBit.TicketSearch")
+
+SNIPPET_TOKENS = 16
+
+
+def build_match_query(text: str) -> str:
+    """Transforma o texto digitado em uma consulta FTS5 segura: cada palavra vira um termo entre aspas."""
+    terms = [term.replace('"', '""') for term in text.split() if term.strip('"')]
+    return " ".join(f'"{term}"' for term in terms)
+
+
+class TicketSearchIndex:
+    """Uma linha do índice por mensagem; a busca agrupa os resultados por ticket e fica com o melhor trecho."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.db = get_database(db_path)
+        with self.db.connection() as conn:
+            conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS ticket_search USING fts5(
+                    text,
+                    author,
+                    category,
+                    guild_id UNINDEXED,
+                    ticket_id UNINDEXED,
+                    transcript UNINDEXED,
+                    attendant UNINDEXED,
+                    closed_at UNINDEXED,
+                    tokenize = 'unicode61 remove_diacritics 2'
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ticket_search_docs (
+                    transcript TEXT PRIMARY KEY,
+                    guild_id TEXT,
+                    indexed_at REAL NOT NULL
+                )
+            """)
+
+    def is_indexed(self, conn: sqlite3.Connection, transcript: str) -> bool:
+        return conn.execute("SELECT 1 FROM ticket_search_docs WHERE transcript = ?", (transcript,)).fetchone() is not None
+
+    def index_captured(self, ticket_key: str, guild_id: str, ticket_id: str, transcript: str, category: str,
+                       attendant: Optional[str], closed_at: float) -> int:
+        """Indexa um ticket direto da tabela de mensagens capturadas, sem passar o texto pelo Python."""
+        with self.db.connection() as conn:
+            if self.is_indexed(conn, transcript):
+                return 0
+            cursor = conn.execute("""
+                INSERT INTO ticket_search (text, author, category, guild_id, ticket_id, transcript, attendant, closed_at)
+                SELECT content, author_name, ?, ?, ?, ?, ?, ?
+                FROM ticket_messages
+                WHERE ticket_id = ? AND deleted = 0 AND content != ''
+            """, (category, guild_id, ticket_id, transcript, attendant, closed_at, ticket_key))
+            conn.execute("INSERT INTO ticket_search_docs (transcript, guild_id, indexed_at) VALUES (?, ?, ?)", (transcript, guild_id, time.time()))
+            return cursor.rowcount
+
+    def index_messages(self, guild_id: Optional[str], ticket_id: str, transcript: str, category: str,
+                       attendant: Optional[str], closed_at: float, messages: Iterable[Tuple[str, str]]) -> int:
+        """Indexa pares (autor, texto) de um ticket, por exemplo lidos de uma transcrição em HTML."""
+        rows = [
+            (text, author, category, guild_id, ticket_id, transcript, attendant, closed_at)
+            for author, text in messages if text
+        ]
+        with self.db.connection() as conn:
+            if self.is_indexed(conn, transcript):
+                return 0
+            conn.executemany("""
+                INSERT INTO ticket_search (text, author, category, guild_id, ticket_id, transcript, attendant, closed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            conn.execute("INSERT INTO ticket_search_docs (transcript, guild_id, indexed_at) VALUES (?, ?, ?)", (transcript, guild_id, time.time()))
+        return len(rows)
+
+    def search(self, guild_id: str, text: str, category: Optional[str] = None, attendant: Optional[str] = None,
+               since: Optional[float] = None, until: Optional[float] = None, limit: int = 10) -> List[dict]:
+        """Busca por relevância (bm25) dentro de um servidor e retorna no máximo um resultado por ticket."""
+        match = build_match_query(text)
+        if not match:
+            return []
+        filters = ["ticket_search MATCH ?", "guild_id = ?"]
+        params: list = [match, guild_id]
+        if category:
+            filters.append("category = ? COLLATE NOCASE")
+            params.append(category)
+        if attendant:
+            filters.append("attendant = ?")
+            params.append(attendant)
+        if since:
+            filters.append("closed_at >= ?")
+            params.append(since)
+        if until:
+            filters.append("closed_at <= ?")
+            params.append(until)
+        with self.db.connection() as conn:
+            rows = conn.execute(f"""
+                SELECT ticket_id, transcript, category, author, closed_at,
+                       snippet(ticket_search, 0, '**', '**', '…', {SNIPPET_TOKENS}), bm25(ticket_search, 10.0, 3.0, 1.0)
+                FROM ticket_search
+                WHERE {' AND '.join(filters)}
+                ORDER BY bm25(ticket_search, 10.0, 3.0, 1.0)
+                LIMIT ?
+            """, (*params, limit * 20)).fetchall()
+        results = {}
+        for ticket_id, transcript, category_name, author, closed_at, snippet, score in rows:
+            if transcript not in results:
+                results[transcript] = {
+                    "ticket_id": ticket_id,
+                    "transcript": transcript,
+                    "category": category_name,
+                    "author": author,
+                    "closed_at": closed_at,
+                    "snippet": snippet,
+                    "score": score,
+                    "hits": 0
+                }
+            results[transcript]["hits"] += 1
+        return list(results.values())[:limit]
+
+
+def parse_transcript_html(content: str) -> Tuple[str, List[Tuple[str, str]]]:
+    """Extrai (categoria, [(autor, texto)]) de uma transcrição em HTML, nos formatos antigo e atual."""
+    soup = BeautifulSoup(content, "html.parser")
+    category = ""
+    for paragraph in soup.select("div.text-center p"):
+        label = paragraph.get_text(strip=True)
+        if label.startswith("Categoria:"):
+            category = label[len("Categoria:"):].strip()
+            break
+    messages = []
+    for block in soup.select("div.items-start"):
+        author = block.select_one("span.font-semibold")
+        text = block.select_one("div.content") or block.select_one("p")
+        if author and text:
+            messages.append((author.get_text(strip=True), text.get_text()))
+    return category, messages
+
+
+def backfill(db_path: str, transcripts_dir: str) -> int:
+    """Indexa as transcrições que ainda não estão no índice (comprimidas ou empacotadas).
+
+    Transcrições antigas em .html são comprimidas e registradas antes, para herdarem o servidor do ticket.
+    """
+    index = TicketSearchIndex(db_path)
+    store = TranscriptStore(db_path, transcripts_dir)
+    store.compact({})
+    with get_database(db_path).connection() as conn:
+        known = conn.execute("""
+            SELECT f.filename, f.guild_id, f.ticket_id, f.created_at, t.assumed_by
+            FROM transcript_files f
+            LEFT JOIN tickets t ON t.ticket_id = f.guild_id || '_' || f.ticket_id
+            WHERE f.filename NOT IN (SELECT transcript FROM ticket_search_docs)
+        """).fetchall()
+    documents = 0
+    for filename, guild_id, ticket_id, created_at, attendant in known:
+        encoded = store.read_encoded(filename)
+        if encoded is None:
+            continue
+        category, messages = parse_transcript_html(gzip.decompress(encoded).decode("utf-8"))
+        index.index_messages(guild_id, ticket_id, filename, category, attendant, created_at, messages)
+        documents += 1
+    return documents
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reindexa no FTS5 as transcrições de tickets já existentes.")
+    parser.add_argument("--db", default="ticket_system.db")
+    parser.add_argument("--transcripts", default="transcripts")
+    args = parser.parse_args(argv)
+    began = time.perf_counter()
+    documents = backfill(args.db, args.transcripts)
+    print(f"{documents} transcrições indexadas em {time.perf_counter() - began:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# utils/ticket_stats.py
+# Description: Métricas de atendimento (SLA) dos tickets em agregados diários incrementais por servidor, categoria e atendente
+# Date of Creation: 19/10/2026
+# Created by: CodeProjects
+# Version: 1.0
+# Developer Of Version: CodeProjects - Serviços Escaláveis para seu Game
+
+import logging
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from utils.database import get_database
+
+logger = logging.getLogger("DataBit.TicketStats")
+
+COUNTERS = ("opened", "closed", "assumed", "messages")
+DURATIONS = ("first_response", "assume", "resolution")  # Tempos em segundos: soma + quantidade
+RATINGS = tuple(range(1, 6))
+DIMENSIONS = ("guild", "category", "attendant")
+
+METRIC_COLUMNS = (
+    list(COUNTERS)
+    + [f"{name}_{suffix}" for name in DURATIONS for suffix in ("count", "seconds")]
+    + [f"rating_{value}" for value in RATINGS]
+)
+
+
+def day_of(moment) -> str:
+    """Dia (AAAA-MM-DD) em que o evento entra no agregado, no fuso do próprio datetime."""
+    if isinstance(moment, str):
+        moment = datetime.fromisoformat(moment)
+    return moment.strftime("%Y-%m-%d")
+
+
+def to_increments(metrics: dict) -> Dict[str, float]:
+    """Converte as métricas de um evento (ex.: opened=1, resolution=3600, rating=5) nas colunas somadas."""
+    increments: Dict[str, float] = {}
+    for name, value in metrics.items():
+        if value is None:
+            continue
+        if name in COUNTERS:
+            increments[name] = value
+        elif name in DURATIONS:
+            increments[f"{name}_count"] = 1
+            increments[f"{name}_seconds"] = max(0.0, float(value))
+        elif name == "rating" and int(value) in RATINGS:
+            increments[f"rating_{int(value)}"] = 1
+        else:
+            raise ValueError(f"Métrica desconhecida: {name}")
+    return increments
+
+
+class TicketStats:
+    """Mantém uma linha por (servidor, dimensão, dia, chave) com somas e contagens.
+
+    Cada evento de ticket soma seus valores nas linhas do servidor, da categoria e do atendente
+    daquele dia (UPSERT), então nada é recalculado a partir dos tickets. Uma consulta por período
+    lê só as linhas diárias do intervalo: o custo depende da quantidade de dias, não de tickets.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.db = get_database(db_path)
+        with self.db.connection() as conn:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS ticket_stats_daily (
+                    guild_id TEXT NOT NULL,
+                    dimension TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    dimension_key TEXT NOT NULL,
+                    {', '.join(f'{column} REAL NOT NULL DEFAULT 0' for column in METRIC_COLUMNS)},
+                    PRIMARY KEY (guild_id, dimension, day, dimension_key)
+                ) WITHOUT ROWID
+            """)
+
+    def record(self, guild_id: str, moment, category: Optional[str] = None, attendant: Optional[str] = None, **metrics):
+        """Soma as métricas de um evento nos agregados do dia (servidor, categoria e atendente)."""
+        increments = to_increments(metrics)
+        if not increments:
+            return
+        day = day_of(moment)
+        keys = [("guild", "")]
+        if category:
+            keys.append(("category", str(category)))
+        if attendant:
+            keys.append(("attendant", str(attendant)))
+        columns = list(increments)
+        try:
+            with self.db.connection() as conn:
+                conn.executemany(f"""
+                    INSERT INTO ticket_stats_daily (guild_id, dimension, day, dimension_key, {', '.join(columns)})
+                    VALUES (?, ?, ?, ?, {', '.join('?' * len(columns))})
+                    ON CONFLICT (guild_id, dimension, day, dimension_key) DO UPDATE SET
+                    {', '.join(f'{column} = {column} + excluded.{column}' for column in columns)}
+                """, [(guild_id, dimension, day, key, *increments.values()) for dimension, key in keys])
+        except Exception as e:
+            logger.error(f"Erro ao registrar métricas de tickets em {guild_id}: {e}", exc_info=True)
+
+    def summary(self, guild_id: str, since: Optional[date] = None, until: Optional[date] = None,
+                dimension: str = "guild", limit: int = 25) -> List[dict]:
+        """Totais, médias e distribuição de notas do período, uma entrada por chave da dimensão."""
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Dimensão inválida: {dimension}")
+        rows = self.db.fetchall(f"""
+            SELECT dimension_key, {', '.join(f'SUM({column})' for column in METRIC_COLUMNS)}
+            FROM ticket_stats_daily
+            WHERE guild_id = ? AND dimension = ? AND day BETWEEN ? AND ?
+            GROUP BY dimension_key
+            ORDER BY SUM(opened) + SUM(closed) DESC
+            LIMIT ?
+        """, (
+            guild_id, dimension,
+            since.isoformat() if since else "0000-00-00",
+            until.isoformat() if until else "9999-99-99",
+            limit
+        ))
+        return [self._to_summary(row[0], dict(zip(METRIC_COLUMNS, row[1:]))) for row in rows]
+
+    @staticmethod
+    def _to_summary(key: str, totals: dict) -> dict:
+        ratings = {value: int(totals[f"rating_{value}"]) for value in RATINGS}
+        rated = sum(ratings.values())
+        summary = {"key": key, **{name: int(totals[name]) for name in COUNTERS}}
+        for name in DURATIONS:
+            count = int(totals[f"{name}_count"])
+            summary[f"{name}_avg_seconds"] = totals[f"{name}_seconds"] / count if count else None
+            summary[f"{name}_count"] = count
+        summary["ratings"] = ratings
+        summary["rating_avg"] = sum(value * amount for value, amount in ratings.items()) / rated if rated else None
+        summary["messages_per_ticket"] = summary["messages"] / summary["closed"] if summary["closed"] else None
+        return summary
+
+    def rebuild(self):
+        """Gera os agregados a partir das colunas da tabela tickets, se ainda estiverem vazios.
+
+        Tickets antigos não têm horário da primeira resposta; esses entram só com as demais métricas.
+        """
+        if self.db.fetchone("SELECT 1 FROM ticket_stats_daily LIMIT 1"):
+            return
+        try:
+            tickets = self.db.fetchall("""
+                SELECT t.guild_id, t.category, t.assumed_by, t.created_at, t.assumed_at, t.closed_at, t.rating,
+                       t.first_response_at, (SELECT COUNT(*) FROM ticket_messages m WHERE m.ticket_id = t.ticket_id AND m.deleted = 0)
+                FROM tickets t
+            """)
+        except Exception as e:
+            logger.error(f"Erro ao ler tickets para gerar as métricas: {e}", exc_info=True)
+            return
+        for guild_id, category, attendant, created_at, assumed_at, closed_at, rating, first_response_at, messages in tickets:
+            try:
+                created = datetime.fromisoformat(created_at)
+                self.record(guild_id, created, category, opened=1)
+                if first_response_at:
+                    first_response = datetime.fromisoformat(first_response_at)
+                    self.record(guild_id, first_response, category, attendant,
+                                first_response=(first_response - created).total_seconds())
+                if attendant and assumed_at:
+                    assumed = datetime.fromisoformat(assumed_at)
+                    self.record(guild_id, assumed, category, attendant, assumed=1, assume=(assumed - created).total_seconds())
+                if closed_at:
+                    closed = datetime.fromisoformat(closed_at)
+                    self.record(guild_id, closed, category, attendant, closed=1,
+                                resolution=(closed - created).total_seconds(), messages=messages, rating=rating)
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Ticket ignorado ao gerar métricas em {guild_id}: {e}")
+        logger.info(f"Métricas de tickets geradas a partir de {len(tickets)} tickets existentes")
@@ -0,0 +1,380 @@
+# utils/transcript.py
+# Description: Geração de transcrições de tickets em streaming (templates Jinja2 pré-compilados, renderização por página e escrita não bloqueante)
+# Date of Creation: 19/10/2026
+# Created by: CodeProjects
+# Version: 1.1
+# Developer Of Version: CodeProjects - Serviços Escaláveis para seu Game
+#
+# Benchmark de renderização:
+#   python -m utils.transcript --messages 10000 --theme escuro
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import AsyncIterable, Dict, List, Optional
+
+import nextcord
+from jinja2 import Environment, FileSystemLoader, Template
+from markupsafe import Markup
+
+from utils.discord_markdown import render_markdown
+
+logger = logging.getLogger("DataBit.Transcript")
+
+DEFAULT_AVATAR = "https://discord.com/assets/1f0bfc0865d324c25817.png"
+PAGE_SIZE = 100  # Mensagens renderizadas e gravadas por vez
+LAG_SAMPLE_INTERVAL = 0.001  # Intervalo do amostrador de atraso do event loop no benchmark
+TEMPLATES_DIR = os.path.join("templates", "transcripts")
+STYLESHEET_SOURCE = os.path.join("assets", "css", "transcript.css")
+STYLESHEET_DIR = os.path.join("transcripts", "static")
+REPLY_SNIPPET_CHARS = 120
+MESSAGE_EXTRAS = ("mentions", "embeds", "reply", "stickers")  # Campos opcionais do registro, gravados juntos na coluna extras
+THEMES = {"escuro": "Escuro", "claro": "Claro", "contraste": "Alto contraste"}
+DEFAULT_THEME = "escuro"
+
+_templates: Dict[str, Template] = {}
+_stylesheet_name: Optional[str] = None
+
+
+def format_timestamp(value: str) -> str:
+    return datetime.fromisoformat(value).strftime("%d/%m/%Y %H:%M")
+
+
+def load_templates(templates_dir: str = TEMPLATES_DIR) -> Dict[str, Template]:
+    """Compila os templates da transcrição uma única vez e os mantém em cache."""
+    if not _templates:
+        env = Environment(loader=FileSystemLoader(templates_dir), autoescape=True, auto_reload=False)
+        env.filters["timestamp"] = format_timestamp
+        env.filters["basename"] = os.path.basename
+        env.filters["markdown"] = lambda content, mentions=None: Markup(render_markdown(content, mentions))
+        for name in ("header", "page", "footer", "viewer"):
+            _templates[name] = env.get_template(f"{name}.html")
+    return _templates
+
+
+def publish_stylesheet(source: str = STYLESHEET_SOURCE, target_dir: str = STYLESHEET_DIR) -> str:
+    """Copia o CSS com o hash do conteúdo no nome (transcript.<hash>.css) e retorna esse nome.
+
+    Como o nome muda sempre que o conteúdo muda, o arquivo pode ser servido com cache longo.
+    """
+    global _stylesheet_name
+    if _stylesheet_name is None:
+        with open(source, "rb") as f:
+            content = f.read()
+        name = f"transcript.{hashlib.sha256(content).hexdigest()[:12]}.css"
+        os.makedirs(target_dir, exist_ok=True)
+        target = os.path.join(target_dir, name)
+        if not os.path.exists(target):
+            shutil.copyfile(source, target)
+        _stylesheet_name = name
+    return _stylesheet_name
+
+
+def embed_to_record(embed: nextcord.Embed) -> dict:
+    """Só os campos do embed que a transcrição mostra."""
+    data = embed.to_dict()
+    return {
+        "title": data.get("title"),
+        "url": data.get("url"),
+        "description": data.get("description"),
+        "color": f"#{data['color']:06x}" if data.get("color") is not None else None,
+        "author": (data.get("author") or {}).get("name"),
+        "fields": [
+            {"name": field.get("name", ""), "value": field.get("value", ""), "inline": field.get("inline", False)}
+            for field in data.get("fields", [])
+        ],
+        "image": (data.get("image") or {}).get("url"),
+        "thumbnail": (data.get("thumbnail") or {}).get("url"),
+        "footer": (data.get("footer") or {}).get("text")
+    }
+
+
+def message_extras(message: nextcord.Message) -> dict:
+    """Menções (com os nomes que vieram do gateway), embeds, resposta e figurinhas da mensagem, só os presentes."""
+    extras = {}
+    mentions = {
+        "users": {str(user.id): user.display_name for user in message.mentions},
+        "roles": {str(role.id): role.name for role in message.role_mentions},
+        "channels": {str(channel.id): channel.name for channel in message.channel_mentions}
+    }
+    mentions = {kind: names for kind, names in mentions.items() if names}
+    if mentions:
+        extras["mentions"] = mentions
+    if message.embeds:
+        extras["embeds"] = [embed_to_record(embed) for embed in message.embeds]
+    reference = message.reference
+    if reference and reference.message_id:
+        resolved = reference.resolved
+        is_message = isinstance(resolved, nextcord.Message)
+        extras["reply"] = {
+            "id": str(reference.message_id),
+            "author_name": resolved.author.name if is_message else None,
+            "content": (resolved.content or "")[:REPLY_SNIPPET_CHARS] if is_message else ""
+        }
+    if message.stickers:
+        extras["stickers"] = [{"name": sticker.name, "url": str(sticker.url)} for sticker in message.stickers]
+    return extras
+
+
+def message_to_record(message: nextcord.Message, tz) -> dict:
+    """Converte uma mensagem do Discord em um registro simples (serializável) para a transcrição."""
+    author = message.author
+    return {
+        "id": message.id,
+        "author_id": author.id,
+        "author_name": author.name,
+        "author_avatar": author.avatar.url if author.avatar else None,
+        "content": message.content or "",
+        "created_at": message.created_at.astimezone(tz).isoformat(),
+        "attachments": [{"url": a.url, "filename": a.filename} for a in message.attachments],
+        **message_extras(message)
+    }
+
+
+def render_header(meta: dict) -> str:
+    """meta: ticket_id, category, user_name, closed_at e, opcionalmente, theme e asset_base_url."""
+    theme = meta.get("theme") if meta.get("theme") in THEMES else DEFAULT_THEME
+    return load_templates()["header"].render(
+        ticket_id=meta["ticket_id"],
+        category=meta["category"],
+        user_name=meta["user_name"],
+        closed_at=meta["closed_at"],
+        theme=theme,
+        stylesheet_url=f"{meta.get('asset_base_url', 'static')}/{publish_stylesheet()}"
+    )
+
+
+def render_page(records: List[dict]) -> str:
+    return load_templates()["page"].render(messages=records, default_avatar=DEFAULT_AVATAR)
+
+
+def render_footer(meta: dict) -> str:
+    return load_templates()["footer"].render(**meta)
+
+
+def _init_worker():
+    load_templates()
+    publish_stylesheet()
+
+
+def _warmup() -> int:
+    return os.getpid()
+
+
+class TranscriptRenderPool:
+    """Renderiza páginas da transcrição em processos separados, sem ocupar o event loop do bot.
+
+    Os workers recebem apenas registros simples (dicts) e devolvem HTML pronto; são iniciados
+    com os templates já compilados e aquecidos em start() para o primeiro fechamento não pagar
+    o custo de criação dos processos. start() bloqueia durante o aquecimento: chame-o fora do event loop.
+    """
+
+    def __init__(self, workers: int = 2):
+        self.workers = max(1, workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        if self._executor:
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker
+        )
+        try:
+            pids = {f.result() for f in [self._executor.submit(_warmup) for _ in range(self.workers * 2)]}
+        except Exception:
+            self.shutdown()
+            raise
+        logger.info(f"Pool de renderização de transcrições iniciado com {len(pids)} processos")
+
+    async def render(self, func, *args) -> str:
+        if not self._executor:
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def shutdown(self):
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class AsyncFileWriter:
+    """Grava blocos de texto em um arquivo a partir de uma thread, sem bloquear o event loop.
+
+    A fila limitada mantém no máximo alguns blocos em memória enquanto a renderização segue.
+    Com compress=True o arquivo é gravado já comprimido em gzip.
+    """
+
+    def __init__(self, path: str, max_pending: int = 4, compress: bool = False):
+        self.path = path
+        self.compress = compress
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._file = None
+        self._task: Optional[asyncio.Task] = None
+        self.bytes_written = 0
+
+    async def __aenter__(self):
+        if self.compress:
+            self._file = await asyncio.to_thread(gzip.open, self.path, "wt", encoding="utf-8", compresslevel=6)
+        else:
+            self._file = await asyncio.to_thread(open, self.path, "w", encoding="utf-8")
+        self._task = asyncio.create_task(self._drain())
+        return self
+
+    async def _drain(self):
+        while True:
+            chunk = await self._queue.get()
+            if chunk is None:
+                return
+            await asyncio.to_thread(self._file.write, chunk)
+            self.bytes_written += len(chunk)
+
+    async def _put(self, item: Optional[str]):
+        """Enfileira um item, mas desiste se a tarefa de escrita morrer enquanto a fila está cheia."""
+        if self._task.done():
+            self._task.result()  # Propaga erros de escrita
+        put = asyncio.ensure_future(self._queue.put(item))
+        try:
+            await asyncio.wait({put, self._task}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if not put.done():
+                put.cancel()
+        if not put.done() or put.cancelled():
+            self._task.result()
+            raise RuntimeError(f"A gravação de {self.path} terminou antes do fim dos dados")
+
+    async def write(self, chunk: str):
+        await self._put(chunk)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                await self._put(None)
+                await self._task
+            else:
+                # Os blocos que ainda estão na fila são descartados: o arquivo parcial será apagado por quem chamou
+                while not self._queue.empty():
+                    self._queue.get_nowait()
+                self._task.cancel()
+                await asyncio.gather(self._task, return_exceptions=True)
+        finally:
+            await asyncio.to_thread(self._file.close)
+
+
+async def stream_transcript(records: AsyncIterable[dict], path: str, meta: dict, page_size: int = PAGE_SIZE,
+                            pool: Optional[TranscriptRenderPool] = None, compress: bool = False) -> int:
+    """Renderiza os registros página por página e grava cada página assim que fica pronta.
+
+    Com um pool, várias páginas são renderizadas em paralelo nos workers e gravadas na ordem
+    original. Retorna a quantidade de mensagens escritas; a memória usada não depende do tamanho do ticket.
+    """
+    pool = pool or TranscriptRenderPool()
+    max_pending = pool.workers * 2
+    pending = deque()
+    count = 0
+    page: List[dict] = []
+    async with AsyncFileWriter(path, compress=compress) as writer:
+        await writer.write(await pool.render(render_header, meta))
+        async for record in records:
+            page.append(record)
+            count += 1
+            if len(page) >= page_size:
+                pending.append(asyncio.ensure_future(pool.render(render_page, page)))
+                page = []
+                if len(pending) >= max_pending:
+                    await writer.write(await pending.popleft())
+        if page:
+            pending.append(asyncio.ensure_future(pool.render(render_page, page)))
+        while pending:
+            await writer.write(await pending.popleft())
+        await writer.write(await pool.render(render_footer, meta))
+    return count
+
+
+async def _sample_loop_lag(stop: asyncio.Event, interval: float = LAG_SAMPLE_INTERVAL) -> float:
+    """Dorme em intervalos curtos até stop ser sinalizado e retorna o maior atraso observado (em segundos)."""
+    loop = asyncio.get_running_loop()
+    max_lag = 0.0
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(interval)
+        max_lag = max(max_lag, loop.time() - started - interval)
+    return max_lag
+
+
+def benchmark(messages: int, theme: str = DEFAULT_THEME, workers: int = 0) -> tuple[float, float]:
+    """Renderiza uma transcrição sintética enquanto mede o atraso do event loop.
+
+    Retorna o tempo gasto por 1000 mensagens e o maior atraso do loop durante a renderização (ambos em segundos).
+    """
+    records = [
+        {
+            "id": i,
+            "author_id": i % 7,
+            "author_name": f"usuario{i % 7}",
+            "author_avatar": None,
+            "content": f"Mensagem de teste número {i} com <html> para escapar & alguns caracteres especiais.",
+            "created_at": datetime(2026, 1, 1, 12, 0).isoformat(),
+            "attachments": [{"url": f"https://cdn.example.com/{i}.png", "filename": f"{i}.png"}] if i % 10 == 0 else []
+        }
+        for i in range(messages)
+    ]
+
+    async def source():
+        for record in records:
+            yield record
+
+    meta = {"ticket_id": 0, "category": "Benchmark", "user_name": "bench", "closed_at": "-", "theme": theme}
+    async def run(path: str) -> float:
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(_sample_loop_lag(stop))
+        await asyncio.sleep(0)  # Deixa o amostrador armar o primeiro intervalo antes de renderizar
+        try:
+            await stream_transcript(source(), path, meta, pool=pool)
+        finally:
+            stop.set()
+        return await sampler
+
+    load_templates()
+    pool = TranscriptRenderPool(workers) if workers else None
+    if pool:
+        pool.start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            started = time.perf_counter()
+            max_lag = asyncio.run(run(os.path.join(tmp, "bench.html")))
+            elapsed = time.perf_counter() - started
+    finally:
+        if pool:
+            pool.shutdown()
+    return elapsed / messages * 1000, max_lag
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de renderização das transcrições de tickets.")
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--theme", choices=sorted(THEMES), default=DEFAULT_THEME)
+    parser.add_argument("--workers", type=int, default=0, help="Processos de renderização (0 = no próprio processo)")
+    parser.add_argument("--max-lag-ms", type=float, default=None,
+                        help="Falha se o maior atraso do event loop passar deste valor")
+    args = parser.parse_args(argv)
+    per_thousand, max_lag = benchmark(args.messages, args.theme, args.workers)
+    print(f"{args.messages} mensagens: {per_thousand * 1000:.1f} ms por 1000 mensagens")
+    print(f"Maior atraso do event loop: {max_lag * 1000:.1f} ms")
+    if args.max_lag_ms is not None and max_lag * 1000 > args.max_lag_ms:
+        parser.exit(1, f"Atraso do event loop acima do limite de {args.max_lag_ms:.1f} ms\n")
+
+
+if __name__ == "__main__":
+    main()
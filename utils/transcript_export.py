@@ -0,0 +1,269 @@
+# utils/transcript_export.py
+# Description: Exportação das transcrições em JSONL e texto (geradas em streaming das mensagens capturadas) e pacote ZIP por servidor e período, montado sob demanda com downloads retomáveis
+# Date of Creation: 19/10/2026
+# Created by: CodeProjects
+# Version: 1.0
+# Developer Of Version: CodeProjects - Serviços Escaláveis para seu Game
+
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import struct
+import time
+import zlib
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlencode
+
+from utils.database import get_database
+from utils.ticket_search import parse_transcript_html
+from utils.transcript import format_timestamp
+from utils.transcript_store import TranscriptStore
+
+logger = logging.getLogger("DataBit.TranscriptExport")
+
+CHUNK_SIZE = 64 * 1024
+PAGE_SIZE = 500
+LINK_TTL = 24 * 3600  # Validade dos links assinados do /export_tickets
+MAX_BUNDLE_SIZE = 0xFFFFFFFF  # Sem ZIP64: deslocamentos e tamanhos do pacote precisam caber em 32 bits
+GZIP_HEADER_PEEK = 1024
+
+_secret: Optional[bytes] = None
+
+# Trecho do pacote: bytes prontos ou (arquivo, deslocamento, tamanho) lido só na hora de enviar
+Segment = Union[bytes, Tuple[str, int, int]]
+
+
+def _signing_key() -> bytes:
+    """Chave dos links de exportação; sem TRANSCRIPT_EXPORT_SECRET, os links valem até o bot reiniciar."""
+    global _secret
+    if _secret is None:
+        configured = os.getenv("TRANSCRIPT_EXPORT_SECRET")
+        _secret = configured.encode() if configured else secrets.token_bytes(32)
+    return _secret
+
+
+def sign_bundle(guild_id: str, since: int, until: int, expires: int) -> str:
+    return hmac.new(_signing_key(), f"{guild_id}:{since}:{until}:{expires}".encode(), hashlib.sha256).hexdigest()
+
+
+def verify_bundle(guild_id: str, since: int, until: int, expires: int, signature: str) -> bool:
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(sign_bundle(guild_id, since, until, expires), signature)
+
+
+def bundle_url(base_url: str, guild_id: str, since: int, until: int, ttl: int = LINK_TTL) -> str:
+    """Link assinado (e com prazo) para baixar o pacote ZIP do servidor no período [since, until]."""
+    expires = int(time.time()) + ttl
+    query = urlencode({
+        "desde": since, "ate": until, "expira": expires, "assinatura": sign_bundle(guild_id, since, until, expires)
+    })
+    return f"{base_url}/export/{guild_id}.zip?{query}"
+
+
+def _dos_datetime(timestamp: float) -> Tuple[int, int]:
+    moment = time.localtime(max(timestamp, 315532800))  # O formato ZIP não representa datas antes de 1980
+    dos_time = (moment.tm_hour << 11) | (moment.tm_min << 5) | (moment.tm_sec // 2)
+    dos_date = ((moment.tm_year - 1980) << 9) | (moment.tm_mon << 5) | moment.tm_mday
+    return dos_time, dos_date
+
+
+def _gzip_header_length(head: bytes) -> int:
+    """Tamanho do cabeçalho gzip (RFC 1952); depois dele começa o fluxo deflate que o ZIP também usa."""
+    if head[:3] != b"\x1f\x8b\x08":
+        raise ValueError("Não é um arquivo gzip com deflate")
+    flags = head[3]
+    position = 10
+    if flags & 0x04:  # FEXTRA
+        position += 2 + struct.unpack("<H", head[position:position + 2])[0]
+    for flag in (0x08, 0x10):  # FNAME, FCOMMENT: terminados em zero
+        if flags & flag:
+            end = head.index(b"\x00", position)
+            position = end + 1
+    if flags & 0x02:  # FHCRC
+        position += 2
+    return position
+
+
+class ExportBundle:
+    """Pacote ZIP descrito por uma lista de trechos, com tamanho total conhecido antes de enviar o primeiro byte.
+
+    As transcrições já estão em gzip, cujo corpo é o mesmo fluxo deflate de uma entrada ZIP: cada
+    entrada aponta direto para esses bytes no disco (arquivo solto ou dentro do tar mensal), com o
+    CRC e o tamanho lidos do trailer do gzip. Nada é recomprimido nem carregado em memória, e como
+    o pacote é determinístico, qualquer intervalo (Range) pode ser enviado para retomar um download.
+    """
+
+    def __init__(self, name: str, segments: List[Segment], etag: str, count: int):
+        self.name = name
+        self.segments = segments
+        self.etag = etag
+        self.count = count
+        self.size = sum(len(s) if isinstance(s, bytes) else s[2] for s in segments)
+
+    def iter_range(self, start: int = 0, stop: Optional[int] = None) -> Iterator[bytes]:
+        """Bytes do pacote de start até stop (exclusivo), em blocos de até CHUNK_SIZE."""
+        stop = self.size if stop is None else min(stop, self.size)
+        position = 0
+        for segment in self.segments:
+            length = len(segment) if isinstance(segment, bytes) else segment[2]
+            begin, end = max(start, position), min(stop, position + length)
+            if begin < end:
+                if isinstance(segment, bytes):
+                    yield segment[begin - position:end - position]
+                else:
+                    path, offset, _ = segment
+                    with open(path, "rb") as f:
+                        f.seek(offset + begin - position)
+                        remaining = end - begin
+                        while remaining:
+                            chunk = f.read(min(CHUNK_SIZE, remaining))
+                            if not chunk:
+                                raise IOError(f"{path} terminou antes do esperado")
+                            remaining -= len(chunk)
+                            yield chunk
+            position += length
+            if position >= stop:
+                return
+
+
+class TranscriptExporter:
+    """Gera as exportações das transcrições sem montar o arquivo inteiro em memória."""
+
+    def __init__(self, db_path: str, store: TranscriptStore):
+        self.db = get_database(db_path)
+        self.store = store
+
+    def messages(self, ticket_key: str) -> Iterator[dict]:
+        """Mensagens capturadas do ticket em ordem, lidas do banco em páginas."""
+        after = -1
+        while True:
+            rows = self.db.fetchall("""
+                SELECT message_id, author_id, author_name, content, attachments, created_at, edited_at, extras
+                FROM ticket_messages WHERE ticket_id = ? AND deleted = 0 AND message_id > ?
+                ORDER BY message_id LIMIT ?
+            """, (ticket_key, after, PAGE_SIZE))
+            for message_id, author_id, author_name, content, attachments, created_at, edited_at, extras in rows:
+                yield {
+                    "id": str(message_id),
+                    "author_id": str(author_id),
+                    "author_name": author_name,
+                    "created_at": created_at,
+                    "edited_at": edited_at,
+                    "content": content or "",
+                    "attachments": json.loads(attachments) if attachments else [],
+                    **(json.loads(extras) if extras else {})
+                }
+            if len(rows) < PAGE_SIZE:
+                return
+            after = rows[-1][0]
+
+    def _source(self, filename: str) -> Optional[Tuple[dict, Iterator[dict]]]:
+        info = self.store.describe(filename)
+        if not info:
+            return None
+        ticket_key = f"{info['guild_id']}_{info['ticket_id']}"
+        if info["guild_id"] and self.db.fetchone("SELECT 1 FROM ticket_messages WHERE ticket_id = ? LIMIT 1", (ticket_key,)):
+            return info, self.messages(ticket_key)
+        # Tickets sem mensagens capturadas: só autor e texto, extraídos do HTML da transcrição
+        encoded = self.store.read_encoded(filename)
+        if encoded is None:
+            return None
+        _, parsed = parse_transcript_html(gzip.decompress(encoded).decode("utf-8"))
+        return info, ({"author_name": author, "content": text} for author, text in parsed)
+
+    def iter_jsonl(self, filename: str) -> Optional[Iterator[str]]:
+        """Uma mensagem por linha em JSON (IDs como texto, como no visualizador)."""
+        source = self._source(filename)
+        if source is None:
+            return None
+        return (json.dumps(message, ensure_ascii=False) + "\n" for message in source[1])
+
+    def iter_text(self, filename: str) -> Optional[Iterator[str]]:
+        """Transcrição em texto simples: cabeçalho e uma linha por mensagem, com anexos e embeds abaixo."""
+        source = self._source(filename)
+        if source is None:
+            return None
+        info, messages = source
+
+        def lines():
+            meta = info["meta"]
+            yield f"Transcrição do Ticket #{meta.get('ticket_id', info['ticket_id'])}\n"
+            yield f"Categoria: {meta.get('category', 'Desconhecida')}\n"
+            yield f"Aberto por: {meta.get('user_name', 'Desconhecido')} | Fechado em: {meta.get('closed_at', '-')}\n\n"
+            for message in messages:
+                when = f"[{format_timestamp(message['created_at'])}] " if message.get("created_at") else ""
+                edited = " (editado)" if message.get("edited_at") else ""
+                yield f"{when}{message['author_name']}{edited}: {message['content']}\n"
+                for attachment in message.get("attachments", []):
+                    yield f"    Anexo: {attachment.get('filename') or attachment['url']} <{attachment['url']}>\n"
+                for embed in message.get("embeds", []):
+                    yield f"    Embed: {' - '.join(part for part in (embed.get('title'), embed.get('description')) if part)}\n"
+                for sticker in message.get("stickers", []):
+                    yield f"    Figurinha: {sticker['name']}\n"
+
+        return lines()
+
+    def bundle(self, guild_id: str, since: int, until: int) -> ExportBundle:
+        """Descreve o ZIP com as transcrições do servidor criadas entre since e until (timestamps) e um manifest.jsonl."""
+        rows = self.db.fetchall("""
+            SELECT filename, ticket_id, size, raw_size, created_at, pack, pack_offset, meta
+            FROM transcript_files
+            WHERE guild_id = ? AND created_at BETWEEN ? AND ?
+            ORDER BY created_at, filename
+        """, (guild_id, since, until))
+        segments: List[Segment] = []
+        central: List[bytes] = []
+        manifest: List[str] = []
+        offset = 0
+
+        def add_entry(name: str, method: int, crc: int, compressed: int, raw: int, created_at: float, data: Segment):
+            nonlocal offset
+            encoded_name = name.encode("utf-8")
+            dos_time, dos_date = _dos_datetime(created_at)
+            fields = (20, 0x0800, method, dos_time, dos_date, crc, compressed, raw, len(encoded_name))
+            header = struct.pack("<IHHHHHIIIHH", 0x04034B50, *fields, 0) + encoded_name
+            central.append(struct.pack("<IHHHHHHIIIHHHHHII", 0x02014B50, 20, *fields, 0, 0, 0, 0, 0, offset) + encoded_name)
+            segments.extend((header, data))
+            offset += len(header) + compressed
+
+        for filename, ticket_id, size, raw_size, created_at, pack, pack_offset, meta in rows:
+            path, start = (os.path.join(self.store.packs_dir, pack), pack_offset) if pack else (self.store.path_for(filename), 0)
+            try:
+                with open(path, "rb") as f:
+                    f.seek(start)
+                    header_length = _gzip_header_length(f.read(min(GZIP_HEADER_PEEK, size)))
+                    f.seek(start + size - 8)
+                    crc, _ = struct.unpack("<II", f.read(8))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Transcrição {filename} ignorada na exportação de {guild_id}: {e}")
+                continue
+            compressed = size - header_length - 8
+            add_entry(filename, 8, crc, compressed, raw_size, created_at, (path, start + header_length, compressed))
+            manifest.append(json.dumps({
+                "arquivo": filename,
+                "ticket_id": ticket_id,
+                "criado_em": datetime.fromtimestamp(created_at).isoformat(timespec="seconds"),
+                **(json.loads(meta) if meta else {})
+            }, ensure_ascii=False) + "\n")
+            if offset > MAX_BUNDLE_SIZE:
+                raise ValueError("Pacote maior que 4 GiB; escolha um período menor")
+
+        manifest_bytes = "".join(manifest).encode("utf-8")
+        # A data do manifesto é o fim do período, para o pacote sair idêntico em cada pedido (Range entre pedidos)
+        add_entry("manifest.jsonl", 0, zlib.crc32(manifest_bytes), len(manifest_bytes), len(manifest_bytes), until, manifest_bytes)
+        directory = b"".join(central)
+        end = struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, len(central), len(central), len(directory), offset, 0)
+        segments.extend((directory, end))
+        if offset + len(directory) + len(end) > MAX_BUNDLE_SIZE:
+            raise ValueError("Pacote maior que 4 GiB; escolha um período menor")
+        etag = hashlib.sha256(
+            json.dumps([guild_id, since, until, [(row[0], row[2]) for row in rows]]).encode()
+        ).hexdigest()[:32]
+        name = f"transcricoes_{guild_id}_{datetime.fromtimestamp(since):%Y%m%d}_{datetime.fromtimestamp(until):%Y%m%d}.zip"
+        return ExportBundle(name, segments, etag, len(central) - 1)
@@ -0,0 +1,246 @@
+# utils/transcript_jobs.py
+# Description: Fila durável (SQLite) dos trabalhos de transcrição executados em segundo plano, em etapas, com novas tentativas e acompanhamento de status
+# Date of Creation: 19/10/2026
+# Created by: CodeProjects
+# Version: 1.0
+# Developer Of Version: CodeProjects - Serviços Escaláveis para seu Game
+
+import asyncio
+import json
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from utils.database import get_database
+
+logger = logging.getLogger("DataBit.TranscriptJobs")
+
+STATUSES = ("pendente", "executando", "concluido", "falhou")
+IDLE_POLL_SECONDS = 300  # Maior espera sem trabalho pronto; enqueue() acorda os workers antes disso
+STAGE_TIMEOUT_SECONDS = 900  # Uma etapa que passa disso conta como tentativa falha e libera o worker
+
+Stage = Tuple[str, Callable[[dict], Awaitable[Optional[dict]]]]
+
+
+class TranscriptJobQueue:
+    """Executa os trabalhos de transcrição dos tickets fechados, um por ticket, fora do fluxo de fechamento.
+
+    Cada trabalho passa pelas etapas na ordem (ex.: renderizar, enviar, indexar) e a etapa atual fica
+    gravada no banco: uma falha tenta de novo a partir da etapa que falhou, com espera exponencial,
+    e um reinício do bot retoma os trabalhos que estavam pendentes ou em execução. Uma etapa que não
+    termina em stage_timeout segundos é cancelada e tratada como falha. O que cada etapa
+    retorna é somado aos dados do trabalho (ex.: o nome do arquivo gerado) e fica disponível às seguintes.
+    """
+
+    def __init__(self, db_path: str, stages: Sequence[Stage], workers: int = 2, max_attempts: int = 5,
+                 retry_base: float = 30.0, retry_max: float = 3600.0, stage_timeout: float = STAGE_TIMEOUT_SECONDS,
+                 on_failure: Optional[Callable[[dict], Awaitable[None]]] = None, name: str = "transcricoes"):
+        self.db = get_database(db_path)
+        self.stages = list(stages)
+        self.stage_names = [stage for stage, _ in self.stages]
+        self.workers = max(1, workers)
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.stage_timeout = stage_timeout
+        self.on_failure = on_failure
+        self.name = name
+        self._wakeup = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: List[asyncio.Task] = []
+        with self.db.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS transcript_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    ticket_id TEXT NOT NULL UNIQUE,
+                    guild_id TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    data TEXT,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_transcript_jobs_due ON transcript_jobs (status, next_attempt_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_transcript_jobs_guild ON transcript_jobs (guild_id, status)")
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def _wake(self):
+        """Acorda os workers; pode ser chamado de outra thread (ex.: via asyncio.to_thread)."""
+        if self._loop and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def enqueue(self, ticket_key: str, guild_id: str, data: Optional[dict] = None, delay: float = 0.0) -> int:
+        """Grava o trabalho do ticket (ou reinicia o existente), para rodar daqui a delay segundos; retorna o ID."""
+        now = time.time()
+        with self.db.connection() as conn:
+            conn.execute("""
+                INSERT INTO transcript_jobs (ticket_id, guild_id, status, stage, attempts, next_attempt_at, data, created_at, updated_at)
+                VALUES (?, ?, 'pendente', ?, 0, ?, ?, ?, ?)
+                ON CONFLICT (ticket_id) DO UPDATE SET
+                    status = 'pendente', stage = excluded.stage, attempts = 0, next_attempt_at = excluded.next_attempt_at,
+                    data = excluded.data, last_error = NULL, updated_at = excluded.updated_at
+            """, (ticket_key, guild_id, self.stage_names[0], now + delay, json.dumps(data or {}), now, now))
+            job_id = conn.execute("SELECT id FROM transcript_jobs WHERE ticket_id = ?", (ticket_key,)).fetchone()[0]
+        self._wake()
+        return job_id
+
+    def start(self):
+        """Devolve à fila os trabalhos interrompidos por um reinício e inicia os workers."""
+        if self.running:
+            return
+        with self.db.connection() as conn:
+            resumed = conn.execute(
+                "UPDATE transcript_jobs SET status = 'pendente', updated_at = ? WHERE status = 'executando'", (time.time(),)
+            ).rowcount
+        if resumed:
+            logger.info(f"{resumed} trabalhos da fila {self.name} interrompidos foram retomados")
+        self._loop = asyncio.get_running_loop()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    def _claim(self) -> Optional[dict]:
+        """Marca como em execução o trabalho pendente mais antigo que já pode rodar.
+
+        A escolha e a marcação são um único UPDATE, então dois workers (em threads diferentes) nunca pegam o mesmo trabalho.
+        """
+        now = time.time()
+        with self.db.connection() as conn:
+            row = conn.execute("""
+                UPDATE transcript_jobs SET status = 'executando', updated_at = ?
+                WHERE id = (
+                    SELECT id FROM transcript_jobs
+                    WHERE status = 'pendente' AND next_attempt_at <= ?
+                    ORDER BY next_attempt_at LIMIT 1
+                )
+                RETURNING id, ticket_id, guild_id, stage, attempts, data
+            """, (now, now)).fetchone()
+            if not row:
+                return None
+        job_id, ticket_key, guild_id, stage, attempts, data = row
+        return {
+            "id": job_id, "ticket_key": ticket_key, "guild_id": guild_id, "stage": stage,
+            "attempts": attempts, "data": json.loads(data) if data else {}
+        }
+
+    def _idle_timeout(self) -> float:
+        row = self.db.fetchone("SELECT MIN(next_attempt_at) FROM transcript_jobs WHERE status = 'pendente'")
+        if not row or row[0] is None:
+            return IDLE_POLL_SECONDS
+        return min(IDLE_POLL_SECONDS, max(0.0, row[0] - time.time()))
+
+    async def _work(self):
+        while True:
+            try:
+                job = await asyncio.to_thread(self._claim)
+            except Exception as e:
+                logger.error(f"Erro ao ler a fila {self.name}: {e}", exc_info=True)
+                job = None
+            if job:
+                await self._run(job)
+                continue
+            self._wakeup.clear()
+            try:
+                timeout = await asyncio.to_thread(self._idle_timeout)
+            except Exception as e:
+                logger.error(f"Erro ao ler a fila {self.name}: {e}", exc_info=True)
+                timeout = IDLE_POLL_SECONDS
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _save(self, job_id: int, **fields):
+        fields["updated_at"] = time.time()
+        with self.db.connection() as conn:
+            conn.execute(
+                f"UPDATE transcript_jobs SET {', '.join(f'{column} = ?' for column in fields)} WHERE id = ?",
+                (*fields.values(), job_id)
+            )
+
+    async def _run(self, job: dict):
+        started = time.perf_counter()
+        first = self.stage_names.index(job["stage"]) if job["stage"] in self.stage_names else 0
+        stage = job["stage"]
+        try:
+            for stage, func in self.stages[first:]:
+                if stage != job["stage"]:
+                    await asyncio.to_thread(self._save, job["id"], stage=stage, data=json.dumps(job["data"]))
+                    job["stage"] = stage
+                try:
+                    result = await asyncio.wait_for(func(job), self.stage_timeout)
+                except asyncio.TimeoutError:
+                    raise TimeoutError(f"etapa excedeu {self.stage_timeout:.0f}s") from None
+                if result:
+                    job["data"].update(result)
+            await asyncio.to_thread(self._save, job["id"], status="concluido", data=json.dumps(job["data"]), last_error=None)
+            logger.info(f"Trabalho de transcrição do ticket {job['ticket_key']} concluído em {time.perf_counter() - started:.2f}s")
+        except asyncio.CancelledError:
+            raise  # Fica como "executando" e é retomado no próximo start()
+        except Exception as e:
+            attempts = job["attempts"] + 1
+            error = f"{stage}: {type(e).__name__}: {e}"[:500]
+            if attempts >= self.max_attempts:
+                await asyncio.to_thread(
+                    self._save, job["id"], status="falhou", attempts=attempts, last_error=error, data=json.dumps(job["data"])
+                )
+                logger.error(f"Trabalho de transcrição do ticket {job['ticket_key']} falhou após {attempts} tentativas: {error}", exc_info=True)
+                if self.on_failure:
+                    try:
+                        await self.on_failure({**job, "attempts": attempts, "last_error": error})
+                    except Exception as callback_error:
+                        logger.error(f"Erro ao tratar a falha do trabalho {job['id']}: {callback_error}", exc_info=True)
+                return
+            delay = min(self.retry_max, self.retry_base * 2 ** (attempts - 1))
+            await asyncio.to_thread(
+                self._save, job["id"], status="pendente", attempts=attempts, last_error=error,
+                next_attempt_at=time.time() + delay, data=json.dumps(job["data"])
+            )
+            logger.warning(
+                f"Trabalho de transcrição do ticket {job['ticket_key']} falhou na etapa {stage} "
+                f"(tentativa {attempts}/{self.max_attempts}); nova tentativa em {delay:.0f}s: {e}"
+            )
+
+    def summary(self, guild_id: str) -> Dict[str, int]:
+        """Quantidade de trabalhos do servidor em cada status."""
+        rows = self.db.fetchall("SELECT status, COUNT(*) FROM transcript_jobs WHERE guild_id = ? GROUP BY status", (guild_id,))
+        return {status: 0 for status in STATUSES} | dict(rows)
+
+    def unfinished(self, guild_id: str, limit: int = 10) -> List[dict]:
+        """Trabalhos pendentes, em execução ou que falharam, do mais recente para o mais antigo."""
+        rows = self.db.fetchall("""
+            SELECT ticket_id, status, stage, attempts, next_attempt_at, last_error, created_at
+            FROM transcript_jobs WHERE guild_id = ? AND status != 'concluido'
+            ORDER BY created_at DESC LIMIT ?
+        """, (guild_id, limit))
+        columns = ("ticket_key", "status", "stage", "attempts", "next_attempt_at", "last_error", "created_at")
+        return [dict(zip(columns, row)) for row in rows]
+
+    def retry_failed(self, guild_id: str) -> int:
+        """Devolve à fila os trabalhos que falharam, a partir da etapa em que pararam."""
+        with self.db.connection() as conn:
+            count = conn.execute("""
+                UPDATE transcript_jobs SET status = 'pendente', attempts = 0, next_attempt_at = ?, updated_at = ?
+                WHERE guild_id = ? AND status = 'falhou'
+            """, (time.time(), time.time(), guild_id)).rowcount
+        if count:
+            self._wake()
+        return count
+
+    def prune(self, older_than_days: int = 30) -> int:
+        """Apaga o registro dos trabalhos concluídos há mais tempo que o prazo."""
+        with self.db.connection() as conn:
+            return conn.execute(
+                "DELETE FROM transcript_jobs WHERE status = 'concluido' AND updated_at < ?",
+                (time.time() - older_than_days * 86400,)
+            ).rowcount
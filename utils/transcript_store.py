@@ -0,0 +1,271 @@
+# utils/transcript_store.py
+# Description: Armazenamento das transcrições comprimidas em gzip, índice de metadados, retenção por servidor e empacotamento em arquivos tar
+# Date of Creation: 19/10/2026
+# Created by: CodeProjects
+# Version: 1.0
+# Developer Of Version: CodeProjects - Serviços Escaláveis para seu Game
+
+import gzip
+import io
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import struct
+import tarfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import BinaryIO, Dict, Optional, Tuple
+
+from utils.database import get_database
+
+logger = logging.getLogger("DataBit.TranscriptStore")
+
+PACKS_DIR = "packs"
+LEGACY_PATTERN = re.compile(r"^ticket_(\d+)_\d{8}_\d{6}\.html$")
+
+
+class _Slice(io.RawIOBase):
+    """Leitura de um trecho de um arquivo como se fosse um arquivo inteiro (uma transcrição dentro do tar)."""
+
+    def __init__(self, path: str, offset: int, size: int):
+        self._file = open(path, "rb")
+        self._offset = offset
+        self._size = size
+        self._position = 0
+        self._file.seek(offset)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, position: int, whence: int = os.SEEK_SET) -> int:
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self._position, os.SEEK_END: self._size}[whence]
+        self._position = max(0, min(self._size, base + position))
+        self._file.seek(self._offset + self._position)
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        wanted = min(len(buffer), self._size - self._position)
+        if wanted <= 0:
+            return 0
+        read = self._file.readinto(memoryview(buffer)[:wanted])
+        self._position += read
+        return read
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+class _DecodedSlice(gzip.GzipFile):
+    """GzipFile que também fecha o trecho de onde lê (GzipFile não fecha o fileobj recebido)."""
+
+    def __init__(self, raw: _Slice):
+        super().__init__(fileobj=io.BufferedReader(raw), mode="rb")
+        self._raw = raw
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._raw.close()
+
+
+class TranscriptStore:
+    """Transcrições ficam em <root>/<nome>.html.gz e são servidas com Content-Encoding: gzip, sem recompressão.
+
+    Transcrições antigas podem ser movidas para um tar mensal (<root>/packs/transcripts_AAAAMM.tar);
+    o índice guarda o deslocamento de cada uma dentro do tar, então a leitura é um seek + read.
+    """
+
+    def __init__(self, db_path: str, root: str = "transcripts"):
+        self.db_path = db_path
+        self.db = get_database(db_path)
+        self.root = root
+        self.packs_dir = os.path.join(root, PACKS_DIR)
+        os.makedirs(self.packs_dir, exist_ok=True)
+        with self.db.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS transcript_files (
+                    filename TEXT PRIMARY KEY,
+                    guild_id TEXT,
+                    ticket_id TEXT,
+                    size INTEGER NOT NULL,
+                    raw_size INTEGER,
+                    created_at REAL NOT NULL,
+                    pack TEXT,
+                    pack_offset INTEGER
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_transcript_files_guild_created ON transcript_files (guild_id, created_at)")
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(transcript_files)")}
+            if "meta" not in columns:
+                conn.execute("ALTER TABLE transcript_files ADD COLUMN meta TEXT")  # Cabeçalho da transcrição (JSON) para o visualizador
+
+    def path_for(self, filename: str) -> str:
+        return os.path.join(self.root, filename + ".gz")
+
+    @staticmethod
+    def _raw_size(path: str) -> int:
+        """Tamanho descomprimido lido do trailer do gzip (ISIZE)."""
+        with open(path, "rb") as f:
+            f.seek(-4, os.SEEK_END)
+            return struct.unpack("<I", f.read(4))[0]
+
+    def register(self, filename: str, guild_id: str, ticket_id: str, created_at: Optional[float] = None, meta: Optional[dict] = None):
+        path = self.path_for(filename)
+        with self.db.connection() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO transcript_files (filename, guild_id, ticket_id, size, raw_size, created_at, pack, pack_offset, meta)
+                VALUES (?, ?, ?, ?, ?, ?, NULL, NULL, ?)
+            """, (
+                filename, guild_id, ticket_id, os.path.getsize(path), self._raw_size(path), created_at or time.time(),
+                json.dumps(meta) if meta else None
+            ))
+
+    def describe(self, filename: str) -> Optional[dict]:
+        """Servidor, ticket, data e cabeçalho (meta) registrados para a transcrição."""
+        row = self.db.fetchone(
+            "SELECT guild_id, ticket_id, created_at, raw_size, meta FROM transcript_files WHERE filename = ?", (filename,)
+        )
+        if not row:
+            return None
+        guild_id, ticket_id, created_at, raw_size, meta = row
+        return {
+            "guild_id": guild_id,
+            "ticket_id": ticket_id,
+            "created_at": created_at,
+            "raw_size": raw_size,
+            "meta": json.loads(meta) if meta else {}
+        }
+
+    def locate(self, filename: str) -> Optional[Tuple[str, int, int]]:
+        """Retorna (arquivo, deslocamento, tamanho) dos bytes gzip de uma transcrição."""
+        with self.db.connection() as conn:
+            row = conn.execute("SELECT size, pack, pack_offset FROM transcript_files WHERE filename = ?", (filename,)).fetchone()
+        if not row:
+            return None
+        size, pack, offset = row
+        if pack:
+            return os.path.join(self.packs_dir, pack), offset, size
+        return self.path_for(filename), 0, size
+
+    def read_encoded(self, filename: str) -> Optional[bytes]:
+        location = self.locate(filename)
+        if not location or not os.path.exists(location[0]):
+            return None
+        path, offset, size = location
+        with open(path, "rb") as f:
+            f.seek(offset)
+            return f.read(size)
+
+    def open_decoded(self, filename: str) -> Optional[BinaryIO]:
+        """Abre a transcrição descomprimida para leitura em streaming (o chamador fecha o arquivo)."""
+        location = self.locate(filename)
+        if not location or not os.path.exists(location[0]):
+            return None
+        return _DecodedSlice(_Slice(*location))
+
+    def compact(self, retention_days: Dict[str, int], pack_after_days: int = 0, now: Optional[float] = None) -> dict:
+        """Comprime transcrições antigas em .html, aplica a retenção de cada servidor e empacota as antigas."""
+        now = now or time.time()
+        stats = {"compressed": 0, "expired": 0, "messages_removed": 0, "packed": 0, "packs_removed": 0, "bytes_freed": 0}
+        self._compress_legacy(stats)
+        self._expire(retention_days, now, stats)
+        if pack_after_days:
+            self._pack(now - pack_after_days * 86400, stats)
+        return stats
+
+    def _compress_legacy(self, stats: dict):
+        for name in os.listdir(self.root):
+            match = LEGACY_PATTERN.match(name)
+            if not match:
+                continue
+            source = os.path.join(self.root, name)
+            before = os.path.getsize(source)
+            with open(source, "rb") as src, gzip.open(self.path_for(name), "wb", compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst)
+            with self.db.connection() as conn:
+                row = conn.execute(
+                    "SELECT guild_id FROM tickets WHERE ticket_id LIKE ? ESCAPE '\\'", (f"%\\_{match.group(1)}",)
+                ).fetchone() if self._has_table(conn, "tickets") else None
+            self.register(name, row[0] if row else None, match.group(1), os.path.getmtime(source))
+            os.remove(source)
+            stats["compressed"] += 1
+            stats["bytes_freed"] += before - os.path.getsize(self.path_for(name))
+
+    @staticmethod
+    def _has_table(conn: sqlite3.Connection, name: str) -> bool:
+        return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone() is not None
+
+    def _expire(self, retention_days: Dict[str, int], now: float, stats: dict):
+        """Apaga as transcrições vencidas junto com as mensagens salvas do ticket e suas entradas no índice de busca."""
+        with self.db.connection() as conn:
+            has_messages = self._has_table(conn, "ticket_messages")
+            has_search = self._has_table(conn, "ticket_search_docs")
+            for guild_id, days in retention_days.items():
+                if not days:
+                    continue
+                rows = conn.execute(
+                    "SELECT filename, ticket_id, size, pack FROM transcript_files WHERE guild_id = ? AND created_at < ?",
+                    (guild_id, now - days * 86400)
+                ).fetchall()
+                for filename, ticket_id, size, pack in rows:
+                    if not pack and os.path.exists(self.path_for(filename)):
+                        os.remove(self.path_for(filename))
+                        stats["bytes_freed"] += size
+                    conn.execute("DELETE FROM transcript_files WHERE filename = ?", (filename,))
+                    if has_messages and ticket_id:
+                        stats["messages_removed"] += conn.execute(
+                            "DELETE FROM ticket_messages WHERE ticket_id = ?", (f"{guild_id}_{ticket_id}",)
+                        ).rowcount
+                    if has_search:
+                        conn.execute("DELETE FROM ticket_search WHERE transcript = ?", (filename,))
+                        conn.execute("DELETE FROM ticket_search_docs WHERE transcript = ?", (filename,))
+                    stats["expired"] += 1
+            conn.commit()
+            referenced = {pack for (pack,) in conn.execute("SELECT DISTINCT pack FROM transcript_files WHERE pack IS NOT NULL")}
+        for pack in os.listdir(self.packs_dir):
+            if pack.endswith(".tar") and pack not in referenced:
+                path = os.path.join(self.packs_dir, pack)
+                stats["bytes_freed"] += os.path.getsize(path)
+                os.remove(path)
+                stats["packs_removed"] += 1
+                logger.info(f"Pacote {pack} removido (todas as transcrições expiraram)")
+
+    def _pack(self, cutoff: float, stats: dict):
+        with self.db.connection() as conn:
+            rows = conn.execute(
+                "SELECT filename, created_at FROM transcript_files WHERE pack IS NULL AND created_at < ? ORDER BY created_at",
+                (cutoff,)
+            ).fetchall()
+        by_month = defaultdict(list)
+        for filename, created_at in rows:
+            if os.path.exists(self.path_for(filename)):
+                month = datetime.fromtimestamp(created_at, timezone.utc).strftime("%Y%m")
+                by_month[f"transcripts_{month}.tar"].append(filename)
+        for pack, filenames in by_month.items():
+            pack_path = os.path.join(self.packs_dir, pack)
+            with tarfile.open(pack_path, "a") as tar:
+                for filename in filenames:
+                    tar.add(self.path_for(filename), arcname=filename + ".gz")
+            with tarfile.open(pack_path, "r") as tar:
+                offsets = {member.name[:-3]: member.offset_data for member in tar.getmembers()}
+            with self.db.connection() as conn:
+                conn.executemany(
+                    "UPDATE transcript_files SET pack = ?, pack_offset = ? WHERE filename = ?",
+                    [(pack, offsets[filename], filename) for filename in filenames]
+                )
+            for filename in filenames:
+                os.remove(self.path_for(filename))
+            stats["packed"] += len(filenames)
+            logger.info(f"{len(filenames)} transcrições empacotadas em {pack}")
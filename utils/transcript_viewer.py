@@ -0,0 +1,166 @@
+# utils/transcript_viewer.py
+# Description: Visualizador paginado das transcrições: páginas de mensagens por cursor em JSON, busca no servidor e página leve com rolagem virtual
+# Date of Creation: 19/10/2026
+# Created by: CodeProjects
+# Version: 1.0
+# Developer Of Version: CodeProjects - Serviços Escaláveis para seu Game
+
+import json
+import logging
+from typing import Dict, List, Optional
+
+from utils.asset_archive import asset_key
+from utils.database import get_database
+from utils.transcript import (
+    DEFAULT_AVATAR, DEFAULT_THEME, THEMES, format_timestamp, load_templates, publish_stylesheet, render_page
+)
+from utils.transcript_store import TranscriptStore
+
+logger = logging.getLogger("DataBit.TranscriptViewer")
+
+PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 500
+SEARCH_LIMIT = 50
+SNIPPET_CHARS = 80
+
+
+class TranscriptViewer:
+    """Lê as mensagens capturadas de um ticket fechado direto da tabela ticket_messages.
+
+    As páginas usam o ID da mensagem como cursor (depois/antes), então cada página é uma busca
+    no índice (ticket_id, message_id) e custa o mesmo no começo ou no fim de um ticket enorme.
+    Transcrições sem mensagens capturadas (tickets antigos) continuam sendo servidas em HTML completo.
+    """
+
+    def __init__(self, db_path: str, store: TranscriptStore):
+        self.db = get_database(db_path)
+        self.store = store
+
+    def ticket_for(self, filename: str) -> Optional[dict]:
+        """Dados da transcrição e a chave do ticket, se houver mensagens capturadas para ela."""
+        info = self.store.describe(filename)
+        if not info or not info["guild_id"] or not info["ticket_id"]:
+            return None
+        info["ticket_key"] = f"{info['guild_id']}_{info['ticket_id']}"
+        if not self.db.fetchone("SELECT 1 FROM ticket_messages WHERE ticket_id = ? LIMIT 1", (info["ticket_key"],)):
+            return None
+        return info
+
+    def page(self, ticket_key: str, after: Optional[int] = None, before: Optional[int] = None, limit: int = PAGE_LIMIT) -> dict:
+        """Mensagens depois (ou antes) do cursor, em ordem cronológica, com indicação de mais páginas.
+
+        html traz a página já renderizada com o mesmo template da transcrição completa (markdown, embeds, respostas).
+        """
+        limit = max(1, min(limit, MAX_PAGE_LIMIT))
+        if before is not None:
+            rows = self.db.fetchall("""
+                SELECT message_id, author_id, author_name, author_avatar, content, attachments, created_at, edited_at, extras
+                FROM ticket_messages WHERE ticket_id = ? AND deleted = 0 AND message_id < ?
+                ORDER BY message_id DESC LIMIT ?
+            """, (ticket_key, before, limit + 1))
+            has_more = len(rows) > limit
+            rows = rows[:limit][::-1]
+            has_before, has_after = has_more, True
+        else:
+            rows = self.db.fetchall("""
+                SELECT message_id, author_id, author_name, author_avatar, content, attachments, created_at, edited_at, extras
+                FROM ticket_messages WHERE ticket_id = ? AND deleted = 0 AND message_id > ?
+                ORDER BY message_id LIMIT ?
+            """, (ticket_key, after if after is not None else -1, limit + 1))
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            has_before, has_after = after is not None, has_more
+        messages = self._to_messages(rows)
+        return {
+            "messages": messages,
+            "html": render_page(messages),
+            "has_before": has_before and bool(rows),
+            "has_after": has_after and bool(rows)
+        }
+
+    def search(self, ticket_key: str, text: str, limit: int = SEARCH_LIMIT) -> List[dict]:
+        """Mensagens do ticket que contêm o texto (sem diferenciar maiúsculas), com um trecho ao redor."""
+        text = text.strip()
+        if not text:
+            return []
+        pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        rows = self.db.fetchall("""
+            SELECT message_id, author_name, content, created_at
+            FROM ticket_messages
+            WHERE ticket_id = ? AND deleted = 0 AND content LIKE ? ESCAPE '\\'
+            ORDER BY message_id LIMIT ?
+        """, (ticket_key, pattern, limit))
+        results = []
+        for message_id, author_name, content, created_at in rows:
+            start = max(0, content.lower().find(text.lower()) - SNIPPET_CHARS // 2)
+            snippet = content[start:start + SNIPPET_CHARS]
+            results.append({
+                "id": str(message_id),
+                "author_name": author_name,
+                "timestamp": format_timestamp(created_at),
+                "snippet": ("…" if start else "") + snippet + ("…" if start + SNIPPET_CHARS < len(content) else "")
+            })
+        return results
+
+    def count(self, ticket_key: str) -> int:
+        return self.db.fetchone("SELECT COUNT(*) FROM ticket_messages WHERE ticket_id = ? AND deleted = 0", (ticket_key,))[0]
+
+    def _archived(self, urls: List[str]) -> Dict[str, str]:
+        """URL original -> caminho do arquivo no arquivo de anexos (links do CDN do Discord expiram)."""
+        keys = {url: asset_key(url) for url in set(urls)}
+        if not keys:
+            return {}
+        unique = list(set(keys.values()))
+        rows = self.db.fetchall(
+            f"SELECT url_key, name FROM transcript_assets WHERE url_key IN ({','.join('?' * len(unique))})", unique
+        )
+        names = dict(rows)
+        return {url: f"assets/{names[key]}" for url, key in keys.items() if key in names}
+
+    def _to_messages(self, rows: list) -> List[dict]:
+        messages = []
+        urls = []
+        for message_id, author_id, author_name, author_avatar, content, attachments, created_at, edited_at, extras in rows:
+            attachments = json.loads(attachments) if attachments else []
+            urls.extend(a["url"] for a in attachments)
+            if author_avatar:
+                urls.append(author_avatar)
+            messages.append({
+                "id": str(message_id),  # Snowflakes passam de 2^53 e perderiam precisão como número no JavaScript
+                "author_id": str(author_id),
+                "author_name": author_name,
+                "author_avatar": author_avatar,
+                "content": content,
+                "created_at": created_at,
+                "timestamp": format_timestamp(created_at),
+                "edited": bool(edited_at),
+                "attachments": attachments,
+                **(json.loads(extras) if extras else {})
+            })
+        archived = self._archived(urls)
+        for message in messages:
+            message["author_avatar"] = archived.get(message["author_avatar"], message["author_avatar"]) or DEFAULT_AVATAR
+            for attachment in message["attachments"]:
+                attachment["filename"] = attachment.get("filename") or attachment["url"].rsplit("/", 1)[-1].split("?")[0]
+                attachment["url"] = archived.get(attachment["url"], attachment["url"])
+        return messages
+
+    def render_shell(self, filename: str) -> Optional[str]:
+        """Página leve do visualizador, já com a primeira página de mensagens embutida."""
+        info = self.ticket_for(filename)
+        if not info:
+            return None
+        meta = info["meta"]
+        theme = meta.get("theme") if meta.get("theme") in THEMES else DEFAULT_THEME
+        return load_templates()["viewer"].render(
+            filename=filename,
+            ticket_id=meta.get("ticket_id", info["ticket_id"]),
+            category=meta.get("category", "Desconhecida"),
+            user_name=meta.get("user_name", "Desconhecido"),
+            closed_at=meta.get("closed_at", "-"),
+            theme=theme,
+            stylesheet_url=f"static/{publish_stylesheet()}",
+            total=self.count(info["ticket_key"]),
+            first_page=self.page(info["ticket_key"]),
+            page_limit=PAGE_LIMIT
+        )